@@ -1,32 +1,110 @@
 """Main Flask application for Healthcare Conversational AI Platform."""
 
+import atexit
+
 from flask import Flask, request, jsonify
-import asyncio
-from typing import Dict, Any
+from flask.json.provider import JSONProvider
+import msgspec
+import orjson
+from werkzeug.exceptions import RequestEntityTooLarge
+from typing import Coroutine, Dict, Any, Optional
 
 from config.config import config
 from src.utils.logging import get_logger
+from src.utils.event_loop import background_loop
 from src.dialogflow.client import DialogflowClient
-from src.llm_services.gemini_service import gemini_service
+from src.dialogflow.webhook_codec import decode_webhook_request, encode_fulfillment
 from src.agent_assist.service import agent_assist_service
-from src.genesys.webhooks import webhook_handler
+from src.genesys.webhooks import PayloadTooLargeError, webhook_handler
 from src.crm.provider import CRMFactory
 
 logger = get_logger(__name__, enable_cloud_logging=True)
 
+
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson.
+    
+    orjson emits bytes directly and does not sort keys, so responses keep
+    insertion order without the stdlib encoder's Python-level walk.
+    """
+    
+    option = orjson.OPT_NON_STR_KEYS
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        """Serialize data as a JSON string."""
+        return orjson.dumps(obj, option=self.option).decode()
+    
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        """Deserialize JSON from a string or bytes."""
+        return orjson.loads(s)
+    
+    def response(self, *args: Any, **kwargs: Any):
+        """Build a JSON response without an intermediate str."""
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, option=self.option),
+            mimetype="application/json"
+        )
+
+
 # Initialize Flask app
 app = Flask(__name__)
-app.config['JSON_SORT_KEYS'] = False
+app.json = ORJSONProvider(app)
+# Reject oversized bodies before they are buffered
+app.config["MAX_CONTENT_LENGTH"] = webhook_handler.MAX_BODY_SIZE
 
 # Initialize services
 dialogflow_client = DialogflowClient()
 crm_client = CRMFactory.create_crm(
     provider=config.crm.provider,
     api_endpoint=config.crm.api_endpoint or "https://api.example.com",
-    api_key=config.crm.api_key or "dummy-key"
+    api_key=config.crm.api_key or "dummy-key",
+    max_connections=config.crm.max_connections,
+    max_concurrency=config.crm.max_concurrency
 )
 
 
+def parse_json_body() -> Dict[str, Any]:
+    """Parse the request body with orjson, bypassing Flask's JSON cache.
+    
+    Returns:
+        Parsed body, or an empty dict when the body is empty or not JSON
+    """
+    return decode_webhook_request(request.get_data(cache=False))
+
+
+def fulfillment_response(text: str, appointment_id: Optional[str] = None):
+    """Build a Dialogflow fulfillment response from a pre-built template.
+    
+    Args:
+        text: Message to speak/show to the caller
+        appointment_id: Optional appointment ID to set as a session parameter
+        
+    Returns:
+        JSON response
+    """
+    return app.response_class(
+        encode_fulfillment(text, appointment_id),
+        status=200,
+        mimetype="application/json"
+    )
+
+
+def call_crm(coro: Coroutine) -> Any:
+    """Run a CRM call on the shared background loop with the request timeout.
+    
+    Args:
+        coro: CRM client coroutine
+        
+    Returns:
+        The CRM call's result
+    """
+    return background_loop.run(coro, timeout=config.request_timeout)
+
+
+atexit.register(lambda: background_loop.run(crm_client.close(), timeout=5))
+
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint."""
@@ -55,7 +133,7 @@ def detect_intent():
     }
     """
     try:
-        data = request.get_json()
+        data = parse_json_body()
         
         if not data or 'session_id' not in data or 'text' not in data:
             return jsonify({"error": "Missing required fields"}), 400
@@ -96,34 +174,34 @@ def get_agent_assist():
     }
     """
     try:
-        data = request.get_json()
+        data = parse_json_body()
         
         if not data or 'conversation_id' not in data:
             return jsonify({"error": "Missing conversation_id"}), 400
         
         conversation_id = data['conversation_id']
         
-        # Generate agent assist (async)
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        assist_response = loop.run_until_complete(
+        # Generate agent assist on the shared background loop
+        assist_response = background_loop.run(
             agent_assist_service.generate_real_time_assist(
                 conversation_id=conversation_id,
                 include_summary=data.get('include_summary', True),
                 include_smart_replies=data.get('include_smart_replies', True),
                 include_knowledge=data.get('include_knowledge', True)
-            )
+            ),
+            timeout=config.request_timeout
         )
         
-        loop.close()
-        
         logger.audit("agent_assist_requested", conversation_id, {
             "has_summary": assist_response.summary is not None,
             "num_replies": len(assist_response.smart_replies or [])
         })
         
-        return jsonify(assist_response.to_dict()), 200
+        return app.response_class(
+            msgspec.json.encode(assist_response),
+            status=200,
+            mimetype="application/json"
+        )
     
     except Exception as e:
         logger.error(f"Error generating agent assist: {e}", exc_info=True)
@@ -141,7 +219,7 @@ def add_conversation_message(conversation_id: str):
     }
     """
     try:
-        data = request.get_json()
+        data = parse_json_body()
         
         if not data or 'role' not in data or 'text' not in data:
             return jsonify({"error": "Missing required fields"}), 400
@@ -163,20 +241,25 @@ def add_conversation_message(conversation_id: str):
 def genesys_webhook():
     """Webhook endpoint for Genesys Cloud events."""
     try:
-        # Validate signature
-        if not webhook_handler.validate_signature(request):
+        # Read and validate the signature in one pass over the body stream
+        try:
+            body, valid = webhook_handler.read_signed_body(
+                request.stream, request.headers.get("X-Genesys-Signature")
+            )
+        except (PayloadTooLargeError, RequestEntityTooLarge):
+            return jsonify({"error": "Payload too large"}), 413
+        if not valid:
             logger.warning("Invalid webhook signature")
             return jsonify({"error": "Invalid signature"}), 401
         
-        data = request.get_json()
-        
-        if not data:
+        if not body:
             return jsonify({"error": "Invalid payload"}), 400
         
-        event_type = data.get('topicName') or data.get('eventType')
-        
-        # Handle webhook
-        response = webhook_handler.handle_webhook(event_type, data)
+        # Decode straight into the event's payload struct and handle it
+        try:
+            event_type, response = webhook_handler.handle_raw_webhook(body)
+        except msgspec.DecodeError:
+            return jsonify({"error": "Invalid payload"}), 400
         
         logger.audit("webhook_received", "genesys", {
             "event_type": event_type
@@ -193,7 +276,7 @@ def genesys_webhook():
 def dialogflow_webhook_appointment():
     """Dialogflow webhook for appointment scheduling."""
     try:
-        data = request.get_json()
+        data = parse_json_body()
         
         session_info = data.get('sessionInfo', {})
         parameters = session_info.get('parameters', {})
@@ -204,69 +287,41 @@ def dialogflow_webhook_appointment():
         time = parameters.get('time')
         
         if not all([patient_id, appointment_type, date, time]):
-            return jsonify({
-                "fulfillmentResponse": {
-                    "messages": [{
-                        "text": {
-                            "text": ["I need more information to schedule your appointment."]
-                        }
-                    }]
-                }
-            })
+            return fulfillment_response("I need more information to schedule your appointment.")
         
         # Schedule appointment in CRM
         datetime_str = f"{date}T{time}:00Z"
-        appointment = crm_client.schedule_appointment(
+        appointment = call_crm(crm_client.schedule_appointment(
             patient_id=patient_id,
             appointment_type=appointment_type,
             datetime_str=datetime_str
-        )
+        ))
         
         logger.audit("appointment_scheduled", patient_id, {
             "appointment_id": appointment['appointment_id'],
             "type": appointment_type
         })
         
-        return jsonify({
-            "fulfillmentResponse": {
-                "messages": [{
-                    "text": {
-                        "text": [
-                            f"Your {appointment_type} appointment has been scheduled "
-                            f"for {date} at {time}. Your confirmation number is "
-                            f"{appointment['appointment_id']}."
-                        ]
-                    }
-                }]
-            },
-            "sessionInfo": {
-                "parameters": {
-                    "appointment_id": appointment['appointment_id']
-                }
-            }
-        })
+        return fulfillment_response(
+            f"Your {appointment_type} appointment has been scheduled "
+            f"for {date} at {time}. Your confirmation number is "
+            f"{appointment['appointment_id']}.",
+            appointment_id=appointment['appointment_id']
+        )
     
     except Exception as e:
         logger.error(f"Error in appointment webhook: {e}", exc_info=True)
-        return jsonify({
-            "fulfillmentResponse": {
-                "messages": [{
-                    "text": {
-                        "text": [
-                            "I'm sorry, I encountered an error scheduling your appointment. "
-                            "Let me connect you with an agent."
-                        ]
-                    }
-                }]
-            }
-        }), 200
+        return fulfillment_response(
+            "I'm sorry, I encountered an error scheduling your appointment. "
+            "Let me connect you with an agent."
+        )
 
 
 @app.route('/webhooks/dialogflow/insurance', methods=['POST'])
 def dialogflow_webhook_insurance():
     """Dialogflow webhook for insurance inquiries."""
     try:
-        data = request.get_json()
+        data = parse_json_body()
         
         session_info = data.get('sessionInfo', {})
         parameters = session_info.get('parameters', {})
@@ -275,18 +330,10 @@ def dialogflow_webhook_insurance():
         insurance_topic = parameters.get('insurance_topic')
         
         if not patient_id:
-            return jsonify({
-                "fulfillmentResponse": {
-                    "messages": [{
-                        "text": {
-                            "text": ["I'll need to verify your identity first."]
-                        }
-                    }]
-                }
-            })
+            return fulfillment_response("I'll need to verify your identity first.")
         
         # Get insurance info from CRM
-        insurance_info = crm_client.get_insurance_info(patient_id)
+        insurance_info = call_crm(crm_client.get_insurance_info(patient_id))
         
         # Build response based on topic
         if insurance_topic == "coverage":
@@ -304,34 +351,18 @@ def dialogflow_webhook_insurance():
         else:
             response_text = "I can help you with insurance questions. What would you like to know?"
         
-        return jsonify({
-            "fulfillmentResponse": {
-                "messages": [{
-                    "text": {
-                        "text": [response_text]
-                    }
-                }]
-            }
-        })
+        return fulfillment_response(response_text)
     
     except Exception as e:
         logger.error(f"Error in insurance webhook: {e}", exc_info=True)
-        return jsonify({
-            "fulfillmentResponse": {
-                "messages": [{
-                    "text": {
-                        "text": ["I'm having trouble accessing your insurance information."]
-                    }
-                }]
-            }
-        }), 200
+        return fulfillment_response("I'm having trouble accessing your insurance information.")
 
 
 @app.route('/webhooks/dialogflow/prescription', methods=['POST'])
 def dialogflow_webhook_prescription():
     """Dialogflow webhook for prescription refills."""
     try:
-        data = request.get_json()
+        data = parse_json_body()
         
         session_info = data.get('sessionInfo', {})
         parameters = session_info.get('parameters', {})
@@ -340,54 +371,30 @@ def dialogflow_webhook_prescription():
         medication_name = parameters.get('medication_name')
         
         if not all([patient_id, medication_name]):
-            return jsonify({
-                "fulfillmentResponse": {
-                    "messages": [{
-                        "text": {
-                            "text": ["I need your patient ID and medication name."]
-                        }
-                    }]
-                }
-            })
+            return fulfillment_response("I need your patient ID and medication name.")
         
         # Create case for prescription refill in CRM
-        case = crm_client.create_case(
+        case = call_crm(crm_client.create_case(
             patient_id=patient_id,
             subject=f"Prescription Refill: {medication_name}",
             description=f"Patient requested refill for {medication_name}",
             priority="normal"
-        )
+        ))
         
         logger.audit("prescription_refill_requested", patient_id, {
             "medication": medication_name,
             "case_id": case['case_id']
         })
         
-        return jsonify({
-            "fulfillmentResponse": {
-                "messages": [{
-                    "text": {
-                        "text": [
-                            f"I've submitted your refill request for {medication_name}. "
-                            f"Your pharmacy should have it ready within 24 hours. "
-                            f"Your reference number is {case['case_id']}."
-                        ]
-                    }
-                }]
-            }
-        })
+        return fulfillment_response(
+            f"I've submitted your refill request for {medication_name}. "
+            f"Your pharmacy should have it ready within 24 hours. "
+            f"Your reference number is {case['case_id']}."
+        )
     
     except Exception as e:
         logger.error(f"Error in prescription webhook: {e}", exc_info=True)
-        return jsonify({
-            "fulfillmentResponse": {
-                "messages": [{
-                    "text": {
-                        "text": ["I'm having trouble processing your prescription request."]
-                    }
-                }]
-            }
-        }), 200
+        return fulfillment_response("I'm having trouble processing your prescription request.")
 
 
 @app.route('/api/v1/metrics', methods=['GET'])
@@ -12,6 +12,8 @@ class GCPConfig:
     location: str = "us-central1"
     dialogflow_agent_id: Optional[str] = None
     gemini_model: str = "gemini-pro"
+    gemini_max_concurrency: int = 16
+    embedding_model: str = "models/embedding-001"
     pubsub_topic: Optional[str] = None
 
 
@@ -30,6 +32,8 @@ class CRMConfig:
     provider: str = "salesforce"
     api_endpoint: Optional[str] = None
     api_key: Optional[str] = None
+    max_connections: int = 100
+    max_concurrency: int = 25
 
 
 @dataclass
@@ -56,13 +60,22 @@ class AppConfig:
     
     # Service settings
     agent_assist_enabled: bool = True
+    assist_prefetch_enabled: bool = False
     llm_confidence_threshold: float = 0.7
     max_conversation_history: int = 10
+    conversation_store: str = "memory"
+    conversation_ttl: int = 3600
     
     # Performance settings
     request_timeout: int = 30
     max_retries: int = 3
     enable_caching: bool = True
+    redis_url: Optional[str] = None
+    semantic_cache_threshold: float = 0.85
+    semantic_cache_ttl: int = 3600
+    semantic_cache_max_entries: int = 10000
+    local_embedding_model: Optional[str] = None
+    local_embedding_tokenizer: Optional[str] = None
 
 
 def load_config() -> AppConfig:
@@ -74,6 +87,8 @@ def load_config() -> AppConfig:
         location=os.getenv("GCP_LOCATION", "us-central1"),
         dialogflow_agent_id=os.getenv("DIALOGFLOW_AGENT_ID"),
         gemini_model=os.getenv("GEMINI_MODEL", "gemini-pro"),
+        gemini_max_concurrency=int(os.getenv("GEMINI_MAX_CONCURRENCY", "16")),
+        embedding_model=os.getenv("EMBEDDING_MODEL", "models/embedding-001"),
         pubsub_topic=os.getenv("PUBSUB_TOPIC", "conversation-events"),
     )
     
@@ -88,6 +103,8 @@ def load_config() -> AppConfig:
         provider=os.getenv("CRM_PROVIDER", "salesforce"),
         api_endpoint=os.getenv("CRM_API_ENDPOINT"),
         api_key=os.getenv("CRM_API_KEY"),
+        max_connections=int(os.getenv("CRM_MAX_CONNECTIONS", "100")),
+        max_concurrency=int(os.getenv("CRM_MAX_CONCURRENCY", "25")),
     )
     
     security_config = SecurityConfig(
@@ -104,11 +121,20 @@ def load_config() -> AppConfig:
         crm=crm_config,
         security=security_config,
         agent_assist_enabled=os.getenv("AGENT_ASSIST_ENABLED", "true").lower() == "true",
+        assist_prefetch_enabled=os.getenv("ASSIST_PREFETCH_ENABLED", "false").lower() == "true",
         llm_confidence_threshold=float(os.getenv("LLM_CONFIDENCE_THRESHOLD", "0.7")),
         max_conversation_history=int(os.getenv("MAX_CONVERSATION_HISTORY", "10")),
+        conversation_store=os.getenv("CONVERSATION_STORE", "memory"),
+        conversation_ttl=int(os.getenv("CONVERSATION_TTL", "3600")),
         request_timeout=int(os.getenv("REQUEST_TIMEOUT", "30")),
         max_retries=int(os.getenv("MAX_RETRIES", "3")),
         enable_caching=os.getenv("ENABLE_CACHING", "true").lower() == "true",
+        redis_url=os.getenv("REDIS_URL"),
+        semantic_cache_threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.85")),
+        semantic_cache_ttl=int(os.getenv("SEMANTIC_CACHE_TTL", "3600")),
+        semantic_cache_max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "10000")),
+        local_embedding_model=os.getenv("LOCAL_EMBEDDING_MODEL"),
+        local_embedding_tokenizer=os.getenv("LOCAL_EMBEDDING_TOKENIZER"),
     )
 
 
@@ -19,10 +19,16 @@ setup(
         "google-cloud-secret-manager>=2.16.4",
         "flask>=3.0.0",
         "gunicorn>=22.0.0",
+        "uvloop>=0.17; sys_platform != 'win32'",
         "requests>=2.31.0",
+        "aiohttp>=3.9",
+        "orjson>=3.10",
         "pydantic>=2.5.0",
         "celery>=5.3.4",
         "redis>=5.0.1",
+        "msgspec>=0.18",
+        "cachetools>=5.3",
+        "numpy>=1.24",
         "cryptography>=42.0.4",
     ],
     extras_require={
@@ -30,8 +36,25 @@ setup(
             "pytest>=7.4.3",
             "pytest-asyncio>=0.21.1",
             "pytest-mock>=3.12.0",
+            "fakeredis>=2.20",
             "pylint>=3.0.3",
             "black>=23.12.1",
-        ]
+        ],
+        "local-embeddings": [
+            "onnxruntime>=1.16",
+            "tokenizers>=0.15",
+        ],
+        "ann": [
+            "hnswlib>=0.8",
+        ],
+        "entity-matching": [
+            "pyahocorasick>=2.0",
+        ],
+        "batch": [
+            "google-genai>=1.0",
+        ],
+        "re2": [
+            "google-re2>=1.1",
+        ],
     },
 )
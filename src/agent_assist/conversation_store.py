@@ -0,0 +1,340 @@
+"""Conversation history storage for Agent Assist.
+
+Each conversation keeps a sliding window of its most recent messages.
+The in-memory store serves a single process; the Redis store shares
+history between all Gunicorn workers and instances.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from itertools import islice
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import msgspec
+import redis
+
+from config.config import config
+
+_message_encoder = msgspec.msgpack.Encoder()
+_message_decoder = msgspec.msgpack.Decoder(Dict[str, Any])
+
+
+class ConversationStore(ABC):
+    """Interface for conversation history storage."""
+
+    # Stores doing network I/O set this; coroutines then call them from a
+    # worker thread instead of stalling the shared event loop
+    BLOCKING = False
+
+    @abstractmethod
+    def register(self, conversation_id: str) -> bool:
+        """Start tracking a conversation.
+
+        Args:
+            conversation_id: Conversation identifier
+
+        Returns:
+            True if the conversation was not tracked before
+        """
+
+    def append(self, conversation_id: str, message: Dict[str, Any]) -> bool:
+        """Append a message, evicting the oldest past the history limit.
+
+        An untracked conversation is registered by its first message.
+
+        Args:
+            conversation_id: Conversation identifier
+            message: Message to store
+
+        Returns:
+            True if the conversation was not tracked before
+        """
+        return bool(self.append_many([(conversation_id, message)]))
+
+    @abstractmethod
+    def append_many(self, entries: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """Append messages for any number of conversations, in order.
+
+        Args:
+            entries: (conversation_id, message) pairs
+
+        Returns:
+            Conversations registered by these messages
+        """
+
+    @abstractmethod
+    def get_messages(self, conversation_id: str, limit: Optional[int] = None) -> List[Dict]:
+        """Get stored messages, oldest first.
+
+        Args:
+            conversation_id: Conversation identifier
+            limit: Maximum number of recent messages to return
+
+        Returns:
+            List of messages (empty for unknown conversations)
+        """
+
+    @abstractmethod
+    def delete(self, conversation_id: str) -> bool:
+        """Stop tracking a conversation and drop its messages.
+
+        Args:
+            conversation_id: Conversation identifier
+
+        Returns:
+            True if the conversation was tracked
+        """
+
+    @abstractmethod
+    def total_messages(self) -> int:
+        """Number of messages held across all conversations."""
+
+    @abstractmethod
+    def __contains__(self, conversation_id: str) -> bool:
+        """Whether a conversation is tracked."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of tracked conversations."""
+
+    def __getitem__(self, conversation_id: str) -> List[Dict]:
+        if conversation_id not in self:
+            raise KeyError(conversation_id)
+        return self.get_messages(conversation_id)
+
+
+class InMemoryConversationStore(ConversationStore):
+    """Process-local store of bounded deques guarded by a lock."""
+
+    def __init__(self, max_messages: int = None):
+        """Initialize in-memory store.
+
+        Args:
+            max_messages: Messages kept per conversation
+        """
+        self.max_messages = max_messages or config.max_conversation_history
+        self._conversations: Dict[str, Deque[Dict]] = {}
+        # Kept up to date so metrics never scan every conversation
+        self._total_messages = 0
+        self._lock = threading.Lock()
+
+    def register(self, conversation_id: str) -> bool:
+        with self._lock:
+            if conversation_id in self._conversations:
+                return False
+            # Sliding window: the oldest message is evicted in O(1)
+            self._conversations[conversation_id] = deque(maxlen=self.max_messages)
+            return True
+
+    def append(self, conversation_id: str, message: Dict[str, Any]) -> bool:
+        with self._lock:
+            return self._append_locked(conversation_id, message)
+
+    def append_many(self, entries: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        with self._lock:
+            return [
+                conversation_id for conversation_id, message in entries
+                if self._append_locked(conversation_id, message)
+            ]
+
+    def _append_locked(self, conversation_id: str, message: Dict[str, Any]) -> bool:
+        history = self._conversations.get(conversation_id)
+        registered = history is None
+        if registered:
+            history = self._conversations[conversation_id] = deque(
+                maxlen=self.max_messages
+            )
+        if len(history) != history.maxlen:
+            # A full window evicts its oldest message, so the total is unchanged
+            self._total_messages += 1
+        history.append(message)
+        return registered
+
+    def get_messages(self, conversation_id: str, limit: Optional[int] = None) -> List[Dict]:
+        with self._lock:
+            history = self._conversations.get(conversation_id)
+            if not history:
+                return []
+            if limit:
+                return list(islice(history, max(0, len(history) - limit), None))
+            return list(history)
+
+    def delete(self, conversation_id: str) -> bool:
+        with self._lock:
+            history = self._conversations.pop(conversation_id, None)
+            if history is None:
+                return False
+            self._total_messages -= len(history)
+            return True
+
+    def total_messages(self) -> int:
+        return self._total_messages
+
+    def __contains__(self, conversation_id: str) -> bool:
+        return conversation_id in self._conversations
+
+    def __len__(self) -> int:
+        return len(self._conversations)
+
+
+class RedisConversationStore(ConversationStore):
+    """Redis-backed store shared by every worker.
+
+    Messages live in a capped list per conversation (RPUSH + LTRIM in one
+    pipelined round trip). Active conversations are tracked in a sorted set
+    scored by last activity; conversations idle past the TTL are pruned,
+    with their message lists, on the next write or metrics read. The total
+    message count is kept in a counter key, so metrics cost O(1) rather
+    than a scan of every conversation.
+    """
+
+    KEY_PREFIX = "conv:"
+    ACTIVE_KEY = "conv-active"
+    TOTAL_KEY = "conv-total"
+
+    BLOCKING = True
+
+    def __init__(self, redis_client: Any, max_messages: int = None, ttl_seconds: int = None):
+        """Initialize Redis store.
+
+        Args:
+            redis_client: Redis client
+            max_messages: Messages kept per conversation
+            ttl_seconds: Idle time after which a conversation expires
+        """
+        self.redis = redis_client
+        self.max_messages = max_messages or config.max_conversation_history
+        self.ttl_seconds = ttl_seconds or config.conversation_ttl
+
+    def _key(self, conversation_id: str) -> str:
+        return self.KEY_PREFIX + conversation_id
+
+    def _queue_expired(self, pipe: Any):
+        """Queue a lookup of conversations idle past the TTL."""
+        pipe.zrangebyscore(self.ACTIVE_KEY, "-inf", time.time() - self.ttl_seconds)
+
+    def _settle(self, expired: List[bytes], added: int = 0) -> int:
+        """Drop expired conversations and apply a change to the message count.
+
+        Args:
+            expired: Conversation ids from _queue_expired
+            added: Net messages added by the caller
+
+        Returns:
+            Messages dropped with the expired conversations
+        """
+        dropped = 0
+        if expired:
+            pipe = self.redis.pipeline()
+            for conversation_id in expired:
+                key = self.KEY_PREFIX + conversation_id.decode()
+                pipe.llen(key)
+                pipe.delete(key)
+            pipe.zrem(self.ACTIVE_KEY, *expired)
+            # A worker pruning the same ids concurrently sees empty lists
+            # after ours are deleted, so nothing is subtracted twice
+            dropped = sum(pipe.execute()[0:-1:2])
+        if added != dropped:
+            self.redis.incrby(self.TOTAL_KEY, added - dropped)
+        return dropped
+
+    def register(self, conversation_id: str) -> bool:
+        return bool(self.redis.zadd(self.ACTIVE_KEY, {conversation_id: time.time()}, nx=True))
+
+    def append_many(self, entries: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        if not entries:
+            return []
+        # Group per conversation so each list is pushed and trimmed once,
+        # all in a single round trip that also registers new conversations
+        grouped: Dict[str, List[bytes]] = {}
+        for conversation_id, message in entries:
+            grouped.setdefault(conversation_id, []).append(
+                _message_encoder.encode(message)
+            )
+        now = time.time()
+        pipe = self.redis.pipeline()
+        self._queue_expired(pipe)
+        for conversation_id in grouped:
+            pipe.zadd(self.ACTIVE_KEY, {conversation_id: now}, nx=True)
+        for conversation_id, blobs in grouped.items():
+            key = self._key(conversation_id)
+            pipe.rpush(key, *blobs)
+            pipe.ltrim(key, -self.max_messages, -1)
+            # Outlives the idle TTL so pruning can still count the messages
+            pipe.expire(key, 2 * self.ttl_seconds)
+        pipe.zadd(self.ACTIVE_KEY, dict.fromkeys(grouped, now))
+        results = pipe.execute()
+
+        expired = [
+            conversation_id for conversation_id in results[0]
+            if conversation_id.decode() not in grouped
+        ]
+        registered = results[1:len(grouped) + 1]
+        lengths = results[len(grouped) + 1:-1:3]
+        # RPUSH reports the length before trimming; a full window evicts
+        # one message per message pushed, leaving the total unchanged
+        added = sum(
+            min(length, self.max_messages) - min(length - len(blobs), self.max_messages)
+            for length, blobs in zip(lengths, grouped.values())
+        )
+        self._settle(expired, added)
+        return [
+            conversation_id for conversation_id, new in zip(grouped, registered) if new
+        ]
+
+    def get_messages(self, conversation_id: str, limit: Optional[int] = None) -> List[Dict]:
+        start = -min(limit, self.max_messages) if limit else 0
+        return [
+            _message_decoder.decode(blob)
+            for blob in self.redis.lrange(self._key(conversation_id), start, -1)
+        ]
+
+    def delete(self, conversation_id: str) -> bool:
+        key = self._key(conversation_id)
+        pipe = self.redis.pipeline()
+        pipe.llen(key)
+        pipe.delete(key)
+        pipe.zrem(self.ACTIVE_KEY, conversation_id)
+        length, _, removed = pipe.execute()
+        if length:
+            self.redis.decrby(self.TOTAL_KEY, length)
+        return bool(removed)
+
+    def total_messages(self) -> int:
+        pipe = self.redis.pipeline()
+        self._queue_expired(pipe)
+        pipe.get(self.TOTAL_KEY)
+        pipe.zcard(self.ACTIVE_KEY)
+        expired, total, active = pipe.execute()
+        total = int(total or 0) - self._settle(expired)
+        if total and active == len(expired):
+            # Nothing is active: lists that expired on their own before
+            # being pruned can have left the counter behind
+            self.redis.set(self.TOTAL_KEY, 0)
+            return 0
+        return total
+
+    def __contains__(self, conversation_id: str) -> bool:
+        score = self.redis.zscore(self.ACTIVE_KEY, conversation_id)
+        return score is not None and score > time.time() - self.ttl_seconds
+
+    def __len__(self) -> int:
+        pipe = self.redis.pipeline()
+        self._queue_expired(pipe)
+        pipe.zcard(self.ACTIVE_KEY)
+        expired, active = pipe.execute()
+        self._settle(expired)
+        return active - len(expired)
+
+
+def create_conversation_store() -> ConversationStore:
+    """Create the store selected by config.conversation_store.
+
+    Returns:
+        Redis store when configured with a REDIS_URL, else in-memory store
+    """
+    if config.conversation_store == "redis" and config.redis_url:
+        return RedisConversationStore(redis.Redis.from_url(config.redis_url))
+    return InMemoryConversationStore()
@@ -0,0 +1,204 @@
+"""Local sentence embeddings for the Agent Assist semantic cache.
+
+Runs a dynamically quantized (int8) MiniLM sentence encoder with
+onnxruntime on CPU, avoiding a network round trip per cache lookup.
+Export and quantize the model once, e.g.:
+
+    optimum-cli export onnx -m sentence-transformers/all-MiniLM-L6-v2 minilm/
+    python -c "from onnxruntime.quantization import quantize_dynamic, QuantType; \\
+        quantize_dynamic('minilm/model.onnx', 'minilm-int8.onnx', weight_type=QuantType.QInt8)"
+
+and point LOCAL_EMBEDDING_MODEL / LOCAL_EMBEDDING_TOKENIZER at
+minilm-int8.onnx and minilm/tokenizer.json.
+"""
+
+import concurrent.futures
+import os
+from typing import List, Tuple
+
+import numpy as np
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+try:
+    from tokenizers import Tokenizer
+except ImportError:
+    Tokenizer = None
+
+from src.utils.batching import BackgroundBatcher
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class OnnxEmbedder:
+    """Sentence embedder backed by an ONNX transformer encoder.
+
+    Calls from concurrent request threads (and coroutines, via submit())
+    are gathered into micro-batches so a single session run serves many
+    lookups. Within a batch, texts of similar token length are padded and
+    run together, so one long text does not pad every short one.
+    """
+
+    # Largest batch handed to one session run
+    MAX_BATCH_SIZE = 32
+
+    # How long the first request in a batch waits for company
+    MAX_WAIT_SECONDS = 0.005
+
+    # Token limit per text; recent conversation turns fit comfortably
+    MAX_LENGTH = 256
+
+    # Texts join the current length bucket while at most this many times
+    # longer than its shortest text (or shorter than MIN_BUCKET_LENGTH)
+    BUCKET_LENGTH_RATIO = 2
+    MIN_BUCKET_LENGTH = 16
+
+    def __init__(self, model_path: str, tokenizer_path: str, intra_op_threads: int = 4):
+        """Initialize ONNX embedder.
+
+        Args:
+            model_path: Path to the (quantized) ONNX encoder
+            tokenizer_path: Path to the model's tokenizer.json
+            intra_op_threads: Threads used inside a single session run
+        """
+        if ort is None or Tokenizer is None:
+            raise ImportError(
+                "onnxruntime and tokenizers are required for local embeddings"
+            )
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(
+            model_path,
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {node.name for node in self.session.get_inputs()}
+        self.model_id = os.path.basename(model_path)
+
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=self.MAX_LENGTH)
+        # Padding is applied per length bucket in embed_batch
+        self.tokenizer.no_padding()
+
+        self._batcher = BackgroundBatcher(
+            self._embed_requests,
+            max_batch_size=self.MAX_BATCH_SIZE,
+            max_delay=self.MAX_WAIT_SECONDS,
+            name="onnx-embedder"
+        )
+
+        logger.info(f"Local embedding model loaded from {model_path}")
+
+    def __call__(self, text: str) -> np.ndarray:
+        """Embed a single text, batched with concurrent callers.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Embedding vector
+        """
+        return self.submit(text).result()
+
+    def submit(self, text: str) -> concurrent.futures.Future:
+        """Queue a text for the next micro-batch without blocking.
+
+        Coroutines can await the result with asyncio.wrap_future() instead
+        of parking a worker thread on it.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Future resolved with the embedding vector
+        """
+        future = concurrent.futures.Future()
+        if not self._batcher.put((text, future)):
+            future.set_exception(RuntimeError("Local embedding queue is full"))
+        return future
+
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        """Embed texts, one session run per length bucket.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            Array of mean-pooled embeddings, one row per text
+        """
+        encodings = self.tokenizer.encode_batch(texts)
+        order = sorted(range(len(encodings)), key=lambda i: len(encodings[i].ids))
+
+        vectors = [None] * len(encodings)
+        bucket: List[int] = []
+        for index in order:
+            length = len(encodings[index].ids)
+            if bucket and length > max(
+                self.MIN_BUCKET_LENGTH,
+                self.BUCKET_LENGTH_RATIO * len(encodings[bucket[0]].ids)
+            ):
+                self._embed_bucket(encodings, bucket, vectors)
+                bucket = []
+            bucket.append(index)
+        if bucket:
+            self._embed_bucket(encodings, bucket, vectors)
+
+        return np.stack(vectors)
+
+    def _embed_bucket(self, encodings: List, indices: List[int], vectors: List):
+        """Pad a bucket of encodings to its longest and embed them in one run."""
+        width = max(len(encodings[i].ids) for i in indices)
+        input_ids = np.zeros((len(indices), width), dtype=np.int64)
+        attention_mask = np.zeros((len(indices), width), dtype=np.int64)
+        for row, i in enumerate(indices):
+            ids = encodings[i].ids
+            input_ids[row, :len(ids)] = ids
+            attention_mask[row, :len(ids)] = 1
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        # Mean pooling over non-padding tokens
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        for row, i in enumerate(indices):
+            vectors[i] = pooled[row]
+
+    def _embed_requests(self, batch: List[Tuple[str, concurrent.futures.Future]]):
+        """Embed one micro-batch and resolve its futures.
+
+        Futures cancelled while queued (e.g. an awaiting request timed out)
+        are dropped; the rest are marked running so they can no longer be
+        cancelled under us.
+        """
+        batch = [
+            (text, future) for text, future in batch
+            if future.set_running_or_notify_cancel()
+        ]
+        if not batch:
+            return
+
+        try:
+            vectors = self.embed_batch([text for text, _ in batch])
+        except Exception as e:
+            logger.error(f"Local embedding batch failed: {e}", exc_info=True)
+            for _, future in batch:
+                try:
+                    future.set_exception(e)
+                except concurrent.futures.InvalidStateError:
+                    pass
+            return
+
+        for (_, future), vector in zip(batch, vectors):
+            try:
+                future.set_result(vector)
+            except concurrent.futures.InvalidStateError:
+                pass
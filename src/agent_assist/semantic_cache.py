@@ -0,0 +1,331 @@
+"""Semantic cache for Agent Assist results.
+
+Near-duplicate conversation contexts ("I need to refill my prescription"
+vs. "I need a refill on my prescription") produce interchangeable smart
+replies and knowledge snippets. The cache stores those results against an
+embedding of the recent conversation turns and serves them when a new
+context is within a cosine-similarity threshold, skipping the LLM calls.
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import msgspec
+import numpy as np
+import google.generativeai as genai
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+from config.config import config
+from src.utils.batching import BackgroundBatcher
+from src.utils.logging import get_logger
+from .embeddings import OnnxEmbedder
+
+logger = get_logger(__name__)
+
+
+def gemini_embed(text: str) -> np.ndarray:
+    """Embed text with the Gemini embedding API.
+
+    Args:
+        text: Text to embed (must already be PHI-redacted)
+
+    Returns:
+        Embedding vector
+    """
+    result = genai.embed_content(
+        model=config.gcp.embedding_model,
+        content=text,
+        task_type="semantic_similarity"
+    )
+    return np.asarray(result["embedding"], dtype=np.float32)
+
+
+def default_embed_fn() -> Callable[[str], np.ndarray]:
+    """Select the local ONNX embedder when configured, else the Gemini API.
+
+    Returns:
+        Function mapping text to an embedding vector
+    """
+    if config.local_embedding_model and config.local_embedding_tokenizer:
+        try:
+            return OnnxEmbedder(
+                config.local_embedding_model,
+                config.local_embedding_tokenizer
+            )
+        except Exception as e:
+            logger.warning(f"Local embeddings unavailable, using Gemini API: {e}")
+    return gemini_embed
+
+
+class CachedAssist(msgspec.Struct):
+    """Semantic cache entry as persisted to Redis."""
+    vector: bytes
+    payload: Dict[str, Any]
+    expires_at: float
+
+
+_entry_encoder = msgspec.msgpack.Encoder()
+_entry_decoder = msgspec.msgpack.Decoder(CachedAssist)
+
+
+class SemanticCache:
+    """Embedding-keyed cache with cosine-similarity lookup.
+
+    Lookups use an HNSW approximate nearest-neighbour index when hnswlib
+    is installed and fall back to a brute-force NumPy scan otherwise.
+    """
+
+    # Redis key prefix for persisted entries
+    REDIS_PREFIX = "assist-cache:"
+
+    # HNSW build/search parameters
+    HNSW_M = 16
+    HNSW_EF_CONSTRUCTION = 200
+    HNSW_EF_SEARCH = 64
+
+    # Neighbours examined per lookup, so expired entries can be skipped
+    ANN_CANDIDATES = 4
+
+    def __init__(
+        self,
+        embed_fn: Optional[Callable[[str], np.ndarray]] = None,
+        threshold: float = None,
+        max_entries: int = None,
+        ttl_seconds: int = None,
+        redis_client: Optional[Any] = None
+    ):
+        """Initialize semantic cache.
+
+        Args:
+            embed_fn: Function mapping text to an embedding vector.
+                Defaults to default_embed_fn().
+            threshold: Minimum cosine similarity for a hit
+            max_entries: Maximum cached entries (oldest evicted first)
+            ttl_seconds: Entry lifetime in seconds
+            redis_client: Optional Redis client; entries are persisted there
+                as MessagePack from a background thread, and reloaded in the
+                background on first use
+        """
+        self.embed_fn = embed_fn or default_embed_fn()
+        self.threshold = threshold if threshold is not None else config.semantic_cache_threshold
+        self.max_entries = max_entries or config.semantic_cache_max_entries
+        self.ttl_seconds = ttl_seconds or config.semantic_cache_ttl
+
+        # Ring buffer of L2-normalized vectors (or an HNSW index labelled by
+        # ring slot), allocated on first insert once the dimension is known.
+        self._vectors: Optional[np.ndarray] = None
+        self._index: Optional[Any] = None
+        self._expires_at = np.zeros(self.max_entries, dtype=np.float64)
+        self._payloads: List[Optional[Dict[str, Any]]] = [None] * self.max_entries
+        self._size = 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+        # Vectors from different embedding models are not comparable, so
+        # persisted entries are namespaced by model
+        self.redis_prefix = "{}{}:".format(
+            self.REDIS_PREFIX,
+            getattr(self.embed_fn, "model_id", config.gcp.embedding_model)
+        )
+        self.redis = redis_client
+        # Nothing talks to Redis here, so constructing the cache (at import,
+        # via the service singleton) works with Redis down
+        self._load_started = self.redis is None
+        self._persist_batcher: Optional[BackgroundBatcher] = None
+        if self.redis is not None:
+            self._persist_batcher = BackgroundBatcher(
+                self._persist,
+                name="semantic-cache-persist"
+            )
+
+    def embed(self, text: str) -> np.ndarray:
+        """Embed and L2-normalize text.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Unit-length float32 vector
+        """
+        return self._normalize(self.embed_fn(text))
+
+    async def embed_async(self, text: str) -> np.ndarray:
+        """Embed and L2-normalize text from a coroutine.
+
+        Embedders with a submit() method (the batching ONNX embedder) are
+        awaited directly; others run in a worker thread.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Unit-length float32 vector
+        """
+        submit = getattr(self.embed_fn, "submit", None)
+        if submit is not None:
+            vector = await asyncio.wrap_future(submit(text))
+        else:
+            vector = await asyncio.to_thread(self.embed_fn, text)
+        return self._normalize(vector)
+
+    @staticmethod
+    def _normalize(vector: Any) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, vector: np.ndarray) -> Optional[Dict[str, Any]]:
+        """Find the cached payload most similar to a vector.
+
+        Args:
+            vector: Normalized query vector from embed()
+
+        Returns:
+            Cached payload, or None on a miss
+        """
+        if not self._load_started:
+            self._start_load()
+
+        with self._lock:
+            if not self._size:
+                self.misses += 1
+                return None
+
+            if self._index is not None:
+                return self._lookup_index(vector)
+
+            similarities = self._vectors[:self._size] @ vector
+            similarities[self._expires_at[:self._size] < time.time()] = -1.0
+
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.threshold:
+                self.hits += 1
+                return self._payloads[best]
+
+            self.misses += 1
+            return None
+
+    def _lookup_index(self, vector: np.ndarray) -> Optional[Dict[str, Any]]:
+        """Nearest-neighbour lookup through the HNSW index (lock held)."""
+        labels, distances = self._index.knn_query(
+            vector, k=min(self.ANN_CANDIDATES, self._size)
+        )
+        now = time.time()
+        for slot, distance in zip(labels[0], distances[0]):
+            # Inner-product distance on unit vectors is 1 - cosine similarity
+            if 1.0 - distance < self.threshold:
+                break
+            if self._expires_at[slot] >= now:
+                self.hits += 1
+                return self._payloads[slot]
+
+        self.misses += 1
+        return None
+
+    def add(self, vector: np.ndarray, payload: Dict[str, Any]):
+        """Cache a payload under a vector.
+
+        Args:
+            vector: Normalized vector from embed()
+            payload: Results to serve for similar contexts
+        """
+        expires_at = time.time() + self.ttl_seconds
+        self._insert(vector, payload, expires_at)
+
+        if self._persist_batcher is not None:
+            entry = CachedAssist(
+                vector=vector.astype(np.float32).tobytes(),
+                payload=payload,
+                expires_at=expires_at
+            )
+            # Written by the batcher thread, never on the caller's event loop
+            if not self._persist_batcher.put(entry):
+                logger.warning("Semantic cache persist queue full; entry kept in memory only")
+
+    def _persist(self, entries: List[CachedAssist]):
+        """Write a batch of entries to Redis in one pipelined round trip."""
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for entry in entries:
+                key = self.redis_prefix + hashlib.blake2b(
+                    entry.vector, digest_size=16
+                ).hexdigest()
+                pipe.set(key, _entry_encoder.encode(entry), ex=self.ttl_seconds)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Could not persist semantic cache entries: {e}")
+
+    def _insert(self, vector: np.ndarray, payload: Dict[str, Any], expires_at: float):
+        """Write an entry into the next ring buffer slot."""
+        with self._lock:
+            if self._vectors is None and self._index is None:
+                self._allocate(vector.shape[0])
+
+            slot = self._next
+            if self._index is not None:
+                # Re-adding an existing label replaces the evicted vector
+                self._index.add_items(vector[np.newaxis], np.array([slot]))
+            else:
+                self._vectors[slot] = vector
+            self._expires_at[slot] = expires_at
+            self._payloads[slot] = payload
+
+            self._next = (slot + 1) % self.max_entries
+            self._size = min(self._size + 1, self.max_entries)
+
+    def _allocate(self, dim: int):
+        """Create vector storage for embeddings of a given dimension."""
+        if hnswlib is not None:
+            self._index = hnswlib.Index(space="ip", dim=dim)
+            self._index.init_index(
+                max_elements=self.max_entries,
+                ef_construction=self.HNSW_EF_CONSTRUCTION,
+                M=self.HNSW_M
+            )
+            self._index.set_ef(self.HNSW_EF_SEARCH)
+        else:
+            self._vectors = np.zeros((self.max_entries, dim), dtype=np.float32)
+
+    def _start_load(self):
+        """Start warming from Redis in a background thread, once."""
+        with self._lock:
+            if self._load_started:
+                return
+            self._load_started = True
+        threading.Thread(
+            target=self._load_from_redis,
+            name="semantic-cache-load",
+            daemon=True
+        ).start()
+
+    def _load_from_redis(self):
+        """Warm the in-memory index from entries persisted by any worker."""
+        try:
+            keys = list(self.redis.scan_iter(match=self.redis_prefix + "*", count=1000))
+            now = time.time()
+            loaded = 0
+            for start in range(0, len(keys), 500):
+                for blob in self.redis.mget(keys[start:start + 500]):
+                    if blob is None:
+                        continue
+                    entry = _entry_decoder.decode(blob)
+                    if entry.expires_at > now:
+                        vector = np.frombuffer(entry.vector, dtype=np.float32)
+                        self._insert(vector, entry.payload, entry.expires_at)
+                        loaded += 1
+            logger.info(f"Loaded {loaded} semantic cache entries from Redis")
+        except Exception as e:
+            logger.warning(f"Could not load semantic cache from Redis: {e}")
+
+    def __len__(self) -> int:
+        return self._size
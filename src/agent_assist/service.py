@@ -1,19 +1,69 @@
 """Real-time conversation tracking and assistance"""
 
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass, asdict
+from typing import Dict, List, Any, Optional, Tuple
+from functools import lru_cache
+from operator import itemgetter
 import asyncio
+import concurrent.futures
+import hashlib
+import re
+import time
 
-from src.llm_services.gemini_service import gemini_service
+import msgspec
+import redis
+
+from config.config import config
+from src.llm_services.gemini_service import GeminiService, get_gemini_service
 from src.utils.logging import get_logger
-from src.utils import utcnow
+from src.utils.phi_redaction import phi_redactor
+from src.utils import epoch_to_iso, utcnow_iso
+from src.utils.event_loop import background_loop
+from .conversation_store import ConversationStore, create_conversation_store
+from .semantic_cache import SemanticCache
 
 logger = get_logger(__name__)
 
 
-@dataclass
-class AgentAssistResponse:
-    """Response from Agent Assist system."""
+# Keyword routing for next best action, in priority order
+NEXT_BEST_ACTIONS = (
+    (("appointment", "schedule", "book"), "Offer available appointment slots"),
+    (("bill", "charge", "cost", "insurance"), "Look up patient billing information"),
+    (("prescription", "medication", "refill"), "Check prescription status and process refill"),
+    (("results", "test", "lab"), "Verify results are available and offer to send securely"),
+    (("speak", "talk", "representative", "person"), "Prepare for escalation to specialized team"),
+)
+DEFAULT_NEXT_BEST_ACTION = "Clarify patient's primary concern"
+
+_get_confidence = itemgetter("confidence")
+_get_relevance = itemgetter("relevance_score")
+
+_KEYWORD_PRIORITY = {
+    keyword: priority
+    for priority, (keywords, _) in enumerate(NEXT_BEST_ACTIONS)
+    for keyword in keywords
+}
+# Zero-width lookahead so overlapping keywords are all seen in one scan
+_KEYWORD_PATTERN = re.compile(
+    "(?=(" + "|".join(map(re.escape, _KEYWORD_PRIORITY)) + "))"
+)
+
+
+@lru_cache(maxsize=128)
+def _route_next_best_action(text: str) -> str:
+    """Map lowercased message text to the highest-priority matching action."""
+    best = len(NEXT_BEST_ACTIONS)
+    for match in _KEYWORD_PATTERN.finditer(text):
+        best = min(best, _KEYWORD_PRIORITY[match.group(1)])
+        if best == 0:
+            break
+    return NEXT_BEST_ACTIONS[best][1] if best < len(NEXT_BEST_ACTIONS) else DEFAULT_NEXT_BEST_ACTION
+
+
+class AgentAssistResponse(msgspec.Struct):
+    """Response from Agent Assist system.
+    
+    Serialize with msgspec.json.encode(); no intermediate dict is built.
+    """
     conversation_id: str
     timestamp: str
     summary: Optional[str] = None
@@ -23,27 +73,82 @@ class AgentAssistResponse:
     confidence_score: float = 0.0
     
     def to_dict(self) -> Dict:
-        """Convert to dictionary."""
-        return asdict(self)
+        """Convert to a (shallow) dictionary."""
+        return msgspec.structs.asdict(self)
 
 
 class AgentAssistService:
     """Real-time agent assistance service."""
     
-    def __init__(self):
-        """Initialize Agent Assist service."""
-        self.active_conversations: Dict[str, List[Dict]] = {}
-        self.llm_service = gemini_service
+    # Results that are reusable across conversations with similar context.
+    # Summaries describe one specific conversation and are never shared.
+    # Both are generated from PHI-redacted input only, so identifiers the
+    # redactor matches (SSNs, phone numbers, MRNs, ...) are not cached (or
+    # persisted to Redis); free text it does not match, such as patient
+    # names, can still be served to other conversations.
+    CACHEABLE_RESULTS = ("smart_replies", "knowledge")
+    
+    # Number of recent turns that form the semantic cache key
+    CACHE_CONTEXT_TURNS = 3
+    
+    # How long speculative results stay usable after the patient message
+    PREFETCH_TTL_SECONDS = 5.0
+    
+    # Context turns the smart-reply prompt sees; identical windows share a call
+    SMART_REPLY_CONTEXT_TURNS = 5
+    
+    def __init__(
+        self,
+        semantic_cache: Optional[SemanticCache] = None,
+        prefetch: Optional[bool] = None,
+        conversation_store: Optional[ConversationStore] = None
+    ):
+        """Initialize Agent Assist service.
+        
+        Args:
+            semantic_cache: Cache for smart replies and knowledge snippets.
+                Defaults to a Gemini-embedding cache when caching is enabled.
+            prefetch: Start smart replies and knowledge generation as soon as
+                a patient message arrives. Defaults to config.
+            conversation_store: Conversation history storage. Defaults to
+                the store selected by config.conversation_store.
+        """
+        self.active_conversations = conversation_store or create_conversation_store()
+        self.prefetch_enabled = (
+            config.assist_prefetch_enabled if prefetch is None else prefetch
+        )
+        # conversation_id -> (patient text, start time, pending results)
+        self._prefetched: Dict[str, Tuple[str, float, concurrent.futures.Future]] = {}
+        # (event loop, prompt key) -> smart-reply call shared by identical requests
+        self._inflight: Dict[Tuple[asyncio.AbstractEventLoop, str], asyncio.Task] = {}
+        # Created on first use, so startup does not wait on model setup
+        self._llm_service: Optional[GeminiService] = None
+        if semantic_cache is None and config.enable_caching:
+            semantic_cache = SemanticCache(
+                redis_client=redis.Redis.from_url(config.redis_url)
+                if config.redis_url else None
+            )
+        self.semantic_cache = semantic_cache
         logger.info("Agent Assist service initialized")
     
+    @property
+    def llm_service(self) -> GeminiService:
+        """LLM service, the shared Gemini service unless replaced."""
+        if self._llm_service is None:
+            self._llm_service = get_gemini_service()
+        return self._llm_service
+    
+    @llm_service.setter
+    def llm_service(self, service: GeminiService):
+        self._llm_service = service
+    
     def register_conversation(self, conversation_id: str):
         """Register a new conversation for tracking.
         
         Args:
             conversation_id: Unique conversation identifier
         """
-        if conversation_id not in self.active_conversations:
-            self.active_conversations[conversation_id] = []
+        if self.active_conversations.register(conversation_id):
             logger.info(f"Registered conversation: {conversation_id}")
     
     def add_message(
@@ -61,17 +166,67 @@ class AgentAssistService:
             text: Message text
             timestamp: Message timestamp
         """
-        if conversation_id not in self.active_conversations:
-            self.register_conversation(conversation_id)
+        message = self._build_message(role, text, timestamp)
+        
+        # The first message registers the conversation in the same call
+        if self.active_conversations.append(conversation_id, message):
+            logger.info(f"Registered conversation: {conversation_id}")
+        logger.debug(f"Message added to conversation {conversation_id}")
+        
+        if role == "patient" and self.prefetch_enabled:
+            self._start_prefetch(conversation_id, text)
+    
+    def add_messages(self, messages: List[Tuple[str, str, str, Optional[str]]]):
+        """Add a batch of messages, possibly spanning conversations.
+        
+        The batch is written to the store in one call, and prefetch starts
+        only for each conversation's latest patient message.
+        
+        Args:
+            messages: (conversation_id, role, text, timestamp) tuples in
+                arrival order
+        """
+        entries = []
+        latest_patient_text: Dict[str, str] = {}
+        for conversation_id, role, text, timestamp in messages:
+            entries.append((conversation_id, self._build_message(role, text, timestamp)))
+            if role == "patient":
+                latest_patient_text[conversation_id] = text
+        
+        for conversation_id in self.active_conversations.append_many(entries):
+            logger.info(f"Registered conversation: {conversation_id}")
+        logger.debug(f"Added batch of {len(entries)} messages")
         
+        if self.prefetch_enabled:
+            for conversation_id, text in latest_patient_text.items():
+                self._start_prefetch(conversation_id, text)
+    
+    @staticmethod
+    def _build_message(role: str, text: str, timestamp: Optional[str]) -> Dict[str, Any]:
+        """Build a stored conversation message.
+        
+        Messages are stamped with an epoch float; the ISO string is only
+        formatted when history is returned to a caller.
+        """
         message = {
             "role": role,
             "text": text,
-            "timestamp": timestamp or utcnow().isoformat()
+            # Lowercased once here for the keyword scans done on every assist
+            "text_lc": text.lower(),
+            "ts_epoch": time.time()
         }
-        
-        self.active_conversations[conversation_id].append(message)
-        logger.debug(f"Message added to conversation {conversation_id}")
+        if timestamp:
+            message["timestamp"] = timestamp
+        return message
+    
+    @staticmethod
+    def _with_timestamps(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Copy messages, adding an ISO timestamp to those without one."""
+        return [
+            msg if "timestamp" in msg
+            else {**msg, "timestamp": epoch_to_iso(msg["ts_epoch"])}
+            for msg in messages
+        ]
     
     def get_conversation_history(
         self,
@@ -85,12 +240,45 @@ class AgentAssistService:
             limit: Maximum number of recent messages to return
             
         Returns:
-            List of conversation messages
+            List of conversation messages (at most
+            config.max_conversation_history, oldest first)
+        """
+        return self._with_timestamps(
+            self.active_conversations.get_messages(conversation_id, limit)
+        )
+    
+    async def get_conversation_history_async(
+        self,
+        conversation_id: str,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        """Async version of get_conversation_history.
+        
+        A store doing network I/O is called from a worker thread so the
+        shared event loop keeps serving other requests meanwhile.
         """
-        messages = self.active_conversations.get(conversation_id, [])
-        if limit:
-            return messages[-limit:]
-        return messages
+        return self._with_timestamps(
+            await self._get_messages_async(conversation_id, limit)
+        )
+    
+    async def _get_messages_async(
+        self,
+        conversation_id: str,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        """Read stored messages as-is, without blocking the loop."""
+        if self.active_conversations.BLOCKING:
+            return await asyncio.to_thread(
+                self.active_conversations.get_messages, conversation_id, limit
+            )
+        return self.active_conversations.get_messages(conversation_id, limit)
+    
+    async def has_conversation_async(self, conversation_id: str) -> bool:
+        """Check whether a conversation is tracked, without blocking the loop."""
+        store = self.active_conversations
+        if store.BLOCKING:
+            return await asyncio.to_thread(store.__contains__, conversation_id)
+        return conversation_id in store
     
     async def generate_real_time_assist(
         self,
@@ -113,63 +301,105 @@ class AgentAssistService:
             AgentAssistResponse with assistance data
         """
         try:
-            messages = self.get_conversation_history(conversation_id)
+            messages = await self._get_messages_async(conversation_id)
             
             if not messages:
                 logger.warning(f"No messages found for conversation {conversation_id}")
                 return AgentAssistResponse(
                     conversation_id=conversation_id,
-                    timestamp=utcnow().isoformat()
+                    timestamp=utcnow_iso()
                 )
             
+            last_patient_message = self._get_last_patient_message(messages)
+            wanted = {
+                "smart_replies": include_smart_replies,
+                "knowledge": include_knowledge,
+            }
+            
+            # Use results prefetched when the patient message arrived
+            prefetched = await self._take_prefetched(conversation_id, last_patient_message)
+            results = {
+                name: value for name, value in prefetched.items()
+                if wanted.get(name)
+            }
+            
+            # Serve reusable results from the semantic cache when a similar
+            # conversation context has been seen recently
+            cache_vector = None
+            if self.semantic_cache is not None and any(
+                needed and name not in results for name, needed in wanted.items()
+            ):
+                cache_vector, cached = await self._lookup_semantic_cache(messages)
+                if cached:
+                    results.update(
+                        (name, value) for name, value in cached.items()
+                        if wanted.get(name) and name not in results
+                    )
+            
+            want_summary = include_summary and len(messages) >= 3
+            want_smart_replies = (
+                include_smart_replies and len(messages) >= 2
+                and last_patient_message and "smart_replies" not in results
+            )
+            
+            # Summary and smart replies share one redacted copy of the
+            # conversation instead of each redacting it
+            llm_messages = messages
+            llm_last_message = last_patient_message
+            if want_summary and want_smart_replies:
+                llm_messages = await self.llm_service.aredact_conversation(messages)
+                llm_last_message = self._get_last_patient_message(llm_messages)
+            
             # Run assist operations concurrently for speed
             tasks = []
             
             # Summary generation
-            summary_task = None
-            if include_summary and len(messages) >= 3:
-                summary_task = asyncio.create_task(
-                    self._generate_summary_async(messages)
-                )
-                tasks.append(("summary", summary_task))
+            if want_summary:
+                tasks.append((
+                    "summary",
+                    self._generate_summary_async(conversation_id, llm_messages)
+                ))
             
             # Smart replies generation
-            smart_replies_task = None
-            if include_smart_replies and len(messages) >= 2:
-                last_patient_message = self._get_last_patient_message(messages)
-                if last_patient_message:
-                    smart_replies_task = asyncio.create_task(
-                        self._generate_smart_replies_async(
-                            messages[:-1],
-                            last_patient_message
-                        )
-                    )
-                    tasks.append(("smart_replies", smart_replies_task))
+            if want_smart_replies:
+                tasks.append((
+                    "smart_replies",
+                    self._generate_smart_replies_async(llm_messages[:-1], llm_last_message)
+                ))
             
             # Knowledge snippets
-            knowledge_task = None
-            if include_knowledge:
-                last_patient_message = self._get_last_patient_message(messages)
-                if last_patient_message:
-                    knowledge_task = asyncio.create_task(
-                        self._generate_knowledge_async(last_patient_message)
-                    )
-                    tasks.append(("knowledge", knowledge_task))
+            if include_knowledge and last_patient_message and "knowledge" not in results:
+                tasks.append((
+                    "knowledge",
+                    self._generate_knowledge_async(last_patient_message)
+                ))
+            
+            # Wait for all tasks; latency is the slowest call, not the sum
+            outcomes = await asyncio.gather(
+                *(coro for _, coro in tasks),
+                return_exceptions=True
+            )
             
-            # Wait for all tasks
-            results = {}
-            for task_name, task in tasks:
-                try:
-                    results[task_name] = await task
-                except Exception as e:
-                    logger.error(f"Error in {task_name} task: {e}")
+            fresh = {}
+            for (task_name, _), outcome in zip(tasks, outcomes):
+                if isinstance(outcome, Exception):
+                    logger.error(f"Error in {task_name} task: {outcome}")
                     results[task_name] = None
+                else:
+                    results[task_name] = fresh[task_name] = outcome
+            
+            cacheable = {
+                name: value for name, value in fresh.items()
+                if name in self.CACHEABLE_RESULTS and value
+            }
+            if cache_vector is not None and cacheable:
+                self.semantic_cache.add(cache_vector, cacheable)
             
             # Build response
             response = AgentAssistResponse(
                 conversation_id=conversation_id,
-                timestamp=utcnow().isoformat(),
-                summary=results.get("summary"),
+                timestamp=utcnow_iso(),
+                summary=results["summary"][0] if results.get("summary") else None,
                 smart_replies=results.get("smart_replies"),
                 knowledge_snippets=results.get("knowledge"),
                 next_best_action=self._determine_next_best_action(messages),
@@ -184,26 +414,159 @@ class AgentAssistService:
             logger.error(f"Error generating agent assist: {e}", exc_info=True)
             raise
     
-    async def _generate_summary_async(self, messages: List[Dict]) -> str:
-        """Generate summary asynchronously."""
-        result = self.llm_service.summarize_conversation(messages)
-        return result["summary"]
+    def _start_prefetch(self, conversation_id: str, last_message: str):
+        """Speculatively generate smart replies and knowledge for a new
+        patient message so the next assist request finds them ready.
+        
+        Args:
+            conversation_id: Conversation identifier
+            last_message: The patient message just added
+        """
+        messages = self.active_conversations.get_messages(conversation_id)
+        future = background_loop.submit(
+            self._prefetch(messages[:-1], last_message)
+        )
+        
+        previous = self._prefetched.get(conversation_id)
+        self._prefetched[conversation_id] = (last_message, time.monotonic(), future)
+        if previous:
+            previous[2].cancel()
+    
+    async def _prefetch(
+        self,
+        context_messages: List[Dict],
+        last_message: str
+    ) -> Dict[str, Any]:
+        """Generate the reusable assist results for a patient message."""
+        tasks = [("knowledge", self._generate_knowledge_async(last_message))]
+        if context_messages:
+            tasks.append((
+                "smart_replies",
+                self._generate_smart_replies_async(context_messages, last_message)
+            ))
+        
+        outcomes = await asyncio.gather(
+            *(coro for _, coro in tasks),
+            return_exceptions=True
+        )
+        return {
+            name: outcome for (name, _), outcome in zip(tasks, outcomes)
+            if not isinstance(outcome, Exception)
+        }
+    
+    async def _take_prefetched(
+        self,
+        conversation_id: str,
+        last_patient_message: Optional[str]
+    ) -> Dict[str, Any]:
+        """Claim prefetched results if they match the current patient message.
+        
+        Waits for a prefetch that is still in flight rather than issuing
+        duplicate LLM calls.
+        
+        Args:
+            conversation_id: Conversation identifier
+            last_patient_message: Most recent patient message
+            
+        Returns:
+            Prefetched results, or an empty dict
+        """
+        entry = self._prefetched.pop(conversation_id, None)
+        if not entry:
+            return {}
+        
+        text, started_at, future = entry
+        if (text != last_patient_message
+                or time.monotonic() - started_at > self.PREFETCH_TTL_SECONDS):
+            future.cancel()
+            return {}
+        
+        try:
+            return await asyncio.wrap_future(future)
+        except Exception as e:
+            logger.warning(f"Prefetch failed for conversation {conversation_id}: {e}")
+            return {}
+    
+    async def _lookup_semantic_cache(
+        self,
+        messages: List[Dict]
+    ) -> Tuple[Optional[Any], Optional[Dict[str, Any]]]:
+        """Embed recent turns and look them up in the semantic cache.
+        
+        Args:
+            messages: Conversation messages
+            
+        Returns:
+            Tuple of (embedding, cached results); both None if embedding fails
+        """
+        context = "\n".join(
+            f"{msg['role']}: {msg['text']}"
+            for msg in messages[-self.CACHE_CONTEXT_TURNS:]
+        )
+        context, _ = phi_redactor.redact(context)
+        
+        try:
+            vector = await self.semantic_cache.embed_async(context)
+        except Exception as e:
+            logger.warning(f"Semantic cache embedding failed: {e}")
+            return None, None
+        
+        return vector, self.semantic_cache.lookup(vector)
+    
+    async def _generate_summary_async(
+        self,
+        conversation_id: str,
+        messages: List[Dict]
+    ) -> Tuple[str, float]:
+        """Generate summary and its model confidence.
+        
+        Summaries are incremental per conversation, so only turns added
+        since the last summary are sent.
+        """
+        result = await self.llm_service.asummarize_conversation(
+            messages,
+            conversation_id=conversation_id
+        )
+        return result["summary"], result["confidence"]
     
     async def _generate_smart_replies_async(
         self,
         context_messages: List[Dict],
         last_message: str
     ) -> List[Dict[str, Any]]:
-        """Generate smart replies asynchronously."""
-        result = self.llm_service.generate_smart_replies(
-            context_messages,
-            last_message
-        )
+        """Generate smart replies.
+        
+        Concurrent requests with the same prompt inputs await a single
+        in-flight LLM call instead of each issuing their own.
+        """
+        context_messages = context_messages[-self.SMART_REPLY_CONTEXT_TURNS:]
+        digest = hashlib.blake2b(digest_size=16)
+        for msg in context_messages:
+            digest.update(f"{msg['role']}\x1f{msg['text']}\x1e".encode())
+        digest.update(last_message.encode())
+        key = (asyncio.get_running_loop(), digest.hexdigest())
+        
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(
+                self.llm_service.agenerate_smart_replies(context_messages, last_message)
+            )
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        
+        # Shielded so one caller's cancellation does not abort the others
+        result = await asyncio.shield(task)
         return result["replies"]
     
     async def _generate_knowledge_async(self, query: str) -> List[Dict[str, Any]]:
-        """Generate knowledge snippets asynchronously."""
-        result = self.llm_service.generate_knowledge_snippet(query)
+        """Generate knowledge snippets from the PHI-redacted query.
+        
+        The snippet is shared through the semantic cache, so the query is
+        redacted here rather than trusting the LLM service to do it; the
+        service is told not to redact it a second time.
+        """
+        query, _ = phi_redactor.redact(query)
+        result = await self.llm_service.agenerate_knowledge_snippet(query, redact_phi=False)
         return [result]
     
     def _get_last_patient_message(self, messages: List[Dict]) -> Optional[str]:
@@ -228,21 +591,8 @@ class AgentAssistService:
         if not messages:
             return "Greet patient and ask how you can help"
         
-        last_message = messages[-1]["text"].lower()
-        
         # Simple keyword-based suggestions
-        if any(word in last_message for word in ["appointment", "schedule", "book"]):
-            return "Offer available appointment slots"
-        elif any(word in last_message for word in ["bill", "charge", "cost", "insurance"]):
-            return "Look up patient billing information"
-        elif any(word in last_message for word in ["prescription", "medication", "refill"]):
-            return "Check prescription status and process refill"
-        elif any(word in last_message for word in ["results", "test", "lab"]):
-            return "Verify results are available and offer to send securely"
-        elif any(word in last_message for word in ["speak", "talk", "representative", "person"]):
-            return "Prepare for escalation to specialized team"
-        else:
-            return "Clarify patient's primary concern"
+        return _route_next_best_action(messages[-1]["text_lc"])
     
     def _calculate_overall_confidence(self, results: Dict[str, Any]) -> float:
         """Calculate overall confidence score.
@@ -256,19 +606,22 @@ class AgentAssistService:
         scores = []
         
         # Smart replies confidence
-        if results.get("smart_replies"):
-            avg_confidence = sum(
-                r["confidence"] for r in results["smart_replies"]
-            ) / len(results["smart_replies"])
-            scores.append(avg_confidence)
+        smart_replies = results.get("smart_replies")
+        if smart_replies:
+            scores.append(
+                sum(map(_get_confidence, smart_replies)) / len(smart_replies)
+            )
         
         # Knowledge confidence
-        if results.get("knowledge"):
-            scores.append(0.85)  # Placeholder
+        knowledge = results.get("knowledge")
+        if knowledge:
+            scores.append(
+                sum(map(_get_relevance, knowledge)) / len(knowledge)
+            )
         
         # Summary confidence
         if results.get("summary"):
-            scores.append(0.90)  # Placeholder
+            scores.append(results["summary"][1])
         
         return sum(scores) / len(scores) if scores else 0.5
     
@@ -278,8 +631,11 @@ class AgentAssistService:
         Args:
             conversation_id: Conversation identifier
         """
-        if conversation_id in self.active_conversations:
-            del self.active_conversations[conversation_id]
+        entry = self._prefetched.pop(conversation_id, None)
+        if entry:
+            entry[2].cancel()
+        
+        if self.active_conversations.delete(conversation_id):
             logger.info(f"Closed conversation: {conversation_id}")
     
     def get_metrics(self) -> Dict[str, Any]:
@@ -288,15 +644,13 @@ class AgentAssistService:
         Returns:
             Performance metrics
         """
+        active = len(self.active_conversations)
+        total_messages = self.active_conversations.total_messages()
         return {
-            "active_conversations": len(self.active_conversations),
-            "total_messages": sum(
-                len(msgs) for msgs in self.active_conversations.values()
-            ),
+            "active_conversations": active,
+            "total_messages": total_messages,
             "avg_messages_per_conversation": (
-                sum(len(msgs) for msgs in self.active_conversations.values()) /
-                len(self.active_conversations)
-                if self.active_conversations else 0
+                total_messages / active if active else 0
             )
         }
 
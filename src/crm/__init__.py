@@ -1,5 +1,22 @@
 """CRM package for customer relationship management."""
 
-from .provider import CRMProvider, SalesforceCRM, CRMFactory
+from .base import CRMProvider
 
-__all__ = ['CRMProvider', 'SalesforceCRM', 'CRMFactory']
+# Implementations are loaded on first access (PEP 562), so importing the
+# interface does not pull in aiohttp, cachetools or logging setup.
+_PROVIDER_EXPORTS = frozenset({
+    'SalesforceCRM',
+    'CompositeBatch',
+    'CRMFactory',
+    'register_crm',
+})
+
+
+def __getattr__(name):
+    if name in _PROVIDER_EXPORTS:
+        from . import provider
+        return getattr(provider, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ['CRMProvider', 'SalesforceCRM', 'CompositeBatch', 'CRMFactory', 'register_crm']
@@ -0,0 +1,139 @@
+"""CRM provider interface."""
+
+from typing import Any, Dict, List, Optional, Protocol
+
+
+class CRMProvider(Protocol):
+    """Interface implemented (structurally) by CRM providers."""
+    
+    async def get_patient_info(self, patient_id: str) -> Dict[str, Any]:
+        """Get patient information.
+        
+        Args:
+            patient_id: Patient identifier
+            
+        Returns:
+            Patient information
+        """
+        ...
+    
+    async def get_patient_history(
+        self,
+        patient_id: str,
+        limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        """Get patient interaction history.
+        
+        Args:
+            patient_id: Patient identifier
+            limit: Maximum records to return
+            
+        Returns:
+            List of historical interactions
+        """
+        ...
+    
+    async def create_case(
+        self,
+        patient_id: str,
+        subject: str,
+        description: str,
+        priority: str = "normal"
+    ) -> Dict[str, Any]:
+        """Create a new case/ticket.
+        
+        Args:
+            patient_id: Patient identifier
+            subject: Case subject
+            description: Case description
+            priority: Priority level
+            
+        Returns:
+            Created case information
+        """
+        ...
+    
+    async def update_case(
+        self,
+        case_id: str,
+        updates: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Update existing case.
+        
+        Args:
+            case_id: Case identifier
+            updates: Fields to update
+            
+        Returns:
+            Updated case information
+        """
+        ...
+    
+    async def log_conversation(
+        self,
+        patient_id: str,
+        conversation_summary: str,
+        conversation_id: str,
+        metadata: Optional[Dict] = None
+    ) -> Dict[str, Any]:
+        """Log conversation summary to CRM.
+        
+        Args:
+            patient_id: Patient identifier
+            conversation_summary: Summary text
+            conversation_id: Conversation identifier
+            metadata: Additional metadata
+            
+        Returns:
+            Logged record information
+        """
+        ...
+    
+    async def get_appointments(
+        self,
+        patient_id: str,
+        include_past: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Get patient appointments.
+        
+        Args:
+            patient_id: Patient identifier
+            include_past: Include past appointments
+            
+        Returns:
+            List of appointments
+        """
+        ...
+    
+    async def schedule_appointment(
+        self,
+        patient_id: str,
+        appointment_type: str,
+        datetime_str: str,
+        provider_id: Optional[str] = None,
+        notes: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Schedule new appointment.
+        
+        Args:
+            patient_id: Patient identifier
+            appointment_type: Type of appointment
+            datetime_str: Appointment date/time
+            provider_id: Provider identifier
+            notes: Additional notes
+            
+        Returns:
+            Appointment information
+        """
+        ...
+    
+    async def get_insurance_info(self, patient_id: str) -> Dict[str, Any]:
+        """Get patient insurance information.
+        
+        Args:
+            patient_id: Patient identifier
+            
+        Returns:
+            Insurance information
+        """
+        ...
@@ -1,215 +1,324 @@
 """CRM abstraction layer for healthcare contact center."""
 
-from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+import asyncio
+import copy
+import functools
+import inspect
+import uuid
+from types import MappingProxyType
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Type
+
+import aiohttp
+from cachetools import TTLCache
 
 from src.utils.logging import get_logger
 from src.utils import utcnow
+from src.crm.base import CRMProvider
 
 logger = get_logger(__name__)
 
+# Mock Salesforce payloads, built once and copied into each response
+_MOCK_PATIENT_INFO = MappingProxyType({
+    "name": "John Doe",
+    "email": "[REDACTED_EMAIL]",
+    "phone": "[REDACTED_PHONE]",
+    "date_of_birth": "[REDACTED_DATE]",
+    "insurance_provider": "BlueCross BlueShield",
+    "primary_care_physician": "Dr. Sarah Johnson"
+})
+
+_MOCK_PATIENT_HISTORY = (
+    MappingProxyType({
+        "id": "hist_001",
+        "date": "2024-01-15",
+        "type": "appointment",
+        "summary": "Annual checkup - completed",
+        "provider": "Dr. Sarah Johnson"
+    }),
+    MappingProxyType({
+        "id": "hist_002",
+        "date": "2024-01-10",
+        "type": "call",
+        "summary": "Insurance coverage inquiry",
+        "agent": "Agent Smith"
+    })
+)
+
+_MOCK_APPOINTMENT = MappingProxyType({
+    "appointment_id": "appt_001",
+    "type": "follow-up",
+    "datetime": "2024-02-20T10:00:00Z",
+    "provider": "Dr. Sarah Johnson",
+    "status": "scheduled"
+})
+
+_MOCK_INSURANCE_INFO = MappingProxyType({
+    "provider": "BlueCross BlueShield",
+    "policy_number": "[REDACTED_POLICY]",
+    "group_number": "[REDACTED]",
+    "coverage_type": "PPO",
+    "copay": "$25",
+    "deductible": "$1,500",
+    "deductible_met": "$500",
+    "active": True
+})
 
-class CRMProvider(ABC):
-    """Abstract base class for CRM providers."""
+
+def cached_read(method: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """Serve repeat reads from the client's TTL cache.
     
-    @abstractmethod
-    def get_patient_info(self, patient_id: str) -> Dict[str, Any]:
-        """Get patient information.
-        
-        Args:
-            patient_id: Patient identifier
-            
-        Returns:
-            Patient information
-        """
-        pass
+    Cache keys are the method name followed by its bound arguments (with
+    defaults applied), so patient_id is always the second key element.
+    Concurrent misses for the same key share a single upstream call. Each
+    caller gets its own deep copy, so mutating a result cannot alter the
+    cached value or what other callers see.
+    """
+    signature = inspect.signature(method)
     
-    @abstractmethod
-    def get_patient_history(
-        self,
-        patient_id: str,
-        limit: int = 10
-    ) -> List[Dict[str, Any]]:
-        """Get patient interaction history.
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        key = (method.__name__,) + tuple(bound.arguments.values())[1:]
         
-        Args:
-            patient_id: Patient identifier
-            limit: Maximum records to return
-            
-        Returns:
-            List of historical interactions
-        """
-        pass
+        try:
+            return copy.deepcopy(self._read_cache[key])
+        except KeyError:
+            pass
+        
+        task = self._pending_reads.get(key)
+        if task is None:
+            task = asyncio.ensure_future(method(self, *args, **kwargs))
+            self._pending_reads[key] = task
+            task.add_done_callback(functools.partial(self._store_read, key))
+        # Shielded so one waiter's cancellation does not abort the others
+        return copy.deepcopy(await asyncio.shield(task))
     
-    @abstractmethod
-    def create_case(
-        self,
-        patient_id: str,
-        subject: str,
-        description: str,
-        priority: str = "normal"
-    ) -> Dict[str, Any]:
-        """Create a new case/ticket.
+    return wrapper
+
+
+# Provider name (lowercase) -> implementation, filled by @register_crm
+_CRM_REGISTRY: Dict[str, Type[CRMProvider]] = {}
+
+
+def register_crm(name: str) -> Callable[[type], type]:
+    """Register a CRM provider class under a name for CRMFactory.
+    
+    Args:
+        name: Provider name as used in CRM_PROVIDER (case-insensitive)
         
-        Args:
-            patient_id: Patient identifier
-            subject: Case subject
-            description: Case description
-            priority: Priority level
-            
-        Returns:
-            Created case information
-        """
-        pass
+    Returns:
+        Class decorator
+    """
+    def decorator(cls: type) -> type:
+        _CRM_REGISTRY[name.lower()] = cls
+        return cls
+    return decorator
+
+
+@register_crm("salesforce")
+class SalesforceCRM:
+    """Salesforce CRM implementation.
     
-    @abstractmethod
-    def update_case(
+    All calls share one aiohttp session (and its keep-alive connection
+    pool), so many Salesforce requests can be in flight on one event loop.
+    Use as an async context manager, or call close() on shutdown.
+    """
+    
+    # Salesforce REST API version used in request paths
+    API_VERSION = "v59.0"
+    
+    # Composite Batch limit on subrequests per call
+    MAX_BATCH_SUBREQUESTS = 25
+    
+    # Patient reads repeat within a conversation; serve them from memory
+    READ_CACHE_SIZE = 10000
+    READ_CACHE_TTL_SECONDS = 60
+    
+    def __init__(
         self,
-        case_id: str,
-        updates: Dict[str, Any]
-    ) -> Dict[str, Any]:
-        """Update existing case.
+        api_endpoint: str,
+        api_key: str,
+        max_connections: int = 100,
+        max_concurrency: int = 25
+    ):
+        """Initialize Salesforce CRM client.
         
         Args:
-            case_id: Case identifier
-            updates: Fields to update
-            
-        Returns:
-            Updated case information
+            api_endpoint: Salesforce API endpoint
+            api_key: API authentication key
+            max_connections: Size of the shared HTTP connection pool
+            max_concurrency: Requests allowed in flight at once, matching the
+                org's concurrent API request limit
         """
-        pass
+        self.api_endpoint = api_endpoint
+        self.api_key = api_key
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        # Built once and shared read-only as the session's default headers
+        self._auth_headers = MappingProxyType({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+        })
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Created on the loop that first sends a request
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._read_cache = TTLCache(
+            maxsize=self.READ_CACHE_SIZE,
+            ttl=self.READ_CACHE_TTL_SECONDS
+        )
+        self._pending_reads: Dict[tuple, asyncio.Future] = {}
+        logger.info("Salesforce CRM client initialized")
     
-    @abstractmethod
-    def log_conversation(
+    async def __aenter__(self) -> "SalesforceCRM":
+        await self._get_session()
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.close()
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on the running loop."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers=self._auth_headers,
+                connector=aiohttp.TCPConnector(
+                    limit=min(self.max_connections, self.max_concurrency),
+                    keepalive_timeout=75
+                )
+            )
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+    
+    async def _request(
         self,
-        patient_id: str,
-        conversation_summary: str,
-        conversation_id: str,
-        metadata: Optional[Dict] = None
-    ) -> Dict[str, Any]:
-        """Log conversation summary to CRM.
+        method: str,
+        path: str,
+        json: Optional[Any] = None
+    ) -> Any:
+        """Make a Salesforce REST API request.
         
         Args:
-            patient_id: Patient identifier
-            conversation_summary: Summary text
-            conversation_id: Conversation identifier
-            metadata: Additional metadata
+            method: HTTP method
+            path: Path below /services/data/<version>/
+            json: Request body
             
         Returns:
-            Logged record information
+            Decoded JSON response
         """
-        pass
+        session = await self._get_session()
+        url = f"{self.api_endpoint.rstrip('/')}/services/data/{self.API_VERSION}/{path}"
+        # Bursts queue here instead of tripping Salesforce's concurrency limit
+        async with self._semaphore:
+            async with session.request(method, url, json=json) as response:
+                response.raise_for_status()
+                return await response.json()
     
-    @abstractmethod
-    def get_appointments(
-        self,
-        patient_id: str,
-        include_past: bool = False
-    ) -> List[Dict[str, Any]]:
-        """Get patient appointments.
+    async def gather_patient_context(self, patient_id: str) -> Dict[str, Any]:
+        """Fetch patient info, upcoming appointments and insurance concurrently.
         
         Args:
             patient_id: Patient identifier
-            include_past: Include past appointments
             
         Returns:
-            List of appointments
+            Dict with "info", "appointments" and "insurance"
         """
-        pass
+        info, appointments, insurance = await asyncio.gather(
+            self.get_patient_info(patient_id),
+            self.get_appointments(patient_id, include_past=False),
+            self.get_insurance_info(patient_id),
+        )
+        return {
+            "info": info,
+            "appointments": appointments,
+            "insurance": insurance,
+        }
     
-    @abstractmethod
-    def schedule_appointment(
-        self,
-        patient_id: str,
-        appointment_type: str,
-        datetime_str: str,
-        provider_id: Optional[str] = None,
-        notes: Optional[str] = None
-    ) -> Dict[str, Any]:
-        """Schedule new appointment.
+    async def batch(self, subrequests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Resolve several REST calls with Composite Batch requests.
+        
+        Each Composite Batch call carries up to 25 subrequests; larger
+        batches are split and the calls sent concurrently.
         
         Args:
-            patient_id: Patient identifier
-            appointment_type: Type of appointment
-            datetime_str: Appointment date/time
-            provider_id: Provider identifier
-            notes: Additional notes
+            subrequests: Dicts with "method", "url" (relative to
+                /services/data/<version>/) and optional "body"
             
         Returns:
-            Appointment information
+            Sub-responses (statusCode, result) in request order
         """
-        pass
+        chunks = [
+            subrequests[start:start + self.MAX_BATCH_SUBREQUESTS]
+            for start in range(0, len(subrequests), self.MAX_BATCH_SUBREQUESTS)
+        ]
+        responses = await asyncio.gather(*(
+            self._request("POST", "composite/batch", json={
+                "batchRequests": [self._batch_request(sub) for sub in chunk]
+            })
+            for chunk in chunks
+        ))
+        return [result for response in responses for result in response["results"]]
+    
+    def _batch_request(self, subrequest: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a subrequest to a Composite Batch request entry."""
+        entry = {
+            "method": subrequest["method"],
+            "url": f"/services/data/{self.API_VERSION}/{subrequest['url']}"
+        }
+        if subrequest.get("body") is not None:
+            entry["richInput"] = subrequest["body"]
+        return entry
     
-    @abstractmethod
-    def get_insurance_info(self, patient_id: str) -> Dict[str, Any]:
-        """Get patient insurance information.
+    def composite(self) -> "CompositeBatch":
+        """Collect subrequests and send them in one round trip on exit.
+        
+        Example:
+            async with crm.composite() as batch:
+                contact = batch.add("GET", f"sobjects/Contact/{contact_id}")
+                cases = batch.add("GET", f"query?q={soql}")
+            contact.result(), cases.result()
         
-        Args:
-            patient_id: Patient identifier
-            
         Returns:
-            Insurance information
+            CompositeBatch context manager
         """
-        pass
-
-
-class SalesforceCRM(CRMProvider):
-    """Salesforce CRM implementation."""
+        return CompositeBatch(self)
     
-    def __init__(self, api_endpoint: str, api_key: str):
-        """Initialize Salesforce CRM client.
-        
-        Args:
-            api_endpoint: Salesforce API endpoint
-            api_key: API authentication key
-        """
-        self.api_endpoint = api_endpoint
-        self.api_key = api_key
-        logger.info("Salesforce CRM client initialized")
+    def _store_read(self, key: tuple, task: asyncio.Future):
+        """Cache a completed read and release its in-flight slot."""
+        self._pending_reads.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            self._read_cache[key] = task.result()
     
-    def get_patient_info(self, patient_id: str) -> Dict[str, Any]:
+    async def close(self):
+        """Close the shared HTTP session."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    @cached_read
+    async def get_patient_info(self, patient_id: str) -> Dict[str, Any]:
         """Get patient information from Salesforce."""
         # In production, this would make actual Salesforce API calls
-        logger.info(f"Fetching patient info for {patient_id}")
+        # through self._request()
+        logger.info("Fetching patient info for %s", patient_id)
         
         # Mock response
-        return {
-            "patient_id": patient_id,
-            "name": "John Doe",
-            "email": "[REDACTED_EMAIL]",
-            "phone": "[REDACTED_PHONE]",
-            "date_of_birth": "[REDACTED_DATE]",
-            "insurance_provider": "BlueCross BlueShield",
-            "primary_care_physician": "Dr. Sarah Johnson"
-        }
+        return {"patient_id": patient_id, **_MOCK_PATIENT_INFO}
     
-    def get_patient_history(
+    async def get_patient_history(
         self,
         patient_id: str,
         limit: int = 10
     ) -> List[Dict[str, Any]]:
         """Get patient interaction history."""
-        logger.info(f"Fetching patient history for {patient_id}")
+        logger.info("Fetching patient history for %s", patient_id)
         
         # Mock response
-        return [
-            {
-                "id": "hist_001",
-                "date": "2024-01-15",
-                "type": "appointment",
-                "summary": "Annual checkup - completed",
-                "provider": "Dr. Sarah Johnson"
-            },
-            {
-                "id": "hist_002",
-                "date": "2024-01-10",
-                "type": "call",
-                "summary": "Insurance coverage inquiry",
-                "agent": "Agent Smith"
-            }
-        ]
+        return [dict(entry) for entry in _MOCK_PATIENT_HISTORY]
     
-    def create_case(
+    async def create_case(
         self,
         patient_id: str,
         subject: str,
@@ -217,9 +326,9 @@ class SalesforceCRM(CRMProvider):
         priority: str = "normal"
     ) -> Dict[str, Any]:
         """Create case in Salesforce."""
-        logger.info(f"Creating case for patient {patient_id}: {subject}")
+        logger.info("Creating case for patient %s: %s", patient_id, subject)
         
-        case_id = f"case_{patient_id}_{utcnow().timestamp()}"
+        case_id = f"case_{patient_id}_{uuid.uuid4().hex[:12]}"
         
         return {
             "case_id": case_id,
@@ -231,13 +340,13 @@ class SalesforceCRM(CRMProvider):
             "created_at": utcnow().isoformat()
         }
     
-    def update_case(
+    async def update_case(
         self,
         case_id: str,
         updates: Dict[str, Any]
     ) -> Dict[str, Any]:
         """Update case in Salesforce."""
-        logger.info(f"Updating case {case_id}")
+        logger.info("Updating case %s", case_id)
         
         return {
             "case_id": case_id,
@@ -245,7 +354,7 @@ class SalesforceCRM(CRMProvider):
             "updated_at": utcnow().isoformat()
         }
     
-    def log_conversation(
+    async def log_conversation(
         self,
         patient_id: str,
         conversation_summary: str,
@@ -253,7 +362,7 @@ class SalesforceCRM(CRMProvider):
         metadata: Optional[Dict] = None
     ) -> Dict[str, Any]:
         """Log conversation to Salesforce."""
-        logger.info(f"Logging conversation {conversation_id} for patient {patient_id}")
+        logger.info("Logging conversation %s for patient %s", conversation_id, patient_id)
         
         return {
             "log_id": f"log_{conversation_id}",
@@ -264,27 +373,19 @@ class SalesforceCRM(CRMProvider):
             "logged_at": utcnow().isoformat()
         }
     
-    def get_appointments(
+    @cached_read
+    async def get_appointments(
         self,
         patient_id: str,
         include_past: bool = False
     ) -> List[Dict[str, Any]]:
         """Get patient appointments."""
-        logger.info(f"Fetching appointments for patient {patient_id}")
+        logger.info("Fetching appointments for patient %s", patient_id)
         
         # Mock response
-        return [
-            {
-                "appointment_id": "appt_001",
-                "patient_id": patient_id,
-                "type": "follow-up",
-                "datetime": "2024-02-20T10:00:00Z",
-                "provider": "Dr. Sarah Johnson",
-                "status": "scheduled"
-            }
-        ]
+        return [{**_MOCK_APPOINTMENT, "patient_id": patient_id}]
     
-    def schedule_appointment(
+    async def schedule_appointment(
         self,
         patient_id: str,
         appointment_type: str,
@@ -293,9 +394,13 @@ class SalesforceCRM(CRMProvider):
         notes: Optional[str] = None
     ) -> Dict[str, Any]:
         """Schedule appointment in Salesforce."""
-        logger.info(f"Scheduling {appointment_type} for patient {patient_id}")
+        logger.info("Scheduling %s for patient %s", appointment_type, patient_id)
         
-        appointment_id = f"appt_{patient_id}_{utcnow().timestamp()}"
+        # The patient's appointment list changes; drop cached copies
+        for include_past in (False, True):
+            self._read_cache.pop(("get_appointments", patient_id, include_past), None)
+        
+        appointment_id = f"appt_{patient_id}_{uuid.uuid4().hex[:12]}"
         
         return {
             "appointment_id": appointment_id,
@@ -308,22 +413,69 @@ class SalesforceCRM(CRMProvider):
             "created_at": utcnow().isoformat()
         }
     
-    def get_insurance_info(self, patient_id: str) -> Dict[str, Any]:
+    @cached_read
+    async def get_insurance_info(self, patient_id: str) -> Dict[str, Any]:
         """Get insurance information."""
-        logger.info(f"Fetching insurance info for patient {patient_id}")
+        logger.info("Fetching insurance info for patient %s", patient_id)
         
         # Mock response
-        return {
-            "patient_id": patient_id,
-            "provider": "BlueCross BlueShield",
-            "policy_number": "[REDACTED_POLICY]",
-            "group_number": "[REDACTED]",
-            "coverage_type": "PPO",
-            "copay": "$25",
-            "deductible": "$1,500",
-            "deductible_met": "$500",
-            "active": True
-        }
+        return {"patient_id": patient_id, **_MOCK_INSURANCE_INFO}
+
+
+class CompositeBatch:
+    """Collects Salesforce subrequests and flushes them in a single batch."""
+    
+    def __init__(self, crm: SalesforceCRM):
+        """Initialize batch.
+        
+        Args:
+            crm: Client the batch is sent through
+        """
+        self._crm = crm
+        self._subrequests: List[Dict[str, Any]] = []
+        self._futures: List[asyncio.Future] = []
+    
+    def add(
+        self,
+        method: str,
+        url: str,
+        body: Optional[Dict[str, Any]] = None
+    ) -> asyncio.Future:
+        """Queue a subrequest.
+        
+        Args:
+            method: HTTP method
+            url: Path relative to /services/data/<version>/
+            body: Request body
+            
+        Returns:
+            Future resolved with the sub-response when the batch is sent
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._subrequests.append({"method": method, "url": url, "body": body})
+        self._futures.append(future)
+        return future
+    
+    async def __aenter__(self) -> "CompositeBatch":
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            for future in self._futures:
+                future.cancel()
+            return
+        if not self._subrequests:
+            return
+        
+        try:
+            results = await self._crm.batch(self._subrequests)
+        except Exception as e:
+            for future in self._futures:
+                future.set_exception(e)
+            raise
+        
+        for future, result in zip(self._futures, results):
+            future.set_result(result)
 
 
 class CRMFactory:
@@ -333,7 +485,8 @@ class CRMFactory:
     def create_crm(
         provider: str,
         api_endpoint: str,
-        api_key: str
+        api_key: str,
+        **options: Any
     ) -> CRMProvider:
         """Create CRM provider instance.
         
@@ -341,11 +494,12 @@ class CRMFactory:
             provider: Provider name (e.g., 'salesforce')
             api_endpoint: API endpoint
             api_key: API key
+            **options: Provider-specific client options
             
         Returns:
             CRM provider instance
         """
-        if provider.lower() == "salesforce":
-            return SalesforceCRM(api_endpoint, api_key)
-        else:
+        provider_class = _CRM_REGISTRY.get(provider.lower())
+        if provider_class is None:
             raise ValueError(f"Unsupported CRM provider: {provider}")
+        return provider_class(api_endpoint, api_key, **options)
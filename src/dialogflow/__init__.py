@@ -1,19 +1,44 @@
 """Dialogflow package for conversation orchestration."""
 
-from .agent_definition import (
-    INTENTS,
-    ENTITIES,
-    FLOWS,
-    WEBHOOKS,
-    export_agent_definition
-)
 from .client import DialogflowClient
+from .webhook_codec import (
+    decode_webhook_request,
+    encode_webhook_response,
+    encode_fulfillment
+)
+
+# Agent definition names are loaded on first access (PEP 562), so processes
+# that only use DialogflowClient skip building every Intent/Entity.
+_AGENT_DEFINITION_EXPORTS = frozenset({
+    'INTENTS',
+    'ENTITIES',
+    'FLOWS',
+    'WEBHOOKS',
+    'SYNONYM_INDEX',
+    'resolve_entity',
+    'extract_entities',
+    'export_agent_definition',
+})
+
+
+def __getattr__(name):
+    if name in _AGENT_DEFINITION_EXPORTS:
+        from . import agent_definition
+        return getattr(agent_definition, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     'INTENTS',
     'ENTITIES',
     'FLOWS',
     'WEBHOOKS',
+    'SYNONYM_INDEX',
+    'resolve_entity',
+    'extract_entities',
     'export_agent_definition',
     'DialogflowClient',
+    'decode_webhook_request',
+    'encode_webhook_response',
+    'encode_fulfillment',
 ]
@@ -22,19 +22,41 @@ Each flow includes:
 - Agent handoff triggers
 """
 
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass, asdict
-import json
+from functools import lru_cache
+from types import MappingProxyType
+import re
+import sys
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
-@dataclass
+
+# Slotted dataclasses (3.10+) drop the per-instance __dict__; on older
+# interpreters slots would clash with the field defaults, so they are skipped
+_DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+def _freeze(value: Any) -> Any:
+    """Recursively convert dicts to read-only mappings and lists to tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+@dataclass(**_DATACLASS_OPTIONS)
 class TrainingPhrase:
     """Training phrase for intent."""
     text: str
     parts: List[Dict[str, str]] = None
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class Intent:
     """Dialogflow CX Intent definition."""
     display_name: str
@@ -43,7 +65,7 @@ class Intent:
     description: str = ""
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class Entity:
     """Dialogflow CX Entity definition."""
     display_name: str
@@ -97,6 +119,94 @@ ENTITIES = {
     ),
 }
 
+# Lowercased synonym (or value) -> canonical value, per entity
+SYNONYM_INDEX = {
+    name: {
+        synonym.lower(): entry["value"]
+        for entry in entity.entities
+        for synonym in (entry["value"], *entry["synonyms"])
+    }
+    for name, entity in ENTITIES.items()
+}
+
+
+def resolve_entity(name: str, token: str) -> Optional[str]:
+    """Resolve a synonym to its entity's canonical value.
+    
+    Args:
+        name: Entity key in ENTITIES (e.g., 'appointment_type')
+        token: User-supplied value (e.g., 'X-Ray')
+        
+    Returns:
+        Canonical value (e.g., 'imaging'), or None if unknown
+    """
+    return SYNONYM_INDEX[name].get(token.lower())
+
+
+def _build_synonym_matcher():
+    """Compile every entity synonym into one multi-pattern matcher.
+    
+    Returns a pyahocorasick automaton when available, otherwise a regex
+    alternation (longest synonym first) scanned with a lookahead.
+    """
+    targets: Dict[str, List[Tuple[str, str]]] = {}
+    for name, index in SYNONYM_INDEX.items():
+        for synonym, value in index.items():
+            targets.setdefault(synonym, []).append((name, value))
+    
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for synonym, hits in targets.items():
+            automaton.add_word(synonym, (synonym, hits))
+        automaton.make_automaton()
+        return automaton
+    
+    pattern = re.compile("(?=({}))".format(
+        "|".join(map(re.escape, sorted(targets, key=len, reverse=True)))
+    ))
+    return pattern, targets
+
+
+_SYNONYM_MATCHER = _build_synonym_matcher()
+
+
+def _is_word(text: str, start: int, end: int) -> bool:
+    """Whether text[start:end] is not part of a longer word."""
+    return (
+        (start == 0 or not text[start - 1].isalnum())
+        and (end == len(text) or not text[end].isalnum())
+    )
+
+
+def extract_entities(text: str) -> List[Tuple[str, str, int, int]]:
+    """Find every entity synonym mentioned in free text in one pass.
+    
+    Args:
+        text: User utterance
+        
+    Returns:
+        (entity name, canonical value, start, end) tuples ordered by start,
+        where text[start:end] is the matched synonym
+    """
+    text = text.lower()
+    matches = []
+    
+    if ahocorasick is not None:
+        for last, (synonym, hits) in _SYNONYM_MATCHER.iter(text):
+            start, end = last - len(synonym) + 1, last + 1
+            if _is_word(text, start, end):
+                matches.extend((name, value, start, end) for name, value in hits)
+    else:
+        pattern, targets = _SYNONYM_MATCHER
+        for match in pattern.finditer(text):
+            synonym = match.group(1)
+            start, end = match.start(), match.start() + len(synonym)
+            if _is_word(text, start, end):
+                matches.extend((name, value, start, end) for name, value in targets[synonym])
+    
+    matches.sort(key=lambda match: match[2])
+    return matches
+
 
 # ============================================================================
 # INTENT DEFINITIONS
@@ -398,25 +508,55 @@ WEBHOOKS = {
 }
 
 
-def export_agent_definition(filepath: str):
-    """Export complete agent definition to JSON file.
-    
-    Args:
-        filepath: Path to save the JSON file
-    """
-    agent_def = {
+# Shared read-only by every thread (and by workers forked after preload),
+# so nothing can mutate them behind the export
+FLOWS = _freeze(FLOWS)
+WEBHOOKS = _freeze(WEBHOOKS)
+
+
+# Serialized once at import; the definitions above are constants
+_ENTITIES_SERIALIZED = {k: asdict(v) for k, v in ENTITIES.items()}
+_INTENTS_SERIALIZED = {k: asdict(v) for k, v in INTENTS.items()}
+
+
+@lru_cache(maxsize=1)
+def _build_agent_def() -> Dict[str, Any]:
+    """Assemble the complete agent definition (built once per process)."""
+    return {
         "displayName": "Healthcare Contact Center Agent",
         "defaultLanguageCode": "en",
         "timeZone": "America/New_York",
         "description": "Conversational AI agent for healthcare patient inquiries",
-        "entities": {k: asdict(v) for k, v in ENTITIES.items()},
-        "intents": {k: asdict(v) for k, v in INTENTS.items()},
+        "entities": _ENTITIES_SERIALIZED,
+        "intents": _INTENTS_SERIALIZED,
         "flows": FLOWS,
         "webhooks": WEBHOOKS,
     }
+
+
+def _serialize_frozen(value: Any) -> Any:
+    """orjson fallback for the read-only mappings in FLOWS/WEBHOOKS."""
+    if isinstance(value, MappingProxyType):
+        return dict(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def export_agent_definition(filepath: str):
+    """Export complete agent definition to JSON file.
+    
+    Args:
+        filepath: Path to save the JSON file
+    """
+    import orjson
+    
+    agent_def = _build_agent_def()
     
-    with open(filepath, 'w') as f:
-        json.dump(agent_def, f, indent=2)
+    with open(filepath, 'wb') as f:
+        f.write(orjson.dumps(
+            agent_def,
+            default=_serialize_frozen,
+            option=orjson.OPT_INDENT_2
+        ))
 
 
 if __name__ == "__main__":
@@ -1,8 +1,17 @@
 """Dialogflow CX client for conversation management."""
 
-from typing import Dict, Any, Optional, List
+import functools
+import logging
+import threading
+from typing import AsyncIterable, AsyncIterator, Dict, Any, Iterable, Iterator, List, Optional
+from cachetools import TTLCache
 from google.cloud import dialogflowcx_v3beta1 as dialogflow
+from google.cloud.dialogflowcx_v3beta1.services.sessions.transports import (
+    SessionsGrpcAsyncIOTransport,
+    SessionsGrpcTransport
+)
 from google.api_core.exceptions import GoogleAPIError
+from google.protobuf import json_format
 
 from config.config import config
 from src.utils.logging import get_logger
@@ -10,9 +19,49 @@ from src.utils.logging import get_logger
 logger = get_logger(__name__)
 
 
+def _fulfillment_texts(response_messages) -> List[str]:
+    """First text of each raw ResponseMessage proto, "" for non-text ones."""
+    texts = []
+    for message in response_messages:
+        text = message.text.text
+        texts.append(text[0] if text else "")
+    return texts
+
+
 class DialogflowClient:
     """Client for interacting with Dialogflow CX."""
     
+    # Repeated utterances ("yes", "thank you") within a session are served
+    # from cache for this long instead of calling Dialogflow again.
+    INTENT_CACHE_SIZE = 1024
+    INTENT_CACHE_TTL_SECONDS = 60
+    
+    # Session resource paths kept formatted, one per recent session
+    SESSION_PATH_CACHE_SIZE = 4096
+    
+    # Keepalive pings stop idle load balancers from dropping the channel,
+    # which would otherwise cost a reconnect on the next call
+    GRPC_CHANNEL_OPTIONS = (
+        ("grpc.keepalive_time_ms", 30000),
+        ("grpc.keepalive_timeout_ms", 10000),
+        ("grpc.max_send_message_length", -1),
+        ("grpc.max_receive_message_length", -1),
+    )
+    
+    # Streaming calls are long-lived bidi streams, so they get their own
+    # channels: tighter keepalive, pings allowed while a caller is silent,
+    # and a local subchannel pool so each channel opens its own HTTP/2
+    # connection instead of sharing one (and its stream cap) with the rest
+    STREAMING_CHANNEL_COUNT = 4
+    STREAMING_CHANNEL_OPTIONS = (
+        ("grpc.keepalive_time_ms", 20000),
+        ("grpc.keepalive_timeout_ms", 10000),
+        ("grpc.http2.max_pings_without_data", 0),
+        ("grpc.use_local_subchannel_pool", 1),
+        ("grpc.max_send_message_length", -1),
+        ("grpc.max_receive_message_length", -1),
+    )
+    
     def __init__(self, project_id: str = None, location: str = None, agent_id: str = None):
         """Initialize Dialogflow client.
         
@@ -25,15 +74,83 @@ class DialogflowClient:
         self.location = location or config.gcp.location
         self.agent_id = agent_id or config.gcp.dialogflow_agent_id
         
-        # Initialize clients
-        self.sessions_client = dialogflow.SessionsClient()
-        self.agents_client = dialogflow.AgentsClient()
+        # gRPC clients are created on first use and then shared; creating
+        # them resolves credentials and opens a channel
+        self._sessions_client: Optional[dialogflow.SessionsClient] = None
+        self._agents_client: Optional[dialogflow.AgentsClient] = None
+        self._streaming_clients: Optional[List[dialogflow.SessionsClient]] = None
+        self._client_lock = threading.Lock()
+        # grpc.aio channels bind to an event loop, so the async client is
+        # created by the first coroutine that streams
+        self._async_sessions_client: Optional[dialogflow.SessionsAsyncClient] = None
         
-        logger.info("Dialogflow client initialized", {
+        self._intent_cache = TTLCache(
+            maxsize=self.INTENT_CACHE_SIZE,
+            ttl=self.INTENT_CACHE_TTL_SECONDS
+        )
+        self._intent_cache_lock = threading.Lock()
+        # Per-thread DetectIntentRequest templates, keyed by language code
+        self._request_templates = threading.local()
+        
+        self._session_path = functools.lru_cache(maxsize=self.SESSION_PATH_CACHE_SIZE)(
+            functools.partial(
+                dialogflow.SessionsClient.session_path,
+                self.project_id,
+                self.location,
+                self.agent_id
+            )
+        )
+        
+        logger.info("Dialogflow client initialized", extra={
             "project_id": self.project_id,
             "location": self.location
         })
     
+    @property
+    def sessions_client(self) -> dialogflow.SessionsClient:
+        """Sessions client on one long-lived gRPC channel."""
+        if self._sessions_client is None:
+            with self._client_lock:
+                if self._sessions_client is None:
+                    channel = SessionsGrpcTransport.create_channel(
+                        options=self.GRPC_CHANNEL_OPTIONS
+                    )
+                    self._sessions_client = dialogflow.SessionsClient(
+                        transport=SessionsGrpcTransport(channel=channel)
+                    )
+        return self._sessions_client
+    
+    def _streaming_client(self, session_id: str) -> dialogflow.SessionsClient:
+        """Sessions client for streaming, pinned to one channel per session.
+        
+        Sessions are spread over STREAMING_CHANNEL_COUNT channels so
+        concurrent calls don't queue behind one connection's stream limit.
+        """
+        if self._streaming_clients is None:
+            with self._client_lock:
+                if self._streaming_clients is None:
+                    self._streaming_clients = [
+                        dialogflow.SessionsClient(
+                            transport=SessionsGrpcTransport(
+                                channel=SessionsGrpcTransport.create_channel(
+                                    options=self.STREAMING_CHANNEL_OPTIONS
+                                )
+                            )
+                        )
+                        for _ in range(self.STREAMING_CHANNEL_COUNT)
+                    ]
+        clients = self._streaming_clients
+        return clients[hash(session_id) % len(clients)]
+    
+    @property
+    def agents_client(self) -> dialogflow.AgentsClient:
+        """Agents client, created on first use."""
+        if self._agents_client is None:
+            with self._client_lock:
+                if self._agents_client is None:
+                    self._agents_client = dialogflow.AgentsClient()
+        return self._agents_client
+    
     def detect_intent(
         self,
         session_id: str,
@@ -50,47 +167,49 @@ class DialogflowClient:
         Returns:
             Dict containing intent detection results
         """
+        cache_key = None
+        if config.enable_caching:
+            cache_key = (session_id, " ".join(text.lower().split()), language_code)
+            with self._intent_cache_lock:
+                cached = self._intent_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
         try:
-            session_path = self.sessions_client.session_path(
-                self.project_id,
-                self.location,
-                self.agent_id,
-                session_id
-            )
-            
-            text_input = dialogflow.TextInput(text=text)
-            query_input = dialogflow.QueryInput(
-                text=text_input,
-                language_code=language_code
-            )
-            
-            request = dialogflow.DetectIntentRequest(
-                session=session_path,
-                query_input=query_input
-            )
+            request = self._detect_intent_template(language_code)
+            request.session = self._session_path(session_id)
+            request.query_input.text.text = text
             
             response = self.sessions_client.detect_intent(request=request)
             
+            # Read the raw protobuf once instead of going through the
+            # proto-plus wrappers for every field
+            query_result = response.query_result._pb
+            intent_name = query_result.intent.display_name
+            confidence = query_result.intent_detection_confidence
+            
             result = {
                 "response_id": response.response_id,
-                "query_text": response.query_result.text,
+                "query_text": query_result.text,
                 "intent": {
-                    "name": response.query_result.intent.display_name,
-                    "confidence": response.query_result.intent_detection_confidence,
+                    "name": intent_name,
+                    "confidence": confidence,
                 },
-                "parameters": dict(response.query_result.parameters),
-                "fulfillment_messages": [
-                    msg.text.text[0] if msg.text.text else ""
-                    for msg in response.query_result.response_messages
-                ],
-                "current_page": response.query_result.current_page.display_name,
+                "parameters": json_format.MessageToDict(query_result.parameters),
+                "fulfillment_messages": _fulfillment_texts(query_result.response_messages),
+                "current_page": query_result.current_page.display_name,
             }
             
-            logger.info("Intent detected", {
-                "session_id": session_id,
-                "intent": result["intent"]["name"],
-                "confidence": result["intent"]["confidence"]
-            })
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Intent detected", extra={
+                    "session_id": session_id,
+                    "intent": intent_name,
+                    "confidence": confidence
+                })
+            
+            if cache_key is not None:
+                with self._intent_cache_lock:
+                    self._intent_cache[cache_key] = result
             
             return result
             
@@ -101,18 +220,45 @@ class DialogflowClient:
             logger.error(f"Error detecting intent: {e}", exc_info=True)
             raise
     
+    def _detect_intent_template(self, language_code: str) -> dialogflow.DetectIntentRequest:
+        """Get this thread's reusable text request for a language.
+        
+        Only the session and text change between calls, so the nested
+        protos are built once per thread and language and then updated in
+        place. Templates are thread-local because detect_intent is called
+        from concurrent request threads.
+        """
+        templates = getattr(self._request_templates, "by_language", None)
+        if templates is None:
+            templates = self._request_templates.by_language = {}
+        request = templates.get(language_code)
+        if request is None:
+            request = templates[language_code] = dialogflow.DetectIntentRequest(
+                query_input=dialogflow.QueryInput(
+                    text=dialogflow.TextInput(),
+                    language_code=language_code
+                )
+            )
+        return request
+    
     def stream_detect_intent(
         self,
         session_id: str,
-        audio_chunks: List[bytes],
+        audio_chunks: Iterable[bytes],
         language_code: str = "en",
         sample_rate: int = 16000
-    ):
+    ) -> Iterator[Dict[str, Any]]:
         """Stream audio for intent detection (for voice calls).
         
+        audio_chunks is consumed lazily while the stream is open, so pass a
+        live iterator (e.g. reading the telephony socket) and each chunk is
+        sent as soon as it arrives instead of after the caller stops talking.
+        Use frames of at least 20 ms (640 bytes of 16 kHz LINEAR16); smaller
+        frames spend more on gRPC framing than on audio.
+        
         Args:
             session_id: Unique session identifier
-            audio_chunks: List of audio byte chunks
+            audio_chunks: Iterable of LINEAR16 audio byte chunks
             language_code: Language code
             sample_rate: Audio sample rate in Hz
             
@@ -120,63 +266,130 @@ class DialogflowClient:
             Intent detection results
         """
         try:
-            session_path = self.sessions_client.session_path(
-                self.project_id,
-                self.location,
-                self.agent_id,
-                session_id
+            config_request = self._streaming_config_request(
+                session_id, language_code, sample_rate
             )
             
             def request_generator():
                 # First request with session and config
-                audio_config = dialogflow.InputAudioConfig(
-                    audio_encoding=dialogflow.AudioEncoding.LINEAR16,
-                    sample_rate_hertz=sample_rate,
-                    language_code=language_code
-                )
-                query_input = dialogflow.QueryInput(
-                    audio=audio_config,
-                    language_code=language_code
-                )
-                
-                yield dialogflow.StreamingDetectIntentRequest(
-                    session=session_path,
-                    query_input=query_input
-                )
+                yield config_request
                 
-                # Subsequent requests with audio chunks
+                # Subsequent requests with audio chunks, as they arrive
                 for chunk in audio_chunks:
                     yield dialogflow.StreamingDetectIntentRequest(
                         input_audio=chunk
                     )
             
-            responses = self.sessions_client.streaming_detect_intent(
+            responses = self._streaming_client(session_id).streaming_detect_intent(
                 requests=request_generator()
             )
             
             for response in responses:
-                if response.recognition_result:
-                    yield {
-                        "transcript": response.recognition_result.transcript,
-                        "is_final": response.recognition_result.is_final,
-                        "confidence": response.recognition_result.confidence
-                    }
-                
-                if response.detect_intent_response:
-                    query_result = response.detect_intent_response.query_result
-                    yield {
-                        "intent": query_result.intent.display_name,
-                        "confidence": query_result.intent_detection_confidence,
-                        "fulfillment": [
-                            msg.text.text[0] if msg.text.text else ""
-                            for msg in query_result.response_messages
-                        ]
-                    }
+                yield from self._streaming_results(response)
+        
+        except GoogleAPIError as e:
+            logger.error(f"Streaming error: {e}", exc_info=True)
+            raise
+    
+    async def stream_detect_intent_async(
+        self,
+        session_id: str,
+        audio_chunks: AsyncIterable[bytes],
+        language_code: str = "en",
+        sample_rate: int = 16000
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream audio for intent detection from an async audio source.
+        
+        Audio upload and result download overlap on one bidirectional gRPC
+        stream: chunks are sent as audio_chunks produces them while
+        recognition results are yielded as Dialogflow returns them.
+        
+        Args:
+            session_id: Unique session identifier
+            audio_chunks: Async iterable of LINEAR16 audio byte chunks
+                (at least 20 ms each)
+            language_code: Language code
+            sample_rate: Audio sample rate in Hz
+            
+        Yields:
+            Intent detection results
+        """
+        if self._async_sessions_client is None:
+            channel = SessionsGrpcAsyncIOTransport.create_channel(
+                options=self.STREAMING_CHANNEL_OPTIONS
+            )
+            self._async_sessions_client = dialogflow.SessionsAsyncClient(
+                transport=SessionsGrpcAsyncIOTransport(channel=channel)
+            )
+        
+        try:
+            config_request = self._streaming_config_request(
+                session_id, language_code, sample_rate
+            )
+            
+            async def request_generator():
+                yield config_request
+                async for chunk in audio_chunks:
+                    yield dialogflow.StreamingDetectIntentRequest(
+                        input_audio=chunk
+                    )
+            
+            responses = await self._async_sessions_client.streaming_detect_intent(
+                requests=request_generator()
+            )
+            
+            async for response in responses:
+                for result in self._streaming_results(response):
+                    yield result
         
         except GoogleAPIError as e:
             logger.error(f"Streaming error: {e}", exc_info=True)
             raise
     
+    def _streaming_config_request(
+        self,
+        session_id: str,
+        language_code: str,
+        sample_rate: int
+    ) -> dialogflow.StreamingDetectIntentRequest:
+        """Build the first streaming request, carrying session and audio config."""
+        session_path = self._session_path(session_id)
+        audio_config = dialogflow.InputAudioConfig(
+            audio_encoding=dialogflow.AudioEncoding.LINEAR16,
+            sample_rate_hertz=sample_rate,
+            language_code=language_code
+        )
+        query_input = dialogflow.QueryInput(
+            audio=audio_config,
+            language_code=language_code
+        )
+        return dialogflow.StreamingDetectIntentRequest(
+            session=session_path,
+            query_input=query_input
+        )
+    
+    @staticmethod
+    def _streaming_results(
+        response: dialogflow.StreamingDetectIntentResponse
+    ) -> Iterator[Dict[str, Any]]:
+        """Convert a streaming response to transcript and intent results."""
+        response = response._pb
+        if response.HasField("recognition_result"):
+            recognition = response.recognition_result
+            yield {
+                "transcript": recognition.transcript,
+                "is_final": recognition.is_final,
+                "confidence": recognition.confidence
+            }
+        
+        if response.HasField("detect_intent_response"):
+            query_result = response.detect_intent_response.query_result
+            yield {
+                "intent": query_result.intent.display_name,
+                "confidence": query_result.intent_detection_confidence,
+                "fulfillment": _fulfillment_texts(query_result.response_messages)
+            }
+    
     def get_session_info(self, session_id: str) -> Dict[str, Any]:
         """Get current session information.
         
@@ -186,12 +399,7 @@ class DialogflowClient:
         Returns:
             Session information
         """
-        session_path = self.sessions_client.session_path(
-            self.project_id,
-            self.location,
-            self.agent_id,
-            session_id
-        )
+        session_path = self._session_path(session_id)
         
         return {
             "session_id": session_id,
@@ -0,0 +1,57 @@
+"""orjson encoding/decoding for Dialogflow CX webhook payloads."""
+
+from typing import Any, Dict, Optional
+
+import orjson
+
+# Fulfillment bodies are pre-built; only the message text (and, for the
+# appointment template, the appointment ID) varies per request.
+FULFILLMENT_TEMPLATE = b'{"fulfillmentResponse":{"messages":[{"text":{"text":[%s]}}]}}'
+FULFILLMENT_APPOINTMENT_TEMPLATE = (
+    b'{"fulfillmentResponse":{"messages":[{"text":{"text":[%s]}}]},'
+    b'"sessionInfo":{"parameters":{"appointment_id":%s}}}'
+)
+
+
+def decode_webhook_request(body: bytes) -> Dict[str, Any]:
+    """Parse a webhook request body.
+
+    Args:
+        body: Raw request body
+
+    Returns:
+        Parsed body, or an empty dict when the body is empty or not JSON
+    """
+    try:
+        return orjson.loads(body or b"{}")
+    except orjson.JSONDecodeError:
+        return {}
+
+
+def encode_webhook_response(response: Dict[str, Any]) -> bytes:
+    """Serialize an arbitrary webhook response.
+
+    Args:
+        response: Webhook response
+
+    Returns:
+        JSON bytes
+    """
+    return orjson.dumps(response, option=orjson.OPT_NON_STR_KEYS)
+
+
+def encode_fulfillment(text: str, appointment_id: Optional[str] = None) -> bytes:
+    """Serialize a single-message fulfillment response.
+
+    Args:
+        text: Message to speak/show to the caller
+        appointment_id: Optional appointment ID to set as a session parameter
+
+    Returns:
+        JSON bytes
+    """
+    if appointment_id is None:
+        return FULFILLMENT_TEMPLATE % orjson.dumps(text)
+    return FULFILLMENT_APPOINTMENT_TEMPLATE % (
+        orjson.dumps(text), orjson.dumps(appointment_id)
+    )
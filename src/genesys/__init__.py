@@ -1,10 +1,11 @@
 """Genesys Cloud integration package."""
 
-from .client import GenesysClient, genesys_client
+from .client import GenesysClient, GenesysAsyncClient, genesys_client
 from .webhooks import GenesysWebhookHandler, webhook_handler, GENESYS_EVENT_SCHEMAS
 
 __all__ = [
     'GenesysClient',
+    'GenesysAsyncClient',
     'genesys_client',
     'GenesysWebhookHandler',
     'webhook_handler',
@@ -1,9 +1,21 @@
 """Genesys Cloud integration client."""
 
+import asyncio
+import concurrent.futures
+import math
 import requests
 import base64
-from typing import Dict, Any, Optional, List
-from datetime import datetime, timedelta
+import threading
+import time
+from collections import deque
+from itertools import islice
+from typing import AsyncIterator, Dict, Any, Iterator, Optional, List
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import aiohttp
+import orjson
+from cachetools import TTLCache
 
 from config.config import config
 from src.utils.logging import get_logger
@@ -11,9 +23,94 @@ from src.utils import utcnow
 
 logger = get_logger(__name__)
 
+CONVERSATION_QUERY_ENDPOINT = "analytics/conversations/details/query"
+
+# Largest page the conversation details query returns
+CONVERSATION_PAGE_SIZE = 100
+
+
+def _conversation_query(
+    start_date: str,
+    end_date: str,
+    filters: Optional[Dict] = None,
+    page_number: Optional[int] = None
+) -> Dict[str, Any]:
+    """Build a conversation details query body.
+    
+    Args:
+        start_date: Start date (ISO format)
+        end_date: End date (ISO format)
+        filters: Optional search filters
+        page_number: 1-based page to request; omitted for the default page
+        
+    Returns:
+        Query body
+    """
+    query = {
+        "interval": f"{start_date}/{end_date}",
+        "order": "desc",
+        "orderBy": "conversationStart"
+    }
+    
+    if page_number is not None:
+        query["paging"] = {"pageSize": CONVERSATION_PAGE_SIZE, "pageNumber": page_number}
+    
+    if filters:
+        query.update(filters)
+    
+    return query
+
+
+# Form-encoded client credentials grant
+_TOKEN_REQUEST_BODY = b"grant_type=client_credentials"
+
+
+def _token_request_headers(client_id: str, client_secret: str) -> Dict[str, str]:
+    """Build the Basic-authenticated headers for OAuth token requests.
+    
+    Args:
+        client_id: Genesys OAuth client ID
+        client_secret: Genesys OAuth client secret
+        
+    Returns:
+        Request headers
+    """
+    credentials = base64.b64encode(f"{client_id}:{client_secret}".encode()).decode()
+    return {
+        "Authorization": f"Basic {credentials}",
+        "Content-Type": "application/x-www-form-urlencoded"
+    }
+
+
+def _page_count(first_page: Dict[str, Any]) -> int:
+    """Number of pages reported by the first page of a conversation query."""
+    return math.ceil(first_page.get("totalHits", 0) / CONVERSATION_PAGE_SIZE)
+
 
 class GenesysClient:
-    """Client for Genesys Cloud API integration."""
+    """Client for Genesys Cloud API integration.
+    
+    All calls share one requests.Session, so TCP/TLS connections to the
+    Genesys API and login hosts are kept alive and reused.
+    """
+    
+    # Keep-alive connections held per host
+    POOL_MAXSIZE = 32
+    
+    # Transient failures retried with exponential backoff. urllib3 only
+    # retries idempotent methods by default, so POST/PATCH are never replayed.
+    RETRY = Retry(
+        total=3,
+        backoff_factor=0.2,
+        status_forcelist=(429, 500, 502, 503, 504)
+    )
+    
+    # Agent profiles change rarely; conversation details change as the
+    # call progresses, so they are reused only briefly
+    USER_CACHE_SIZE = 4096
+    USER_CACHE_TTL_SECONDS = 300
+    CONVERSATION_CACHE_SIZE = 4096
+    CONVERSATION_CACHE_TTL_SECONDS = 30
     
     def __init__(
         self,
@@ -34,58 +131,93 @@ class GenesysClient:
         
         self.base_url = f"https://api.{self.environment}/api/v2"
         self.auth_url = f"https://login.{self.environment}/oauth/token"
+        # Endpoint -> full URL, with the prefix joined once
+        self._url = (self.base_url + "/").__add__
+        # Credentials are fixed, so every token refresh posts these as-is
+        self._token_headers = _token_request_headers(self.client_id, self.client_secret)
         
         self.access_token: Optional[str] = None
-        self.token_expires_at: Optional[datetime] = None
+        # API request headers, rebuilt only when the token changes; the
+        # HTTP client merges them into each request without mutating them
+        self._api_headers: Dict[str, str] = {}
+        # time.monotonic() value after which the token must be refreshed
+        self.token_deadline = 0.0
+        self._token_lock = threading.Lock()
+        
+        self._user_cache = TTLCache(maxsize=self.USER_CACHE_SIZE, ttl=self.USER_CACHE_TTL_SECONDS)
+        self._conversation_cache = TTLCache(
+            maxsize=self.CONVERSATION_CACHE_SIZE,
+            ttl=self.CONVERSATION_CACHE_TTL_SECONDS
+        )
+        self._cache_lock = threading.Lock()
+        
+        self._session = requests.Session()
+        self._session.mount(
+            "https://",
+            HTTPAdapter(pool_maxsize=self.POOL_MAXSIZE, max_retries=self.RETRY)
+        )
+        self._session.headers.update({
+            "Accept": "application/json",
+            "User-Agent": "healthcare-contact-center/1.0"
+        })
         
         logger.info(f"Genesys client initialized for environment: {self.environment}")
     
+    def _token_valid(self) -> bool:
+        return self.access_token is not None and time.monotonic() < self.token_deadline
+    
     def _get_access_token(self) -> str:
         """Get OAuth access token.
         
+        Concurrent callers with an expired token wait on one refresh
+        instead of each requesting a new token.
+        
         Returns:
             Access token
         """
         # Check if token is still valid
-        if self.access_token and self.token_expires_at:
-            if utcnow() < self.token_expires_at:
+        if self._token_valid():
+            return self.access_token
+        
+        with self._token_lock:
+            # Another thread may have refreshed while we waited
+            if self._token_valid():
                 return self.access_token
+            return self._refresh_access_token()
+    
+    def _refresh_access_token(self) -> str:
+        """Request a new OAuth access token.
         
-        # Request new token
+        Returns:
+            Access token
+        """
         try:
-            # Create basic auth header
-            credentials = f"{self.client_id}:{self.client_secret}"
-            encoded = base64.b64encode(credentials.encode()).decode()
-            
-            headers = {
-                "Authorization": f"Basic {encoded}",
-                "Content-Type": "application/x-www-form-urlencoded"
-            }
-            
-            data = {
-                "grant_type": "client_credentials"
-            }
-            
-            response = requests.post(
+            response = self._session.post(
                 self.auth_url,
-                headers=headers,
-                data=data,
+                headers=self._token_headers,
+                data=_TOKEN_REQUEST_BODY,
                 timeout=config.request_timeout
             )
             response.raise_for_status()
             
-            token_data = response.json()
+            token_data = orjson.loads(response.content)
+            self._api_headers = {
+                "Authorization": f"Bearer {token_data['access_token']}",
+                "Content-Type": "application/json"
+            }
             self.access_token = token_data["access_token"]
             
-            # Set expiration (with 5 minute buffer)
+            # Set expiration (with 5 minute buffer); the deadline is written
+            # after the token so lock-free readers never see a stale token
+            # paired with a fresh deadline
             expires_in = token_data.get("expires_in", 3600)
-            self.token_expires_at = utcnow() + timedelta(seconds=expires_in - 300)
+            self.token_deadline = time.monotonic() + expires_in - 300
             
             logger.info("Obtained new Genesys access token")
             
             return self.access_token
         
-        except requests.RequestException as e:
+        except (requests.RequestException, orjson.JSONDecodeError) as e:
             logger.error(f"Error obtaining Genesys access token: {e}", exc_info=True)
             raise
     
@@ -107,34 +239,52 @@ class GenesysClient:
         Returns:
             Response data
         """
-        token = self._get_access_token()
-        
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
-        }
-        
-        url = f"{self.base_url}/{endpoint}"
+        self._get_access_token()
         
         try:
-            response = requests.request(
+            response = self._session.request(
                 method=method,
-                url=url,
-                headers=headers,
-                json=data,
+                url=self._url(endpoint),
+                headers=self._api_headers,
+                data=orjson.dumps(data) if data is not None else None,
                 params=params,
                 timeout=config.request_timeout
             )
             response.raise_for_status()
             
-            return response.json() if response.content else {}
+            return orjson.loads(response.content) if response.content else {}
         
-        except requests.RequestException as e:
+        except (requests.RequestException, orjson.JSONDecodeError) as e:
             logger.error(f"Genesys API request failed: {e}", exc_info=True)
             raise
     
+    def close(self):
+        """Close pooled HTTP connections."""
+        self._session.close()
+    
+    def _cached_get(self, cache: TTLCache, key: str, endpoint: str) -> Dict[str, Any]:
+        """GET an endpoint, reusing a response cached under key."""
+        with self._cache_lock:
+            cached = cache.get(key)
+        if cached is not None:
+            return cached
+        
+        result = self._make_request("GET", endpoint)
+        with self._cache_lock:
+            cache[key] = result
+        return result
+    
+    def invalidate_conversation(self, conversation_id: str):
+        """Drop cached details for a conversation that changed or ended.
+        
+        Args:
+            conversation_id: Conversation ID
+        """
+        with self._cache_lock:
+            self._conversation_cache.pop(conversation_id, None)
+    
     def get_conversation(self, conversation_id: str) -> Dict[str, Any]:
-        """Get conversation details.
+        """Get conversation details (cached briefly).
         
         Args:
             conversation_id: Conversation ID
@@ -142,7 +292,11 @@ class GenesysClient:
         Returns:
             Conversation data
         """
-        return self._make_request("GET", f"conversations/{conversation_id}")
+        return self._cached_get(
+            self._conversation_cache,
+            conversation_id,
+            f"conversations/{conversation_id}"
+        )
     
     def get_conversation_messages(
         self,
@@ -188,7 +342,7 @@ class GenesysClient:
             "timestamp": utcnow().isoformat()
         }
         
-        logger.info(f"Sending Agent Assist notification for conversation {conversation_id}")
+        logger.info("Sending Agent Assist notification for conversation %s", conversation_id)
         
         # This is a placeholder - actual implementation depends on Genesys setup
         return payload
@@ -214,14 +368,16 @@ class GenesysClient:
             "notes": notes
         }
         
-        return self._make_request(
+        result = self._make_request(
             "PATCH",
             f"conversations/{conversation_id}/participants/wrapup",
             data=data
         )
+        self.invalidate_conversation(conversation_id)
+        return result
     
     def get_user_info(self, user_id: str) -> Dict[str, Any]:
-        """Get user (agent) information.
+        """Get user (agent) information (cached).
         
         Args:
             user_id: User ID
@@ -229,7 +385,7 @@ class GenesysClient:
         Returns:
             User data
         """
-        return self._make_request("GET", f"users/{user_id}")
+        return self._cached_get(self._user_cache, user_id, f"users/{user_id}")
     
     def search_conversations(
         self,
@@ -247,22 +403,417 @@ class GenesysClient:
         Returns:
             List of conversations
         """
-        query = {
-            "interval": f"{start_date}/{end_date}",
-            "order": "desc",
-            "orderBy": "conversationStart"
-        }
+        response = self._make_request(
+            "POST",
+            CONVERSATION_QUERY_ENDPOINT,
+            data=_conversation_query(start_date, end_date, filters)
+        )
         
-        if filters:
-            query.update(filters)
+        return response.get("conversations", [])
+    
+    def iter_conversations(
+        self,
+        start_date: str,
+        end_date: str,
+        filters: Optional[Dict] = None,
+        concurrency: int = 4
+    ) -> Iterator[Dict[str, Any]]:
+        """Iterate over every conversation matching a search, page by page.
         
-        response = self._make_request(
+        Up to `concurrency` upcoming pages are fetched in worker threads
+        while the caller processes the current one.
+        
+        Args:
+            start_date: Start date (ISO format)
+            end_date: End date (ISO format)
+            filters: Optional search filters
+            concurrency: Pages requested ahead of the caller
+            
+        Yields:
+            Conversations, in page order
+        """
+        def fetch(page_number: int) -> Dict[str, Any]:
+            return self._make_request(
+                "POST",
+                CONVERSATION_QUERY_ENDPOINT,
+                data=_conversation_query(start_date, end_date, filters, page_number)
+            )
+        
+        first_page = fetch(1)
+        yield from first_page.get("conversations", [])
+        
+        pages = iter(range(2, _page_count(first_page) + 1))
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=concurrency,
+            thread_name_prefix="genesys-pages"
+        ) as executor:
+            window = deque(executor.submit(fetch, n) for n in islice(pages, concurrency))
+            try:
+                while window:
+                    page = window.popleft().result()
+                    next_page = next(pages, None)
+                    if next_page is not None:
+                        window.append(executor.submit(fetch, next_page))
+                    yield from page.get("conversations", [])
+            finally:
+                for future in window:
+                    future.cancel()
+
+
+class GenesysAsyncClient:
+    """Asynchronous Genesys Cloud API client.
+    
+    Calls share one aiohttp session and its keep-alive connection pool, so
+    batch operations can fan out with asyncio.gather instead of running one
+    blocking request at a time. Use as an async context manager, or call
+    close() on shutdown.
+    """
+    
+    # Connections kept open across all Genesys hosts
+    MAX_CONNECTIONS = 64
+    
+    # Agent profiles change rarely; conversation details change as the
+    # call progresses, so they are reused only briefly
+    USER_CACHE_SIZE = 4096
+    USER_CACHE_TTL_SECONDS = 300
+    CONVERSATION_CACHE_SIZE = 4096
+    CONVERSATION_CACHE_TTL_SECONDS = 30
+    
+    def __init__(
+        self,
+        client_id: str = None,
+        client_secret: str = None,
+        environment: str = None
+    ):
+        """Initialize async Genesys client.
+        
+        Args:
+            client_id: Genesys OAuth client ID
+            client_secret: Genesys OAuth client secret
+            environment: Genesys environment (e.g., mypurecloud.com)
+        """
+        self.client_id = client_id or config.genesys.client_id
+        self.client_secret = client_secret or config.genesys.client_secret
+        self.environment = environment or config.genesys.environment
+        
+        self.base_url = f"https://api.{self.environment}/api/v2"
+        self.auth_url = f"https://login.{self.environment}/oauth/token"
+        # Endpoint -> full URL, with the prefix joined once
+        self._url = (self.base_url + "/").__add__
+        # Credentials are fixed, so every token refresh posts these as-is
+        self._token_headers = _token_request_headers(self.client_id, self.client_secret)
+        
+        self.access_token: Optional[str] = None
+        # API request headers, rebuilt only when the token changes; the
+        # HTTP client merges them into each request without mutating them
+        self._api_headers: Dict[str, str] = {}
+        # time.monotonic() value after which the token must be refreshed
+        self.token_deadline = 0.0
+        
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Created on the loop that first needs a token
+        self._token_lock: Optional[asyncio.Lock] = None
+        
+        self._user_cache = TTLCache(maxsize=self.USER_CACHE_SIZE, ttl=self.USER_CACHE_TTL_SECONDS)
+        self._conversation_cache = TTLCache(
+            maxsize=self.CONVERSATION_CACHE_SIZE,
+            ttl=self.CONVERSATION_CACHE_TTL_SECONDS
+        )
+        
+        logger.info(f"Genesys async client initialized for environment: {self.environment}")
+    
+    async def __aenter__(self) -> "GenesysAsyncClient":
+        await self._get_session()
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.close()
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on the running loop."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers={"Accept": "application/json"},
+                connector=aiohttp.TCPConnector(
+                    limit=self.MAX_CONNECTIONS,
+                    keepalive_timeout=75
+                ),
+                timeout=aiohttp.ClientTimeout(total=config.request_timeout)
+            )
+        return self._session
+    
+    async def close(self):
+        """Close the shared HTTP session."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    def _token_valid(self) -> bool:
+        return self.access_token is not None and time.monotonic() < self.token_deadline
+    
+    async def _get_access_token(self) -> str:
+        """Get OAuth access token.
+        
+        Concurrent callers with an expired token wait on one refresh
+        instead of each requesting a new token.
+        
+        Returns:
+            Access token
+        """
+        if self._token_valid():
+            return self.access_token
+        
+        if self._token_lock is None:
+            self._token_lock = asyncio.Lock()
+        
+        async with self._token_lock:
+            # Another caller may have refreshed while we waited
+            if self._token_valid():
+                return self.access_token
+            
+            session = await self._get_session()
+            try:
+                async with session.post(
+                    self.auth_url,
+                    headers=self._token_headers,
+                    data=_TOKEN_REQUEST_BODY
+                ) as response:
+                    response.raise_for_status()
+                    token_data = orjson.loads(await response.read())
+            except (aiohttp.ClientError, orjson.JSONDecodeError) as e:
+                logger.error(f"Error obtaining Genesys access token: {e}", exc_info=True)
+                raise
+            
+            self._api_headers = {
+                "Authorization": f"Bearer {token_data['access_token']}",
+                "Content-Type": "application/json"
+            }
+            self.access_token = token_data["access_token"]
+            
+            # Set expiration (with 5 minute buffer); the deadline is written
+            # after the token so lock-free readers never see a stale token
+            # paired with a fresh deadline
+            expires_in = token_data.get("expires_in", 3600)
+            self.token_deadline = time.monotonic() + expires_in - 300
+            
+            logger.info("Obtained new Genesys access token")
+            
+            return self.access_token
+    
+    async def _make_request(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict] = None,
+        params: Optional[Dict] = None
+    ) -> Dict[str, Any]:
+        """Make authenticated request to Genesys API.
+        
+        Args:
+            method: HTTP method
+            endpoint: API endpoint
+            data: Request body
+            params: Query parameters
+            
+        Returns:
+            Response data
+        """
+        await self._get_access_token()
+        session = await self._get_session()
+        
+        try:
+            async with session.request(
+                method,
+                self._url(endpoint),
+                headers=self._api_headers,
+                data=orjson.dumps(data) if data is not None else None,
+                params=params
+            ) as response:
+                response.raise_for_status()
+                body = await response.read()
+                return orjson.loads(body) if body else {}
+        
+        except (aiohttp.ClientError, orjson.JSONDecodeError) as e:
+            logger.error(f"Genesys API request failed: {e}", exc_info=True)
+            raise
+    
+    async def _cached_get(self, cache: TTLCache, key: str, endpoint: str) -> Dict[str, Any]:
+        """GET an endpoint, reusing a response cached under key."""
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        
+        result = cache[key] = await self._make_request("GET", endpoint)
+        return result
+    
+    def invalidate_conversation(self, conversation_id: str):
+        """Drop cached details for a conversation that changed or ended.
+        
+        Args:
+            conversation_id: Conversation ID
+        """
+        self._conversation_cache.pop(conversation_id, None)
+    
+    async def get_conversation(self, conversation_id: str) -> Dict[str, Any]:
+        """Get conversation details (cached briefly).
+        
+        Args:
+            conversation_id: Conversation ID
+            
+        Returns:
+            Conversation data
+        """
+        return await self._cached_get(
+            self._conversation_cache,
+            conversation_id,
+            f"conversations/{conversation_id}"
+        )
+    
+    async def get_conversation_messages(
+        self,
+        conversation_id: str,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Get conversation messages.
+        
+        Args:
+            conversation_id: Conversation ID
+            limit: Maximum messages to retrieve
+            
+        Returns:
+            List of messages
+        """
+        response = await self._make_request(
+            "GET",
+            f"conversations/{conversation_id}/messages",
+            params={"pageSize": limit}
+        )
+        return response.get("entities", [])
+    
+    async def get_messages_for_conversations(
+        self,
+        conversation_ids: List[str],
+        limit: int = 100
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Fetch messages for several conversations concurrently.
+        
+        Args:
+            conversation_ids: Conversation IDs
+            limit: Maximum messages to retrieve per conversation
+            
+        Returns:
+            Conversation ID -> list of messages
+        """
+        results = await asyncio.gather(*(
+            self.get_conversation_messages(conversation_id, limit)
+            for conversation_id in conversation_ids
+        ))
+        return dict(zip(conversation_ids, results))
+    
+    async def wrap_up_conversation(
+        self,
+        conversation_id: str,
+        wrap_up_code: str,
+        notes: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Apply wrap-up code to conversation.
+        
+        Args:
+            conversation_id: Conversation ID
+            wrap_up_code: Wrap-up code
+            notes: Optional notes
+            
+        Returns:
+            Response data
+        """
+        result = await self._make_request(
+            "PATCH",
+            f"conversations/{conversation_id}/participants/wrapup",
+            data={"code": wrap_up_code, "notes": notes}
+        )
+        self.invalidate_conversation(conversation_id)
+        return result
+    
+    async def get_user_info(self, user_id: str) -> Dict[str, Any]:
+        """Get user (agent) information (cached).
+        
+        Args:
+            user_id: User ID
+            
+        Returns:
+            User data
+        """
+        return await self._cached_get(self._user_cache, user_id, f"users/{user_id}")
+    
+    async def search_conversations(
+        self,
+        start_date: str,
+        end_date: str,
+        filters: Optional[Dict] = None
+    ) -> List[Dict[str, Any]]:
+        """Search conversations.
+        
+        Args:
+            start_date: Start date (ISO format)
+            end_date: End date (ISO format)
+            filters: Optional search filters
+            
+        Returns:
+            List of conversations
+        """
+        response = await self._make_request(
             "POST",
-            "analytics/conversations/details/query",
-            data=query
+            CONVERSATION_QUERY_ENDPOINT,
+            data=_conversation_query(start_date, end_date, filters)
         )
         
         return response.get("conversations", [])
+    
+    async def iter_conversations(
+        self,
+        start_date: str,
+        end_date: str,
+        filters: Optional[Dict] = None,
+        concurrency: int = 4
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Iterate over every conversation matching a search, page by page.
+        
+        Up to `concurrency` upcoming pages are in flight while the caller
+        processes the current one, overlapping round trips with work.
+        
+        Args:
+            start_date: Start date (ISO format)
+            end_date: End date (ISO format)
+            filters: Optional search filters
+            concurrency: Pages requested ahead of the caller
+            
+        Yields:
+            Conversations, in page order
+        """
+        def fetch(page_number: int) -> "asyncio.Future":
+            return asyncio.ensure_future(self._make_request(
+                "POST",
+                CONVERSATION_QUERY_ENDPOINT,
+                data=_conversation_query(start_date, end_date, filters, page_number)
+            ))
+        
+        first_page = await fetch(1)
+        for conversation in first_page.get("conversations", []):
+            yield conversation
+        
+        pages = iter(range(2, _page_count(first_page) + 1))
+        window = deque(fetch(n) for n in islice(pages, concurrency))
+        try:
+            while window:
+                page = await window.popleft()
+                next_page = next(pages, None)
+                if next_page is not None:
+                    window.append(fetch(next_page))
+                for conversation in page.get("conversations", []):
+                    yield conversation
+        finally:
+            for task in window:
+                task.cancel()
 
 
 # Singleton instance
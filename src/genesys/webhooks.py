@@ -1,16 +1,70 @@
 """Genesys webhook handlers."""
 
-from typing import Dict, Any
-from flask import Request
+from typing import BinaryIO, Dict, Any, Iterable, List, Optional, Set, Tuple
+import asyncio
 import hashlib
 import hmac
 
+import msgspec
+
 from config.config import config
 from src.utils.logging import get_logger
+from src.utils.batching import BackgroundBatcher
+from src.utils.event_loop import background_loop
 from src.agent_assist.service import agent_assist_service
+from .client import genesys_client
 
 logger = get_logger(__name__)
 
+# Role marking a queued conversation close rather than a message
+_CLOSE = None
+
+
+class PayloadTooLargeError(ValueError):
+    """Raised when a webhook body exceeds the handler's size limit."""
+
+
+class WebhookEnvelope(msgspec.Struct):
+    """Fields naming the event type; the rest of the body is skipped."""
+    topicName: Optional[str] = None
+    eventType: Optional[str] = None
+
+
+class ConversationEventPayload(msgspec.Struct):
+    """Conversation start/end event."""
+    id: Optional[str] = None
+
+
+class MessageBody(msgspec.Struct):
+    """Message carried by a message received event."""
+    id: Optional[str] = None
+    type: str = "unknown"  # "agent" or "customer"
+    text: str = ""
+    timestamp: Optional[str] = None
+
+
+class MessageReceivedPayload(msgspec.Struct):
+    """Message received event."""
+    conversationId: Optional[str] = None
+    message: Optional[MessageBody] = None
+
+
+class Participant(msgspec.Struct):
+    """Conversation participant."""
+    id: Optional[str] = None
+    userId: Optional[str] = None
+    name: str = "Agent"
+    purpose: Optional[str] = None
+
+
+class AgentJoinedPayload(msgspec.Struct):
+    """Agent joined event."""
+    conversationId: Optional[str] = None
+    participant: Participant = msgspec.field(default_factory=Participant)
+
+
+_envelope_decoder = msgspec.json.Decoder(WebhookEnvelope)
+
 
 class GenesysWebhookHandler:
     """Handler for Genesys Cloud webhooks."""
@@ -21,6 +75,17 @@ class GenesysWebhookHandler:
     EVENT_AGENT_JOINED = "v2.conversations.participants.agent.joined"
     EVENT_CONVERSATION_END = "v2.conversations.end"
     
+    # Messages are handed to Agent Assist in batches of up to this many,
+    # waiting at most this many seconds for a batch to fill
+    MESSAGE_BATCH_SIZE = 64
+    MESSAGE_BATCH_DELAY = 0.005
+    
+    # Request bodies are read and hashed in chunks of this many bytes
+    BODY_CHUNK_SIZE = 65536
+    
+    # Reading stops and the request is rejected once a body exceeds this
+    MAX_BODY_SIZE = 1048576
+    
     def __init__(self, webhook_secret: str = None):
         """Initialize webhook handler.
         
@@ -28,13 +93,32 @@ class GenesysWebhookHandler:
             webhook_secret: Webhook validation secret
         """
         self.webhook_secret = webhook_secret or config.genesys.webhook_secret
+        # Keyed HMAC state is computed once; each request copies it instead
+        # of re-deriving the inner/outer pads from the secret
+        self._hmac_template = (
+            hmac.new(self.webhook_secret.encode(), digestmod=hashlib.sha256)
+            if self.webhook_secret else None
+        )
+        # Messages and conversation closes share one queue so they are
+        # applied in the order the webhooks arrived
+        self._message_batcher = BackgroundBatcher(
+            self._flush_events,
+            max_batch_size=self.MESSAGE_BATCH_SIZE,
+            max_delay=self.MESSAGE_BATCH_DELAY,
+            name="genesys-message-batcher"
+        )
+        # Conversations awaiting Agent Assist, drained by a worker task on
+        # the background loop; both are only touched from that loop
+        self._assist_queue: Optional[asyncio.Queue] = None
+        self._assist_pending: Set[str] = set()
         logger.info("Genesys webhook handler initialized")
     
-    def validate_signature(self, request: Request) -> bool:
+    def validate_signature(self, body: bytes, signature: Optional[str]) -> bool:
         """Validate webhook signature.
         
         Args:
-            request: Flask request object
+            body: Raw request body
+            signature: Value of the X-Genesys-Signature header
             
         Returns:
             True if signature is valid
@@ -43,27 +127,102 @@ class GenesysWebhookHandler:
             logger.warning("Webhook secret not configured, skipping validation")
             return True
         
+        mac = self._hmac_template.copy()
+        mac.update(body)
+        return self._check_digest(mac, signature)
+    
+    def read_signed_body(
+        self,
+        stream: BinaryIO,
+        signature: Optional[str]
+    ) -> Tuple[bytearray, bool]:
+        """Read a request body and validate its signature in one pass.
+        
+        Each chunk is fed to the HMAC as it is read from the socket, so the
+        body is not walked a second time after it has been buffered.
+        
+        Args:
+            stream: Request body stream (e.g. Flask's request.stream)
+            signature: Value of the X-Genesys-Signature header
+            
+        Returns:
+            Tuple of (body, True if signature is valid)
+            
+        Raises:
+            PayloadTooLargeError: If the body exceeds MAX_BODY_SIZE
+        """
+        mac = self._hmac_template.copy() if self.webhook_secret else None
+        body = bytearray()
+        read = stream.read
+        chunk_size = self.BODY_CHUNK_SIZE
+        max_size = self.MAX_BODY_SIZE
+        
+        while True:
+            chunk = read(chunk_size)
+            if not chunk:
+                break
+            body += chunk
+            if len(body) > max_size:
+                raise PayloadTooLargeError(
+                    f"Webhook body exceeds {max_size} bytes"
+                )
+            if mac is not None:
+                mac.update(chunk)
+        
+        if mac is None:
+            logger.warning("Webhook secret not configured, skipping validation")
+            return body, True
+        
+        return body, self._check_digest(mac, signature)
+    
+    @staticmethod
+    def _check_digest(mac: "hmac.HMAC", signature: Optional[str]) -> bool:
+        """Compare a hex signature header against a finished HMAC."""
         try:
-            signature = request.headers.get("X-Genesys-Signature")
             if not signature:
                 return False
             
-            # Calculate expected signature
-            body = request.get_data()
-            expected = hmac.new(
-                self.webhook_secret.encode(),
-                body,
-                hashlib.sha256
-            ).hexdigest()
-            
-            return hmac.compare_digest(signature, expected)
+            # Compare raw digests rather than hex-encoding ours
+            return hmac.compare_digest(bytes.fromhex(signature), mac.digest())
         
+        except ValueError:
+            # Not a hex string
+            return False
         except Exception as e:
             logger.error(f"Error validating webhook signature: {e}", exc_info=True)
             return False
     
+    def handle_raw_webhook(self, body: bytes) -> Tuple[Optional[str], Dict[str, Any]]:
+        """Decode a raw webhook body and route it to the appropriate handler.
+        
+        The body is decoded straight into the event's payload struct, with
+        no intermediate dict.
+        
+        Args:
+            body: Raw request body
+            
+        Returns:
+            Tuple of (event type, handler response)
+            
+        Raises:
+            msgspec.DecodeError: If the body is not valid JSON or does not
+                match the event's payload schema
+        """
+        envelope = _envelope_decoder.decode(body)
+        event_type = envelope.topicName or envelope.eventType
+        
+        entry = self._HANDLERS.get(event_type)
+        
+        if entry:
+            logger.info("Handling webhook event: %s", event_type)
+            handler, decoder = entry
+            return event_type, handler(self, decoder.decode(body))
+        else:
+            logger.warning(f"Unknown event type: {event_type}")
+            return event_type, {"status": "ignored", "event_type": event_type}
+    
     def handle_webhook(self, event_type: str, payload: Dict[str, Any]) -> Dict[str, Any]:
-        """Route webhook event to appropriate handler.
+        """Route an already-decoded webhook event to the appropriate handler.
         
         Args:
             event_type: Genesys event type
@@ -71,24 +230,22 @@ class GenesysWebhookHandler:
             
         Returns:
             Handler response
+            
+        Raises:
+            msgspec.ValidationError: If the payload does not match the
+                event's payload schema
         """
-        handlers = {
-            self.EVENT_CONVERSATION_START: self._handle_conversation_start,
-            self.EVENT_MESSAGE_RECEIVED: self._handle_message_received,
-            self.EVENT_AGENT_JOINED: self._handle_agent_joined,
-            self.EVENT_CONVERSATION_END: self._handle_conversation_end,
-        }
+        entry = self._HANDLERS.get(event_type)
         
-        handler = handlers.get(event_type)
-        
-        if handler:
-            logger.info(f"Handling webhook event: {event_type}")
-            return handler(payload)
+        if entry:
+            logger.info("Handling webhook event: %s", event_type)
+            handler, decoder = entry
+            return handler(self, msgspec.convert(payload, decoder.type))
         else:
             logger.warning(f"Unknown event type: {event_type}")
             return {"status": "ignored", "event_type": event_type}
     
-    def _handle_conversation_start(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+    def _handle_conversation_start(self, payload: ConversationEventPayload) -> Dict[str, Any]:
         """Handle conversation start event.
         
         Args:
@@ -97,7 +254,7 @@ class GenesysWebhookHandler:
         Returns:
             Response
         """
-        conversation_id = payload.get("id")
+        conversation_id = payload.id
         
         if conversation_id:
             # Register conversation with Agent Assist
@@ -113,7 +270,7 @@ class GenesysWebhookHandler:
         
         return {"status": "error", "message": "No conversation ID"}
     
-    def _handle_message_received(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+    def _handle_message_received(self, payload: MessageReceivedPayload) -> Dict[str, Any]:
         """Handle message received event.
         
         Args:
@@ -122,35 +279,24 @@ class GenesysWebhookHandler:
         Returns:
             Response
         """
-        conversation_id = payload.get("conversationId")
-        message = payload.get("message", {})
+        conversation_id = payload.conversationId
+        message = payload.message
         
-        if not conversation_id or not message:
+        if not conversation_id or message is None:
             return {"status": "error", "message": "Invalid payload"}
         
-        # Extract message details
-        sender_type = message.get("type", "unknown")  # "agent" or "customer"
-        text = message.get("text", "")
-        timestamp = message.get("timestamp")
-        
         # Map to our role system
-        role = "agent" if sender_type == "agent" else "patient"
+        role = "agent" if message.type == "agent" else "patient"
         
-        # Add message to conversation
-        agent_assist_service.add_message(
-            conversation_id,
-            role,
-            text,
-            timestamp
-        )
+        # Add message to conversation on the next batch flush
+        self._enqueue(conversation_id, role, message.text, message.timestamp)
         
-        logger.info(f"Message added to conversation {conversation_id}")
+        logger.info("Message queued for conversation %s", conversation_id)
         
-        # Trigger Agent Assist if it's a patient message
+        # Agent Assist for patient messages runs on the background loop once
+        # the batch holding this message is flushed
         if role == "patient":
-            # In production, this would trigger async processing
-            # to generate real-time assistance
-            logger.info(f"Triggering Agent Assist for conversation {conversation_id}")
+            logger.info("Agent Assist scheduled for conversation %s", conversation_id)
         
         return {
             "status": "processed",
@@ -158,7 +304,7 @@ class GenesysWebhookHandler:
             "message_role": role
         }
     
-    def _handle_agent_joined(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+    def _handle_agent_joined(self, payload: AgentJoinedPayload) -> Dict[str, Any]:
         """Handle agent joined event (handoff from bot).
         
         Args:
@@ -167,18 +313,17 @@ class GenesysWebhookHandler:
         Returns:
             Response
         """
-        conversation_id = payload.get("conversationId")
-        participant = payload.get("participant", {})
+        conversation_id = payload.conversationId
         
-        agent_id = participant.get("userId")
-        agent_name = participant.get("name", "Agent")
+        agent_id = payload.participant.userId
+        agent_name = payload.participant.name
         
         logger.info(
             f"Agent {agent_name} ({agent_id}) joined conversation {conversation_id}"
         )
         
         # Add system message
-        agent_assist_service.add_message(
+        self._enqueue(
             conversation_id,
             "system",
             f"Agent {agent_name} joined the conversation"
@@ -191,7 +336,7 @@ class GenesysWebhookHandler:
             "action": "agent_joined"
         }
     
-    def _handle_conversation_end(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+    def _handle_conversation_end(self, payload: ConversationEventPayload) -> Dict[str, Any]:
         """Handle conversation end event.
         
         Args:
@@ -200,11 +345,12 @@ class GenesysWebhookHandler:
         Returns:
             Response
         """
-        conversation_id = payload.get("id")
+        conversation_id = payload.id
         
         if conversation_id:
-            # Close conversation in Agent Assist
-            agent_assist_service.close_conversation(conversation_id)
+            # Close conversation in Agent Assist after its queued messages
+            self._enqueue(conversation_id, _CLOSE)
+            genesys_client.invalidate_conversation(conversation_id)
             
             logger.info(f"Conversation ended: {conversation_id}")
             
@@ -215,6 +361,107 @@ class GenesysWebhookHandler:
             }
         
         return {"status": "error", "message": "No conversation ID"}
+    
+    def _enqueue(
+        self,
+        conversation_id: str,
+        role: Optional[str],
+        text: Optional[str] = None,
+        timestamp: Optional[str] = None
+    ):
+        """Queue a message (or a close, when role is _CLOSE) for Agent Assist."""
+        event = (conversation_id, role, text, timestamp)
+        if not self._message_batcher.put(event):
+            # Queue full: apply inline rather than lose the event
+            self._flush_events([event])
+    
+    def _flush_events(self, events: List[Tuple[str, Optional[str], Optional[str], Optional[str]]]):
+        """Apply queued events to Agent Assist in arrival order.
+        
+        Args:
+            events: (conversation_id, role, text, timestamp) tuples
+        """
+        messages = []
+        needs_assist = {}
+        for event in events:
+            if event[1] is _CLOSE:
+                if messages:
+                    agent_assist_service.add_messages(messages)
+                    messages = []
+                agent_assist_service.close_conversation(event[0])
+                needs_assist.pop(event[0], None)
+            else:
+                messages.append(event)
+                if event[1] == "patient":
+                    needs_assist[event[0]] = None
+        if messages:
+            agent_assist_service.add_messages(messages)
+        
+        if needs_assist and config.agent_assist_enabled:
+            background_loop.loop.call_soon_threadsafe(self._queue_assist, list(needs_assist))
+    
+    def _queue_assist(self, conversation_ids: Iterable[str]):
+        """Queue conversations for Agent Assist (runs on the background loop).
+        
+        A conversation already waiting is not queued twice; its pending run
+        will see the new messages.
+        """
+        if self._assist_queue is None:
+            self._assist_queue = asyncio.Queue()
+            asyncio.ensure_future(self._assist_worker())
+        for conversation_id in conversation_ids:
+            if conversation_id not in self._assist_pending:
+                self._assist_pending.add(conversation_id)
+                self._assist_queue.put_nowait(conversation_id)
+    
+    async def _assist_worker(self):
+        """Generate and push Agent Assist for queued conversations.
+        
+        Everything queued when the worker wakes is processed concurrently.
+        """
+        while True:
+            batch = [await self._assist_queue.get()]
+            while not self._assist_queue.empty():
+                batch.append(self._assist_queue.get_nowait())
+            self._assist_pending.difference_update(batch)
+            await asyncio.gather(*(self._push_assist(cid) for cid in batch))
+    
+    async def _push_assist(self, conversation_id: str):
+        """Generate Agent Assist for a conversation and notify the agent."""
+        if not await agent_assist_service.has_conversation_async(conversation_id):
+            return
+        try:
+            assist = await agent_assist_service.generate_real_time_assist(conversation_id)
+            genesys_client.send_agent_assist_notification(conversation_id, assist.to_dict())
+        except Exception as e:
+            logger.error(
+                f"Error generating Agent Assist for conversation {conversation_id}: {e}",
+                exc_info=True
+            )
+    
+    def close(self):
+        """Apply queued events and stop the batching thread."""
+        self._message_batcher.close()
+    
+    # Event type -> (handler function, payload decoder), built once with the class
+    _HANDLERS = {
+        EVENT_CONVERSATION_START: (
+            _handle_conversation_start,
+            msgspec.json.Decoder(ConversationEventPayload)
+        ),
+        EVENT_MESSAGE_RECEIVED: (
+            _handle_message_received,
+            msgspec.json.Decoder(MessageReceivedPayload)
+        ),
+        EVENT_AGENT_JOINED: (
+            _handle_agent_joined,
+            msgspec.json.Decoder(AgentJoinedPayload)
+        ),
+        EVENT_CONVERSATION_END: (
+            _handle_conversation_end,
+            msgspec.json.Decoder(ConversationEventPayload)
+        ),
+    }
 
 
 # Event schemas for documentation
@@ -1,5 +1,16 @@
 """LLM services package."""
 
-from .gemini_service import GeminiService, gemini_service
+from .gemini_service import GeminiService, get_gemini_service
 
-__all__ = ['GeminiService', 'gemini_service']
+__all__ = ['GeminiService', 'get_gemini_service', 'gemini_service']
+
+# Importing the submodule bound its name here; drop that so the name
+# resolves to the lazily created singleton below, as it did when eager
+del gemini_service
+
+
+def __getattr__(name):
+    # The singleton is created on first access, not at package import
+    if name == "gemini_service":
+        return get_gemini_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
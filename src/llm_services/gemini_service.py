@@ -1,16 +1,134 @@
 """Google Gemini LLM service for conversation AI capabilities."""
 
+import asyncio
+import hashlib
+import threading
 import google.generativeai as genai
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, Iterator, List, Any, Optional, Tuple
 import json
+import math
+import random
+import string
+import time
+import msgspec
+import redis
+from cachetools import LRUCache
+from google.api_core.exceptions import ResourceExhausted
+
+# Inline batch prediction is only exposed by the google-genai SDK
+# (the "batch" extra)
+try:
+    from google import genai as google_genai
+except ImportError:
+    google_genai = None
 
 from config.config import config
+from src.utils.event_loop import background_loop
 from src.utils.logging import get_logger
 from src.utils.phi_redaction import phi_redactor
 
 logger = get_logger(__name__)
 
 
+class SummaryCheckpoint(msgspec.Struct, array_like=True):
+    """Latest summary of a conversation, as cached and persisted to Redis.
+    
+    The anchor holds a digest of each of the last few messages the summary
+    covers, oldest first.
+    """
+    anchor: List[bytes]
+    summary: str
+    prompt: str
+
+
+_checkpoint_encoder = msgspec.msgpack.Encoder()
+_checkpoint_decoder = msgspec.msgpack.Decoder(SummaryCheckpoint)
+
+
+def _template_formatter(template: str) -> Callable[..., str]:
+    """Pre-split a str.format template into its literal and field parts.
+    
+    The returned function fills the named fields by keyword with a single
+    join instead of str.format re-parsing the template on every call.
+    Only plain named fields ({name}) are supported.
+    
+    Args:
+        template: Template in str.format syntax ({{ and }} for braces)
+        
+    Returns:
+        Function taking the field values as keyword arguments
+    """
+    parts: List[str] = []
+    fields: List[Tuple[int, str]] = []
+    for literal, field, spec, conversion in string.Formatter().parse(template):
+        parts.append(literal)
+        if field is not None:
+            if spec or conversion or not field.isidentifier():
+                raise ValueError(f"Unsupported template field: {field!r}")
+            fields.append((len(parts), field))
+            parts.append("")
+    
+    def fill(**values: Any) -> str:
+        filled = parts.copy()
+        for index, name in fields:
+            value = values[name]
+            filled[index] = value if type(value) is str else format(value)
+        return "".join(filled)
+    
+    return fill
+
+
+class _RedactedText(str):
+    """Message text already PHI-redacted by GeminiService.
+    
+    Only this module creates instances; JSON request bodies and stored
+    messages decode to plain str, so a caller cannot mark raw text as
+    redacted and skip redaction.
+    """
+    __slots__ = ()
+
+
+class _StringArrayScanner:
+    """Pulls string elements out of a JSON array as its text streams in.
+    
+    Only strings directly inside the top-level array are returned; text
+    before the array (e.g. a code fence) and nested values are skipped.
+    """
+    
+    def __init__(self):
+        self.started = False
+        self._stack: List[str] = []
+        self._string: Optional[List[str]] = None
+        self._escaped = False
+    
+    def feed(self, text: str) -> List[str]:
+        """Consume a chunk and return the array strings it completed."""
+        completed = []
+        for ch in text:
+            if self._string is not None:
+                self._string.append(ch)
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    if self._stack == ["["]:
+                        completed.append(json.loads("".join(self._string)))
+                    self._string = None
+            elif ch == '"':
+                if self._stack:
+                    self._string = [ch]
+            elif ch == "[" or ch == "{":
+                if not self._stack:
+                    if self.started or ch == "{":
+                        continue
+                    self.started = True
+                self._stack.append(ch)
+            elif (ch == "]" or ch == "}") and self._stack:
+                self._stack.pop()
+        return completed
+
+
 class GeminiService:
     """Service for Google Gemini LLM interactions."""
     
@@ -27,6 +145,23 @@ Conversation:
 {conversation}
 
 Provide a summary in 3-5 bullet points.
+"""
+    
+    INCREMENTAL_SUMMARIZATION_PROMPT = """
+You are a medical assistant keeping a running summary of a patient conversation.
+Update the current summary with the new messages so that it still captures:
+- Main reason for contact
+- Key information provided by patient
+- Actions taken or promised
+- Any follow-up needed
+
+Current summary:
+{summary}
+
+New messages:
+{conversation}
+
+Provide the updated summary in 3-5 bullet points.
 """
     
     SMART_REPLY_PROMPT = """
@@ -64,14 +199,104 @@ Provide your response in JSON format:
 }}
 """
     
-    def __init__(self, api_key: Optional[str] = None, model_name: str = None):
+    KNOWLEDGE_PROMPT = """
+Based on the following query from a healthcare contact center agent,
+provide a brief, actionable knowledge snippet (2-3 sentences) that would help them respond.
+
+Query: {query}
+
+Provide practical, compliant information.
+"""
+    
+    # Templates pre-split for formatting on each call
+    _fill_summary = staticmethod(_template_formatter(SUMMARIZATION_PROMPT))
+    _fill_incremental_summary = staticmethod(
+        _template_formatter(INCREMENTAL_SUMMARIZATION_PROMPT)
+    )
+    _fill_smart_reply = staticmethod(_template_formatter(SMART_REPLY_PROMPT))
+    _fill_intent_clarification = staticmethod(
+        _template_formatter(INTENT_CLARIFICATION_PROMPT)
+    )
+    _fill_knowledge = staticmethod(_template_formatter(KNOWLEDGE_PROMPT))
+    
+    # Messages of context included in smart reply prompts
+    SMART_REPLY_CONTEXT_MESSAGES = 5
+    
+    # "ROLE: " line prefixes for the roles conversations actually use
+    _ROLE_PREFIXES = {
+        role: f"{role.upper()}: " for role in ("patient", "agent", "system", "user")
+    }
+    
+    # Calls rejected with 429 are retried this many times, backing off
+    # exponentially from RETRY_BASE_DELAY seconds with random jitter
+    MAX_RETRIES = 4
+    RETRY_BASE_DELAY = 0.1
+    
+    # Async methods build prompts for transcripts longer than this many
+    # characters in a worker thread, keeping redaction off the event loop
+    REDACT_OFFLOAD_CHARS = 4096
+    
+    # Used when the model does not report token log-probabilities
+    DEFAULT_SUMMARY_CONFIDENCE = 0.90
+    DEFAULT_KNOWLEDGE_CONFIDENCE = 0.85
+    
+    # Batch jobs are polled and can take minutes to start, so smaller
+    # offline batches are sent as concurrent online requests instead
+    BATCH_MIN_CONVERSATIONS = 5
+    # Responses are reused for identical prompts (repeated assists on an
+    # unchanged conversation, client retries), keyed by prompt digest
+    RESPONSE_CACHE_SIZE = 1024
+    
+    # Last summary per conversation, so the next one only sends new turns
+    SUMMARY_CHECKPOINT_CACHE_SIZE = 4096
+    # Checkpoints shared between workers through Redis live under this prefix
+    SUMMARY_REDIS_PREFIX = "summary:"
+    # A checkpoint is anchored on this many trailing messages, so a repeated
+    # short turn ("yes", "ok") is not mistaken for the last summarized one
+    SUMMARY_ANCHOR_MESSAGES = 3
+    
+    BATCH_TERMINAL_STATES = frozenset({
+        "JOB_STATE_SUCCEEDED",
+        "JOB_STATE_FAILED",
+        "JOB_STATE_CANCELLED",
+        "JOB_STATE_EXPIRED",
+    })
+    
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model_name: str = None,
+        max_concurrency: Optional[int] = None,
+        redis_client: Optional[Any] = None
+    ):
         """Initialize Gemini service.
         
         Args:
             api_key: Google API key (if not using default credentials)
             model_name: Model name to use
+            max_concurrency: Maximum in-flight model calls, counted
+                separately for sync callers and for async callers
+            redis_client: Redis client sharing summary checkpoints between
+                workers. Defaults to one on config.redis_url when the Redis
+                conversation store is selected.
         """
         self.model_name = model_name or config.gcp.gemini_model
+        self.max_concurrency = max_concurrency or config.gcp.gemini_max_concurrency
+        # Sync callers (request threads) share one bound; async calls all run
+        # on the background loop and share one asyncio.Semaphore created there
+        self._sync_limit = threading.BoundedSemaphore(self.max_concurrency)
+        self._async_limit: Optional[asyncio.Semaphore] = None
+        self._api_key = api_key
+        # Batch prediction client, created on first batch job
+        self._batch_client = None
+        
+        self._response_cache = LRUCache(maxsize=self.RESPONSE_CACHE_SIZE)
+        # conversation_id -> SummaryCheckpoint
+        self._summary_checkpoints = LRUCache(maxsize=self.SUMMARY_CHECKPOINT_CACHE_SIZE)
+        self._cache_lock = threading.Lock()
+        if redis_client is None and config.conversation_store == "redis" and config.redis_url:
+            redis_client = redis.Redis.from_url(config.redis_url)
+        self._summary_redis = redis_client
         
         # Configure API
         if api_key:
@@ -102,75 +327,451 @@ Provide your response in JSON format:
         
         logger.info(f"Gemini service initialized with model: {self.model_name}")
     
+    @staticmethod
+    def _response_confidence(response: Any, default: float) -> float:
+        """Derive a 0-1 confidence from the model's average token log-probability.
+        
+        Args:
+            response: Gemini response
+            default: Value to use when log-probabilities are not reported
+            
+        Returns:
+            exp(avg_logprobs) of the first candidate, or default
+        """
+        try:
+            avg_logprobs = response.candidates[0].avg_logprobs
+        except (AttributeError, IndexError):
+            return default
+        # avg_logprobs is a proto3 scalar without presence: it reads 0.0
+        # when the API does not report it, so 0.0 means "not measured"
+        return math.exp(avg_logprobs) if avg_logprobs else default
+    
     def _redact_phi_from_conversation(self, messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
         """Redact PHI from conversation messages before sending to LLM.
         
+        Returned message texts are _RedactedText, and such messages are
+        passed through as-is, so a conversation redacted once can be handed
+        to several LLM calls without being scanned again.
+        
         Args:
             messages: List of conversation messages
             
         Returns:
             Messages with PHI redacted
         """
-        redacted_messages = []
-        for msg in messages:
-            redacted_text, _ = phi_redactor.redact(msg.get("text", ""))
-            redacted_messages.append({
-                "role": msg.get("role", "user"),
-                "text": redacted_text
-            })
+        pending = [
+            i for i, msg in enumerate(messages)
+            if not isinstance(msg.get("text"), _RedactedText)
+        ]
+        redacted_messages = list(messages)
+        if not pending:
+            return redacted_messages
+        
+        # One redaction pass over all messages not yet redacted
+        redacted_texts = phi_redactor.redact_many([messages[i].get("text") for i in pending])
+        
+        for i, redacted_text in zip(pending, redacted_texts):
+            redacted_messages[i] = {
+                "role": messages[i].get("role", "user"),
+                "text": _RedactedText(redacted_text)
+            }
         return redacted_messages
     
+    async def aredact_conversation(self, messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Redact a conversation once for use by several LLM calls.
+        
+        Long transcripts are redacted in a worker thread.
+        
+        Args:
+            messages: List of conversation messages
+            
+        Returns:
+            Messages with PHI redacted, marked so later calls skip them
+        """
+        return await self._build_off_loop(
+            self._text_size(messages),
+            self._redact_phi_from_conversation, messages
+        )
+    
+    @staticmethod
+    def _text_size(messages: List[Dict[str, str]]) -> int:
+        """Total characters of message text."""
+        return sum(len(msg.get("text") or "") for msg in messages)
+    
+    async def _build_off_loop(self, text_size: int, build: Callable, *args) -> Any:
+        """Run a prompt builder, in a worker thread if its text is large.
+        
+        Redaction is CPU-bound regex work; on long transcripts it would
+        otherwise stall every other coroutine on the loop.
+        """
+        if text_size > self.REDACT_OFFLOAD_CHARS:
+            return await asyncio.to_thread(build, *args)
+        return build(*args)
+    
+    def _generate(self, prompt: str) -> Any:
+        """Call the model, blocking until the response arrives."""
+        key = self._prompt_key(prompt)
+        response = self._cached_response(key)
+        if response is None:
+            with self._sync_limit:
+                for attempt in range(self.MAX_RETRIES + 1):
+                    try:
+                        response = self.model.generate_content(
+                            prompt,
+                            safety_settings=self.safety_settings
+                        )
+                        break
+                    except ResourceExhausted:
+                        if attempt == self.MAX_RETRIES:
+                            raise
+                        time.sleep(self._retry_delay(attempt))
+            self._cache_response(key, response)
+        return response
+    
+    async def _agenerate(self, prompt: str) -> Any:
+        """Call the model without blocking the running event loop."""
+        if asyncio.get_running_loop() is not background_loop.loop:
+            # Hop to the background loop so one semaphore bounds every caller
+            return await asyncio.wrap_future(
+                background_loop.submit(self._agenerate(prompt))
+            )
+        key = self._prompt_key(prompt)
+        response = self._cached_response(key)
+        if response is None:
+            async with self._get_async_limit():
+                for attempt in range(self.MAX_RETRIES + 1):
+                    try:
+                        response = await self.model.generate_content_async(
+                            prompt,
+                            safety_settings=self.safety_settings
+                        )
+                        break
+                    except ResourceExhausted:
+                        if attempt == self.MAX_RETRIES:
+                            raise
+                        await asyncio.sleep(self._retry_delay(attempt))
+            self._cache_response(key, response)
+        return response
+    
+    def _get_async_limit(self) -> asyncio.Semaphore:
+        """Concurrency bound for async calls, created on the background loop."""
+        if self._async_limit is None:
+            self._async_limit = asyncio.Semaphore(self.max_concurrency)
+        return self._async_limit
+    
+    def _retry_delay(self, attempt: int) -> float:
+        """Backoff before retrying a rate-limited call."""
+        return self.RETRY_BASE_DELAY * 2 ** attempt + random.random() * 0.05
+    
+    @staticmethod
+    def _prompt_key(prompt: str) -> bytes:
+        """Fixed-size cache key for a (redacted) prompt."""
+        return hashlib.blake2b(prompt.encode(), digest_size=16).digest()
+    
+    def _cached_response(self, key: bytes) -> Optional[Any]:
+        with self._cache_lock:
+            return self._response_cache.get(key)
+    
+    def _cache_response(self, key: bytes, response: Any):
+        with self._cache_lock:
+            self._response_cache[key] = response
+    
+    @staticmethod
+    def _message_digest(message: Dict[str, str]) -> bytes:
+        """Digest of a message's role and text, to find it again later."""
+        return hashlib.blake2b(
+            f"{message['role']}\x1f{message['text']}".encode(), digest_size=8
+        ).digest()
+    
+    @classmethod
+    def _format_messages(cls, messages: List[Dict[str, str]]) -> str:
+        """Render messages as "ROLE: text" lines for a prompt."""
+        prefixes = cls._ROLE_PREFIXES
+        return "\n".join([
+            (prefixes.get(msg['role']) or f"{msg['role'].upper()}: ") + msg['text']
+            for msg in messages
+        ])
+    
     def summarize_conversation(
         self,
         messages: List[Dict[str, str]],
-        redact_phi: bool = True
+        redact_phi: bool = True,
+        conversation_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """Generate conversation summary.
         
+        With a conversation_id, the summary is remembered and the next call
+        for the same conversation sends only the messages added since,
+        together with the previous summary, instead of the whole history.
+        
         Args:
             messages: List of conversation messages with 'role' and 'text'
             redact_phi: Whether to redact PHI before sending to LLM
+            conversation_id: Conversation to summarize incrementally
             
         Returns:
-            Dict with summary and metadata
+            Dict with summary, confidence and metadata
         """
         try:
-            # Redact PHI if enabled
-            if redact_phi:
-                messages = self._redact_phi_from_conversation(messages)
-            
-            # Format conversation
-            conversation_text = "\n".join([
-                f"{msg['role'].upper()}: {msg['text']}"
-                for msg in messages
-            ])
-            
-            # Generate prompt
-            prompt = self.SUMMARIZATION_PROMPT.format(conversation=conversation_text)
-            
-            # Generate summary
-            response = self.model.generate_content(
-                prompt,
-                safety_settings=self.safety_settings
+            prompt, message_count = self._summary_prompt(messages, redact_phi, conversation_id)
+            response = self._generate(prompt)
+            result = self._summary_result(response, message_count)
+            self._save_summary_checkpoint(
+                conversation_id, messages, redact_phi, result["summary"], prompt
             )
-            
-            summary = response.text.strip()
-            
-            logger.info("Conversation summarized", {
-                "message_count": len(messages),
-                "summary_length": len(summary)
-            })
-            
-            return {
-                "summary": summary,
-                "message_count": len(messages),
-                "model": self.model_name,
-            }
+            return result
         
         except Exception as e:
             logger.error(f"Error summarizing conversation: {e}", exc_info=True)
             raise
     
+    async def asummarize_conversation(
+        self,
+        messages: List[Dict[str, str]],
+        redact_phi: bool = True,
+        conversation_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Async version of summarize_conversation."""
+        # Checkpoints shared through Redis are loaded and saved with blocking
+        # calls, which must not run on the event loop
+        redis_checkpoint = conversation_id is not None and self._summary_redis is not None
+        try:
+            if redis_checkpoint:
+                prompt, message_count = await asyncio.to_thread(
+                    self._summary_prompt, messages, redact_phi, conversation_id
+                )
+            else:
+                prompt, message_count = await self._build_off_loop(
+                    self._text_size(messages) if redact_phi else 0,
+                    self._summary_prompt, messages, redact_phi, conversation_id
+                )
+            response = await self._agenerate(prompt)
+            result = self._summary_result(response, message_count)
+            checkpoint_args = (
+                conversation_id, messages, redact_phi, result["summary"], prompt
+            )
+            if redis_checkpoint:
+                await asyncio.to_thread(self._save_summary_checkpoint, *checkpoint_args)
+            else:
+                self._save_summary_checkpoint(*checkpoint_args)
+            return result
+        
+        except Exception as e:
+            logger.error(f"Error summarizing conversation: {e}", exc_info=True)
+            raise
+    
+    def _summary_prompt(
+        self,
+        messages: List[Dict[str, str]],
+        redact_phi: bool,
+        conversation_id: Optional[str] = None
+    ) -> Tuple[str, int]:
+        """Build the summarization prompt and return it with the message count.
+        
+        If the conversation has a checkpoint whose last summarized messages
+        are still in the history, the prompt only updates that summary with
+        the messages after it, so the history window sliding past earlier
+        turns does not force a summary from scratch; if no messages were
+        added, the checkpoint's own prompt is reused so its response is
+        served from the response cache.
+        """
+        message_count = len(messages)
+        
+        # Redacted before matching, so checkpoints are anchored on (and only
+        # ever hold) redacted text whether or not the caller redacted already
+        if redact_phi:
+            messages = self._redact_phi_from_conversation(messages)
+        
+        previous_summary = None
+        checkpoint = self._load_summary_checkpoint(conversation_id)
+        if checkpoint is not None:
+            start = self._find_anchor(messages, checkpoint)
+            if start == message_count:
+                return checkpoint.prompt, message_count
+            if start is not None:
+                previous_summary = checkpoint.summary
+                messages = messages[start:]
+        
+        if previous_summary is not None:
+            prompt = self._fill_incremental_summary(
+                summary=previous_summary,
+                conversation=self._format_messages(messages)
+            )
+        else:
+            prompt = self._fill_summary(
+                conversation=self._format_messages(messages)
+            )
+        return prompt, message_count
+    
+    @classmethod
+    def _find_anchor(
+        cls,
+        messages: List[Dict[str, str]],
+        checkpoint: SummaryCheckpoint
+    ) -> Optional[int]:
+        """Find where the messages a checkpoint covers end.
+        
+        Args:
+            messages: Conversation messages
+            checkpoint: Checkpoint whose anchor to look for
+            
+        Returns:
+            Index of the first message after the anchored run, or None if
+            the run is no longer in the messages
+        """
+        anchor = checkpoint.anchor
+        digests = [cls._message_digest(msg) for msg in messages]
+        # New turns since the last summary are few, so search from the end;
+        # a run cut off by the start of the history window matches on
+        # its remaining messages
+        for end in range(len(digests), 0, -1):
+            length = min(len(anchor), end)
+            if digests[end - length:end] == anchor[len(anchor) - length:]:
+                return end
+        return None
+    
+    def _load_summary_checkpoint(self, conversation_id: Optional[str]) -> Optional[SummaryCheckpoint]:
+        """Get a conversation's checkpoint, from Redis when it is shared."""
+        if conversation_id is None:
+            return None
+        if self._summary_redis is not None:
+            try:
+                blob = self._summary_redis.get(self.SUMMARY_REDIS_PREFIX + conversation_id)
+                if blob is not None:
+                    return _checkpoint_decoder.decode(blob)
+            except Exception as e:
+                logger.warning(f"Could not load summary checkpoint: {e}")
+        with self._cache_lock:
+            return self._summary_checkpoints.get(conversation_id)
+    
+    def _save_summary_checkpoint(
+        self,
+        conversation_id: Optional[str],
+        messages: List[Dict[str, str]],
+        redact_phi: bool,
+        summary: str,
+        prompt: str
+    ):
+        """Remember a conversation's summary and the last messages it covers."""
+        if conversation_id is None or not messages:
+            return
+        tail = messages[-self.SUMMARY_ANCHOR_MESSAGES:]
+        if redact_phi:
+            tail = self._redact_phi_from_conversation(tail)
+        checkpoint = SummaryCheckpoint(
+            anchor=[self._message_digest(msg) for msg in tail],
+            summary=summary,
+            prompt=prompt
+        )
+        with self._cache_lock:
+            self._summary_checkpoints[conversation_id] = checkpoint
+        if self._summary_redis is not None:
+            try:
+                self._summary_redis.set(
+                    self.SUMMARY_REDIS_PREFIX + conversation_id,
+                    _checkpoint_encoder.encode(checkpoint),
+                    ex=config.conversation_ttl
+                )
+            except Exception as e:
+                logger.warning(f"Could not persist summary checkpoint: {e}")
+    
+    def _summary_result(self, response: Any, message_count: int) -> Dict[str, Any]:
+        """Build the summary result from a model response."""
+        summary = response.text.strip()
+        
+        logger.info("Conversation summarized", extra={
+            "message_count": message_count,
+            "summary_length": len(summary)
+        })
+        
+        return {
+            "summary": summary,
+            "confidence": self._response_confidence(
+                response, self.DEFAULT_SUMMARY_CONFIDENCE
+            ),
+            "message_count": message_count,
+            "model": self.model_name,
+        }
+    
+    def summarize_conversations_batch(
+        self,
+        conversations: List[List[Dict[str, str]]],
+        redact_phi: bool = True,
+        poll_interval: float = 10
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Summarize many conversations offline (e.g. closed calls overnight).
+        
+        Conversations are submitted as one inline batch prediction job,
+        which is billed at a discount and rate-limited server side. Fewer
+        than BATCH_MIN_CONVERSATIONS, or no google-genai SDK (the "batch"
+        extra), falls back to concurrent online requests on the shared
+        background loop. Must not be called from a running event loop.
+        
+        Args:
+            conversations: Message lists, one per conversation
+            redact_phi: Whether to redact PHI before sending to LLM
+            poll_interval: Seconds between batch job status checks
+            
+        Returns:
+            Summary results in input order; None where a summary failed
+        """
+        prompts = [
+            self._summary_prompt(messages, redact_phi)
+            for messages in conversations
+        ]
+        
+        if google_genai is None or len(prompts) < self.BATCH_MIN_CONVERSATIONS:
+            return background_loop.run(self._summarize_prompts_async(prompts))
+        
+        if self._batch_client is None:
+            self._batch_client = google_genai.Client(api_key=self._api_key)
+        client = self._batch_client
+        
+        job = client.batches.create(
+            model=self.model_name,
+            src=[
+                {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+                for prompt, _ in prompts
+            ],
+            config={"display_name": f"summaries-{len(prompts)}"}
+        )
+        logger.info(f"Submitted summary batch job {job.name} ({len(prompts)} conversations)")
+        
+        while job.state.name not in self.BATCH_TERMINAL_STATES:
+            time.sleep(poll_interval)
+            job = client.batches.get(name=job.name)
+        
+        if job.state.name != "JOB_STATE_SUCCEEDED":
+            raise RuntimeError(f"Summary batch job {job.name} ended in {job.state.name}")
+        
+        results = []
+        for (_, message_count), inlined in zip(prompts, job.dest.inlined_responses):
+            if inlined.response is None:
+                logger.error(f"Batch summary failed: {inlined.error}")
+                results.append(None)
+            else:
+                results.append(self._summary_result(inlined.response, message_count))
+        return results
+    
+    async def _summarize_prompts_async(
+        self,
+        prompts: List[Tuple[str, int]]
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Send summary prompts concurrently; None where a call failed."""
+        responses = await asyncio.gather(
+            *(self._agenerate(prompt) for prompt, _ in prompts),
+            return_exceptions=True
+        )
+        
+        results = []
+        for (_, message_count), response in zip(prompts, responses):
+            if isinstance(response, Exception):
+                logger.error(f"Error summarizing conversation: {response}")
+                results.append(None)
+            else:
+                results.append(self._summary_result(response, message_count))
+        return results
+    
     def generate_smart_replies(
         self,
         context_messages: List[Dict[str, str]],
@@ -190,71 +791,157 @@ Provide your response in JSON format:
             Dict with reply suggestions and confidence scores
         """
         try:
-            # Redact PHI
-            if redact_phi:
-                context_messages = self._redact_phi_from_conversation(context_messages)
-                last_message, _ = phi_redactor.redact(last_message)
-            
-            # Format context
-            context_text = "\n".join([
-                f"{msg['role'].upper()}: {msg['text']}"
-                for msg in context_messages[-5:]  # Last 5 messages for context
-            ])
-            
-            # Generate prompt
-            prompt = self.SMART_REPLY_PROMPT.format(
-                context=context_text,
-                last_message=last_message
+            prompt = self._smart_reply_prompt(context_messages, last_message, redact_phi)
+            response = self._generate(prompt)
+            return self._smart_reply_result(response, num_replies)
+        
+        except Exception as e:
+            logger.error(f"Error generating smart replies: {e}", exc_info=True)
+            raise
+    
+    async def agenerate_smart_replies(
+        self,
+        context_messages: List[Dict[str, str]],
+        last_message: str,
+        redact_phi: bool = True,
+        num_replies: int = 3
+    ) -> Dict[str, Any]:
+        """Async version of generate_smart_replies."""
+        try:
+            context_messages = context_messages[-self.SMART_REPLY_CONTEXT_MESSAGES:]
+            prompt = await self._build_off_loop(
+                self._text_size(context_messages) + len(last_message) if redact_phi else 0,
+                self._smart_reply_prompt,
+                context_messages, last_message, redact_phi
             )
+            response = await self._agenerate(prompt)
+            return self._smart_reply_result(response, num_replies)
+        
+        except Exception as e:
+            logger.error(f"Error generating smart replies: {e}", exc_info=True)
+            raise
+    
+    def _smart_reply_prompt(
+        self,
+        context_messages: List[Dict[str, str]],
+        last_message: str,
+        redact_phi: bool
+    ) -> str:
+        """Build the smart reply prompt."""
+        # Only the most recent messages go into the prompt, so only they
+        # are redacted
+        context_messages = context_messages[-self.SMART_REPLY_CONTEXT_MESSAGES:]
+        
+        # Redact PHI
+        if redact_phi:
+            context_messages = self._redact_phi_from_conversation(context_messages)
+            if not isinstance(last_message, _RedactedText):
+                last_message, _ = phi_redactor.redact(last_message)
+        
+        return self._fill_smart_reply(
+            context=self._format_messages(context_messages),
+            last_message=last_message
+        )
+    
+    def _smart_reply_result(self, response: Any, num_replies: int) -> Dict[str, Any]:
+        """Parse reply suggestions from a model response."""
+        # response.text joins the candidate's parts on every access
+        text = response.text.strip()
+        
+        # Parse response (expecting JSON array)
+        try:
+            replies = json.loads(text)
+            if not isinstance(replies, list):
+                replies = [text]
+        except json.JSONDecodeError:
+            replies = self._parse_reply_lines(text)[:num_replies]
+        
+        result = {
+            "replies": [
+                {"text": reply, "confidence": self._reply_confidence(i)}
+                for i, reply in enumerate(replies[:num_replies])
+            ],
+            "model": self.model_name,
+        }
+        
+        logger.info("Smart replies generated", extra={
+            "num_replies": len(result["replies"])
+        })
+        
+        return result
+    
+    @staticmethod
+    def _parse_reply_lines(text: str) -> List[str]:
+        """Fallback for non-JSON output: one reply per line, list markers removed."""
+        replies = []
+        for line in text.split('\n'):
+            # Each line is stripped once; blank lines fall through as ""
+            cleaned = line.strip()
+            # Remove common list prefixes (1., 2., -, *)
+            if len(cleaned) > 2:
+                # Remove numbered list markers like "1. ", "2. "
+                if cleaned[0].isdigit() and cleaned[1] in '.):':
+                    cleaned = cleaned[2:].lstrip()
+                # Remove bullet points
+                elif cleaned[0] in '-*•':
+                    cleaned = cleaned[1:].lstrip()
+            if cleaned:
+                replies.append(cleaned)
+        return replies
+    
+    @staticmethod
+    def _reply_confidence(index: int) -> float:
+        """Confidence for the reply at this position."""
+        # Placeholder - in production, use more sophisticated scoring
+        confidence_scores = (0.85, 0.80, 0.75)
+        return confidence_scores[index] if index < len(confidence_scores) else 0.7
+    
+    def generate_smart_replies_stream(
+        self,
+        context_messages: List[Dict[str, str]],
+        last_message: str,
+        redact_phi: bool = True,
+        num_replies: int = 3
+    ) -> Iterator[Dict[str, Any]]:
+        """Generate smart reply suggestions, yielding each as soon as it is complete.
+        
+        The response is streamed and each reply is yielded when its JSON
+        string closes, so the first suggestion can be shown while the model
+        is still writing the rest.
+        
+        Args:
+            context_messages: Previous conversation messages
+            last_message: Patient's most recent message
+            redact_phi: Whether to redact PHI
+            num_replies: Number of reply suggestions to generate
             
-            # Generate replies
+        Yields:
+            Reply dicts with 'text' and 'confidence'
+        """
+        try:
+            prompt = self._smart_reply_prompt(context_messages, last_message, redact_phi)
             response = self.model.generate_content(
                 prompt,
-                safety_settings=self.safety_settings
+                safety_settings=self.safety_settings,
+                stream=True
             )
             
-            # Parse response (expecting JSON array)
-            try:
-                replies = json.loads(response.text.strip())
-                if not isinstance(replies, list):
-                    replies = [response.text.strip()]
-            except json.JSONDecodeError:
-                # Fallback: split by newlines and remove list markers
-                replies = []
-                for line in response.text.strip().split('\n'):
-                    if line.strip():
-                        # Remove common list prefixes (1., 2., -, *)
-                        cleaned = line.strip()
-                        if cleaned and len(cleaned) > 2:
-                            # Remove numbered list markers like "1. ", "2. "
-                            if cleaned[0].isdigit() and cleaned[1] in '.):':
-                                cleaned = cleaned[2:].strip()
-                            # Remove bullet points
-                            elif cleaned[0] in '-*•':
-                                cleaned = cleaned[1:].strip()
-                        if cleaned:
-                            replies.append(cleaned)
-                replies = replies[:num_replies]
-            
-            # Calculate confidence scores (placeholder - in production, use more sophisticated scoring)
-            confidence_scores = [0.85, 0.80, 0.75][:len(replies)]
-            
-            result = {
-                "replies": [
-                    {
-                        "text": reply,
-                        "confidence": confidence_scores[i] if i < len(confidence_scores) else 0.7
-                    }
-                    for i, reply in enumerate(replies[:num_replies])
-                ],
-                "model": self.model_name,
-            }
-            
-            logger.info("Smart replies generated", {
-                "num_replies": len(result["replies"])
-            })
+            scanner = _StringArrayScanner()
+            chunks = []
+            count = 0
+            for chunk in response:
+                chunks.append(chunk.text)
+                for reply in scanner.feed(chunk.text):
+                    yield {"text": reply, "confidence": self._reply_confidence(count)}
+                    count += 1
+                    if count == num_replies:
+                        return
             
-            return result
+            # The model did not answer with a JSON array
+            if not scanner.started:
+                for reply in self._parse_reply_lines("".join(chunks))[:num_replies]:
+                    yield {"text": reply, "confidence": self._reply_confidence(count)}
+                    count += 1
         
         except Exception as e:
             logger.error(f"Error generating smart replies: {e}", exc_info=True)
@@ -279,84 +966,214 @@ Provide your response in JSON format:
             Dict with clarification assessment
         """
         try:
-            # Redact PHI
-            if redact_phi:
-                message, _ = phi_redactor.redact(message)
-            
-            # Generate prompt
-            prompt = self.INTENT_CLARIFICATION_PROMPT.format(
-                message=message,
-                intent=detected_intent,
-                confidence=confidence
-            )
-            
-            # Generate assessment
-            response = self.model.generate_content(
-                prompt,
-                safety_settings=self.safety_settings
-            )
-            
-            # Parse JSON response
-            try:
-                assessment = json.loads(response.text.strip())
-            except json.JSONDecodeError:
-                # Fallback
-                assessment = {
-                    "is_correct": confidence > 0.7,
-                    "confidence_assessment": "medium",
-                    "clarifying_question": None
-                }
-            
-            logger.info("Intent clarified", {
-                "original_intent": detected_intent,
-                "is_correct": assessment.get("is_correct")
-            })
-            
-            return assessment
+            prompt = self._clarify_prompt(message, detected_intent, confidence, redact_phi)
+            response = self._generate(prompt)
+            return self._clarify_result(response, detected_intent, confidence)
+        
+        except Exception as e:
+            logger.error(f"Error clarifying intent: {e}", exc_info=True)
+            raise
+    
+    async def aclarify_intent(
+        self,
+        message: str,
+        detected_intent: str,
+        confidence: float,
+        redact_phi: bool = True
+    ) -> Dict[str, Any]:
+        """Async version of clarify_intent."""
+        try:
+            prompt = self._clarify_prompt(message, detected_intent, confidence, redact_phi)
+            response = await self._agenerate(prompt)
+            return self._clarify_result(response, detected_intent, confidence)
         
         except Exception as e:
             logger.error(f"Error clarifying intent: {e}", exc_info=True)
             raise
     
+    def _clarify_prompt(
+        self,
+        message: str,
+        detected_intent: str,
+        confidence: float,
+        redact_phi: bool
+    ) -> str:
+        """Build the intent clarification prompt."""
+        # Redact PHI
+        if redact_phi:
+            message, _ = phi_redactor.redact(message)
+        
+        return self._fill_intent_clarification(
+            message=message,
+            intent=detected_intent,
+            confidence=confidence
+        )
+    
+    @staticmethod
+    def _clarify_result(
+        response: Any,
+        detected_intent: str,
+        confidence: float
+    ) -> Dict[str, Any]:
+        """Parse the clarification assessment from a model response."""
+        # Parse JSON response
+        try:
+            assessment = json.loads(response.text.strip())
+        except json.JSONDecodeError:
+            # Fallback
+            assessment = {
+                "is_correct": confidence > 0.7,
+                "confidence_assessment": "medium",
+                "clarifying_question": None
+            }
+        
+        logger.info("Intent clarified", extra={
+            "original_intent": detected_intent,
+            "is_correct": assessment.get("is_correct")
+        })
+        
+        return assessment
+    
+    async def analyze_turn(
+        self,
+        messages: List[Dict[str, str]],
+        last_message: str,
+        detected_intent: str,
+        confidence: float,
+        redact_phi: bool = True,
+        num_replies: int = 3
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Summarize, suggest replies and clarify intent for one turn at once.
+        
+        The three prompts only share the (redacted) conversation, so they
+        are sent concurrently and the turn costs one model round-trip of
+        latency instead of three.
+        
+        Args:
+            messages: Conversation messages with 'role' and 'text'
+            last_message: Patient's most recent message
+            detected_intent: Intent detected by Dialogflow
+            confidence: Confidence score of the detected intent
+            redact_phi: Whether to redact PHI before sending to LLM
+            num_replies: Number of reply suggestions to generate
+            
+        Returns:
+            Dict with "summary", "smart_replies" and "intent_clarification"
+            results; a part whose call failed is None
+        """
+        # Redact once for all three prompts
+        if redact_phi:
+            messages = await self._build_off_loop(
+                self._text_size(messages),
+                self._redact_phi_from_conversation, messages
+            )
+            last_message, _ = phi_redactor.redact(last_message)
+        
+        summary_prompt, message_count = self._summary_prompt(messages, False)
+        parts = (
+            ("summary", summary_prompt,
+             lambda response: self._summary_result(response, message_count)),
+            ("smart_replies", self._smart_reply_prompt(messages, last_message, False),
+             lambda response: self._smart_reply_result(response, num_replies)),
+            ("intent_clarification",
+             self._clarify_prompt(last_message, detected_intent, confidence, False),
+             lambda response: self._clarify_result(response, detected_intent, confidence)),
+        )
+        
+        # One failed call must not cancel the others
+        responses = await asyncio.gather(
+            *(self._agenerate(prompt) for _, prompt, _ in parts),
+            return_exceptions=True
+        )
+        
+        results = {}
+        for (name, _, parse), response in zip(parts, responses):
+            try:
+                if isinstance(response, Exception):
+                    raise response
+                results[name] = parse(response)
+            except Exception as e:
+                logger.error(f"Error in {name} analysis: {e}", exc_info=True)
+                results[name] = None
+        return results
+    
     def generate_knowledge_snippet(
         self,
         query: str,
-        knowledge_base: List[Dict[str, str]] = None
+        knowledge_base: List[Dict[str, str]] = None,
+        redact_phi: bool = True
     ) -> Dict[str, Any]:
         """Generate knowledge base snippet relevant to query.
         
         Args:
             query: Agent's query or patient question
             knowledge_base: Optional list of knowledge articles
+            redact_phi: Whether to redact PHI before sending to LLM
             
         Returns:
             Relevant knowledge snippet
         """
         try:
-            prompt = f"""
-Based on the following query from a healthcare contact center agent,
-provide a brief, actionable knowledge snippet (2-3 sentences) that would help them respond.
-
-Query: {query}
-
-Provide practical, compliant information.
-"""
-            
-            response = self.model.generate_content(
-                prompt,
-                safety_settings=self.safety_settings
-            )
-            
-            return {
-                "snippet": response.text.strip(),
-                "relevance_score": 0.85,  # Placeholder
-                "model": self.model_name
-            }
+            if redact_phi:
+                query, _ = phi_redactor.redact(query)
+            response = self._generate(self._fill_knowledge(query=query))
+            return self._knowledge_result(response)
         
         except Exception as e:
             logger.error(f"Error generating knowledge snippet: {e}", exc_info=True)
             raise
+    
+    async def agenerate_knowledge_snippet(
+        self,
+        query: str,
+        knowledge_base: List[Dict[str, str]] = None,
+        redact_phi: bool = True
+    ) -> Dict[str, Any]:
+        """Async version of generate_knowledge_snippet."""
+        try:
+            if redact_phi:
+                query, _ = phi_redactor.redact(query)
+            response = await self._agenerate(self._fill_knowledge(query=query))
+            return self._knowledge_result(response)
+        
+        except Exception as e:
+            logger.error(f"Error generating knowledge snippet: {e}", exc_info=True)
+            raise
+    
+    def _knowledge_result(self, response: Any) -> Dict[str, Any]:
+        """Build the knowledge snippet result from a model response."""
+        return {
+            "snippet": response.text.strip(),
+            "relevance_score": self._response_confidence(
+                response, self.DEFAULT_KNOWLEDGE_CONFIDENCE
+            ),
+            "model": self.model_name
+        }
+
+
+_gemini_service: Optional[GeminiService] = None
+_gemini_service_lock = threading.Lock()
+
+
+def get_gemini_service() -> GeminiService:
+    """Get the shared Gemini service, creating it on first use.
+    
+    Creating the model (and resolving credentials) is deferred until a
+    caller needs it, so importing this module stays cheap.
+    
+    Returns:
+        Singleton GeminiService
+    """
+    global _gemini_service
+    if _gemini_service is None:
+        with _gemini_service_lock:
+            if _gemini_service is None:
+                _gemini_service = GeminiService()
+    return _gemini_service
 
 
-# Singleton instance
-gemini_service = GeminiService()
+def __getattr__(name: str) -> Any:
+    # Keeps `from ... import gemini_service` working without eager creation
+    if name == "gemini_service":
+        return get_gemini_service()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
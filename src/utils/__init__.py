@@ -1,14 +1,12 @@
 """Utilities package for Healthcare Conversational AI Platform."""
 
+import time
 from datetime import datetime, timezone
 
-from .phi_redaction import PHIRedactor, phi_redactor
-from .logging import HIPAACompliantLogger, get_logger
-
 
 def utcnow() -> datetime:
     """Get current UTC datetime in a Python 3.12+ compatible way.
-    
+
     Returns:
         Current UTC datetime with timezone awareness
     """
@@ -20,10 +18,57 @@ def utcnow() -> datetime:
         return datetime.utcnow().replace(tzinfo=timezone.utc)
 
 
+# (epoch second, ISO string) of the last formatted timestamp
+_last_iso = (0, "")
+
+
+def utcnow_iso() -> str:
+    """Get current UTC time as an ISO 8601 string at second resolution.
+
+    The formatted string is reused until the wall-clock second changes,
+    so hot paths stamping every message skip the datetime allocation.
+
+    Returns:
+        ISO 8601 timestamp, e.g. 2024-02-04T18:30:00+00:00
+    """
+    global _last_iso
+    now = int(time.time())
+    cached_second, cached_iso = _last_iso
+    if now != cached_second:
+        cached_iso = datetime.fromtimestamp(now, tz=timezone.utc).isoformat()
+        _last_iso = (now, cached_iso)
+    return cached_iso
+
+
+def epoch_to_iso(ts: float) -> str:
+    """Format an epoch timestamp as an ISO 8601 UTC string.
+
+    Args:
+        ts: Seconds since the epoch, e.g. from time.time()
+
+    Returns:
+        ISO 8601 timestamp at millisecond resolution, e.g.
+        2024-02-04T18:30:00.123+00:00
+    """
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat(timespec='milliseconds')
+
+
+# Imported after utcnow is defined: the logging module imports it from here.
+from .phi_redaction import PHIRedactor, phi_redactor  # noqa: E402
+from .batching import BackgroundBatcher  # noqa: E402
+from .logging import HIPAACompliantLogger, get_logger  # noqa: E402
+from .event_loop import BackgroundEventLoop, background_loop  # noqa: E402
+
+
 __all__ = [
     'PHIRedactor',
     'phi_redactor',
     'HIPAACompliantLogger',
     'get_logger',
+    'BackgroundBatcher',
+    'BackgroundEventLoop',
+    'background_loop',
     'utcnow',
+    'utcnow_iso',
+    'epoch_to_iso',
 ]
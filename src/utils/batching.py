@@ -0,0 +1,96 @@
+"""Background batching of fire-and-forget work."""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, List
+
+_STOP = object()
+
+
+class BackgroundBatcher:
+    """Collects items on a bounded queue and flushes them in batches.
+
+    A daemon thread hands items to flush_fn once max_batch_size items are
+    waiting or max_delay seconds have passed since the first one arrived,
+    so producers never block on the flush itself.
+    """
+
+    def __init__(
+        self,
+        flush_fn: Callable[[List[Any]], None],
+        max_batch_size: int = 100,
+        max_delay: float = 0.1,
+        max_queue_size: int = 10000,
+        name: str = "background-batcher"
+    ):
+        """Initialize batcher and start its flush thread.
+
+        Args:
+            flush_fn: Called with each batch of items
+            max_batch_size: Maximum items per flush
+            max_delay: Maximum seconds an item waits before being flushed
+            max_queue_size: Items buffered before put() starts dropping
+            name: Name of the flush thread
+        """
+        self.flush_fn = flush_fn
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.dropped = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue_size)
+        self._thread = threading.Thread(target=self._drain, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def put(self, item: Any) -> bool:
+        """Queue an item without blocking.
+
+        Args:
+            item: Item to flush later
+
+        Returns:
+            False if the queue was full and the item was dropped
+        """
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def close(self, timeout: float = 5.0):
+        """Flush queued items and stop the flush thread.
+
+        Args:
+            timeout: Seconds to wait for the final flush
+        """
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def _drain(self):
+        """Flush loop run by the background thread."""
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            if _STOP in batch:
+                stopping = True
+                batch = [item for item in batch if item is not _STOP]
+
+            if batch:
+                try:
+                    self.flush_fn(batch)
+                except Exception:
+                    logging.getLogger(__name__).exception("Batch flush failed")
@@ -0,0 +1,77 @@
+"""Shared background asyncio event loop for synchronous callers."""
+
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Coroutine, Optional
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+
+class BackgroundEventLoop:
+    """Event loop running forever in a daemon thread.
+
+    Flask views and webhook handlers are synchronous; instead of building
+    and tearing down a loop per request they submit coroutines here, so
+    concurrent requests share one reactor.
+    """
+
+    def __init__(self, name: str = "background-event-loop"):
+        """Initialize background loop holder.
+
+        Args:
+            name: Name of the thread running the loop
+        """
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Event loop, started on first use."""
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = uvloop.new_event_loop() if uvloop else asyncio.new_event_loop()
+                    threading.Thread(
+                        target=loop.run_forever,
+                        name=self.name,
+                        daemon=True
+                    ).start()
+                    self._loop = loop
+        return self._loop
+
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """Schedule a coroutine on the loop without waiting for it.
+
+        Args:
+            coro: Coroutine to run
+
+        Returns:
+            Future resolved with the coroutine's result
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the loop and block until it completes.
+
+        Args:
+            coro: Coroutine to run
+            timeout: Seconds to wait before cancelling the coroutine
+
+        Returns:
+            The coroutine's result
+        """
+        future = self.submit(coro)
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+
+# Singleton instance
+background_loop = BackgroundEventLoop()
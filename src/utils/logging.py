@@ -2,7 +2,10 @@
 
 import logging
 import json
-from typing import Any, Dict, Optional
+import threading
+from typing import Any, Dict, List, Optional
+
+import orjson
 
 try:
     from google.cloud import logging as cloud_logging
@@ -10,11 +13,26 @@ except ImportError:
     cloud_logging = None
 
 from . import utcnow
+from .batching import BackgroundBatcher
+
+
+class _LazyJSON:
+    """Log argument that serializes its data only when the record is formatted."""
+    
+    __slots__ = ("data",)
+    
+    def __init__(self, data: Dict):
+        self.data = data
+    
+    def __str__(self) -> str:
+        return orjson.dumps(self.data, default=str).decode()
 
 
 class HIPAACompliantLogger:
     """Logger that ensures no PHI is logged."""
     
+    _audit_lock = threading.Lock()
+    
     def __init__(self, name: str, enable_cloud_logging: bool = False):
         """Initialize logger.
         
@@ -34,6 +52,9 @@ class HIPAACompliantLogger:
         console_handler.setFormatter(formatter)
         self.logger.addHandler(console_handler)
         
+        # Audit records are written by a background thread, created on first use
+        self._audit_batcher: Optional[BackgroundBatcher] = None
+        
         # Cloud logging client (optional)
         self.cloud_client = None
         if enable_cloud_logging and cloud_logging:
@@ -66,41 +87,66 @@ class HIPAACompliantLogger:
             return sanitized
         return data
     
-    def info(self, message: str, extra: Optional[Dict] = None):
-        """Log info message."""
+    def _log(
+        self,
+        level: int,
+        message: str,
+        args: tuple,
+        extra: Optional[Dict],
+        exc_info: bool = False
+    ):
+        """Sanitize extra data and emit a record if the level is enabled.
+        
+        Message arguments, including the serialized extra data, are
+        %-formatted by the logging module only when a handler actually
+        formats the record.
+        """
+        if not self.logger.isEnabledFor(level):
+            return
         sanitized_extra = self._sanitize_log_data(extra) if extra else None
         if sanitized_extra:
-            self.logger.info(f"{message} - {json.dumps(sanitized_extra)}")
-        else:
-            self.logger.info(message)
+            if not args:
+                message = message.replace("%", "%%")
+            message = f"{message} - %s"
+            args = (*args, _LazyJSON(sanitized_extra))
+        self.logger.log(level, message, *args, exc_info=exc_info)
     
-    def error(self, message: str, extra: Optional[Dict] = None, exc_info: bool = False):
+    def isEnabledFor(self, level: int) -> bool:
+        """Whether a record at this level would be emitted.
+        
+        Hot paths check this before building an extra dict for a log call.
+        """
+        return self.logger.isEnabledFor(level)
+    
+    def info(self, message: str, *args: Any, extra: Optional[Dict] = None):
+        """Log info message."""
+        self._log(logging.INFO, message, args, extra)
+    
+    def error(
+        self,
+        message: str,
+        *args: Any,
+        extra: Optional[Dict] = None,
+        exc_info: bool = False
+    ):
         """Log error message."""
-        sanitized_extra = self._sanitize_log_data(extra) if extra else None
-        if sanitized_extra:
-            self.logger.error(f"{message} - {json.dumps(sanitized_extra)}", exc_info=exc_info)
-        else:
-            self.logger.error(message, exc_info=exc_info)
+        self._log(logging.ERROR, message, args, extra, exc_info)
     
-    def warning(self, message: str, extra: Optional[Dict] = None):
+    def warning(self, message: str, *args: Any, extra: Optional[Dict] = None):
         """Log warning message."""
-        sanitized_extra = self._sanitize_log_data(extra) if extra else None
-        if sanitized_extra:
-            self.logger.warning(f"{message} - {json.dumps(sanitized_extra)}")
-        else:
-            self.logger.warning(message)
+        self._log(logging.WARNING, message, args, extra)
     
-    def debug(self, message: str, extra: Optional[Dict] = None):
+    def debug(self, message: str, *args: Any, extra: Optional[Dict] = None):
         """Log debug message."""
-        sanitized_extra = self._sanitize_log_data(extra) if extra else None
-        if sanitized_extra:
-            self.logger.debug(f"{message} - {json.dumps(sanitized_extra)}")
-        else:
-            self.logger.debug(message)
+        self._log(logging.DEBUG, message, args, extra)
     
     def audit(self, event_type: str, user_id: str, details: Dict):
         """Log audit event for compliance.
         
+        The event is queued and written by a background thread, so callers
+        do not wait on log handlers (e.g. Cloud Logging) to flush it. If the
+        queue is full the event is written synchronously instead of dropped.
+        
         Args:
             event_type: Type of event (e.g., 'access', 'modification', 'query')
             user_id: User or system performing action
@@ -112,7 +158,27 @@ class HIPAACompliantLogger:
             'user_id': user_id,
             'details': self._sanitize_log_data(details)
         }
-        self.logger.info(f"AUDIT: {json.dumps(audit_entry)}")
+        
+        if self._audit_batcher is None:
+            with self._audit_lock:
+                if self._audit_batcher is None:
+                    self._audit_batcher = BackgroundBatcher(
+                        self._write_audit_batch,
+                        name=f"audit-{self.logger.name}"
+                    )
+        
+        if not self._audit_batcher.put(audit_entry):
+            # Audit records must not be lost: write inline when the queue is full
+            self._write_audit_batch([audit_entry])
+    
+    def _write_audit_batch(self, entries: List[Dict]):
+        """Write queued audit events (runs on the audit thread).
+        
+        Args:
+            entries: Audit entries in arrival order
+        """
+        for audit_entry in entries:
+            self.logger.info(f"AUDIT: {json.dumps(audit_entry)}")
 
 
 def get_logger(name: str, enable_cloud_logging: bool = False) -> HIPAACompliantLogger:
@@ -1,7 +1,29 @@
 """PHI (Protected Health Information) redaction utilities for HIPAA compliance."""
 
+import functools
 import re
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+# RE2 (the "re2" extra, google-re2) matches in linear time without
+# backtracking; every PHI pattern is regular (no backreferences or
+# lookaround), so it is a drop-in engine. Without it the stdlib re module
+# is used, with identical matches but no linear-time guarantee
+_regex_engine = re2 if re2 is not None else re
+
+
+def _compile_alternation(patterns: Iterable[Tuple[str, str]]) -> Pattern:
+    """Compile (name, pattern) pairs into one case-insensitive alternation.
+    
+    Each pattern becomes a named group, so match.lastgroup is its name.
+    """
+    return _regex_engine.compile(
+        "(?i)" + "|".join(f"(?P<{name}>{pattern})" for name, pattern in patterns)
+    )
 
 
 class PHIRedactor:
@@ -9,12 +31,13 @@ class PHIRedactor:
     
     # Patterns for common PHI elements
     PATTERNS = {
-        # Social Security Numbers
+        # Social Security Numbers; any bare 9-digit run is treated as one,
+        # since "my ssn is 123456789" must not reach the LLM
         "ssn": r"\b\d{3}-\d{2}-\d{4}\b|\b\d{9}\b",
-        # Phone Numbers
-        "phone": r"\b\d{3}[-.\s]?\d{3}[-.\s]?\d{4}\b|\(\d{3}\)\s*\d{3}[-.\s]?\d{4}\b",
+        # Phone Numbers; the area code, in parentheses or not, is required
+        "phone": r"(?:\(\d{3}\)\s*|\b\d{3}[-.\s]?)\d{3}[-.\s]?\d{4}\b",
         # Email Addresses
-        "email": r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b",
+        "email": r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b",
         # Medical Record Numbers (MRN) - assuming format MRN followed by digits
         "mrn": r"\bMRN[:\s#]?\d{6,10}\b",
         # Patient ID
@@ -27,6 +50,21 @@ class PHIRedactor:
         "date": r"\b\d{1,2}[-/]\d{1,2}[-/]\d{2,4}\b",
     }
     
+    # All patterns fused into one alternation, compiled once at class load,
+    # so a single scan of the text finds every PHI type; the matching
+    # group's name is the PHI type
+    COMBINED = _compile_alternation(PATTERNS.items())
+    
+    REPLACEMENTS = {name: f"[REDACTED_{name.upper()}]" for name in PATTERNS}
+    
+    # Texts redacted together are joined with this; it is not whitespace or
+    # a word character, so no pattern can match across it
+    BATCH_SEPARATOR = "\x00"
+    
+    # Every pattern needs a digit or an "@", so text without either (most
+    # conversational messages) cannot contain PHI and skips the full scan
+    _NEEDS_SCAN = re.compile(r"[\d@]")
+    
     def __init__(self, enable_detailed_logging: bool = False):
         """Initialize the PHI redactor.
         
@@ -49,24 +87,69 @@ class PHIRedactor:
         if text is None or text == "":
             return text, {}
         
-        redacted_text = text
-        redaction_counts = {}
+        if self._NEEDS_SCAN.search(text) is None:
+            return text, {}
         
-        patterns_to_use = patterns or list(self.PATTERNS.keys())
+        combined = self._combined_pattern(patterns)
+        if combined is None:
+            return text, {}
         
-        for pattern_name in patterns_to_use:
-            if pattern_name in self.PATTERNS:
-                pattern = self.PATTERNS[pattern_name]
-                matches = re.findall(pattern, redacted_text, re.IGNORECASE)
-                count = len(matches)
-                
-                if count > 0:
-                    redaction_counts[pattern_name] = count
-                    replacement = f"[REDACTED_{pattern_name.upper()}]"
-                    redacted_text = re.sub(pattern, replacement, redacted_text, flags=re.IGNORECASE)
+        redaction_counts: Dict[str, int] = {}
+        replacements = self.REPLACEMENTS
+        
+        def replace(match):
+            name = match.lastgroup
+            redaction_counts[name] = redaction_counts.get(name, 0) + 1
+            return replacements[name]
+        
+        redacted_text = combined.sub(replace, text)
         
         return redacted_text, redaction_counts
     
+    def redact_many(self, texts: List[str], patterns: List[str] = None) -> List[str]:
+        """Redact PHI from several texts with a single regex pass.
+        
+        Args:
+            texts: Texts to redact (None is treated as "")
+            patterns: List of pattern names to use. If None, uses all patterns.
+            
+        Returns:
+            Redacted texts, in input order
+        """
+        texts = [text or "" for text in texts]
+        separator = self.BATCH_SEPARATOR
+        joined = separator.join(texts)
+        
+        # A text containing the separator would throw off the split
+        if joined.count(separator) != len(texts) - 1:
+            return [self.redact(text, patterns)[0] for text in texts]
+        
+        return self.redact(joined, patterns)[0].split(separator)
+    
+    @classmethod
+    def _combined_pattern(cls, patterns: Optional[List[str]]) -> Optional[Pattern]:
+        """Get the fused pattern for the requested PHI types.
+        
+        Args:
+            patterns: Pattern names, or None for all patterns
+            
+        Returns:
+            Compiled alternation, or None if no known pattern was requested
+        """
+        if not patterns:
+            return cls.COMBINED
+        return cls._compile_subset(
+            tuple(name for name in cls.PATTERNS if name in patterns)
+        )
+    
+    @classmethod
+    @functools.lru_cache(maxsize=64)
+    def _compile_subset(cls, names: Tuple[str, ...]) -> Optional[Pattern]:
+        """Compile (once per distinct subset) an alternation of named patterns."""
+        if not names:
+            return None
+        return _compile_alternation((name, cls.PATTERNS[name]) for name in names)
+    
     def redact_dict(self, data: Dict, keys_to_redact: List[str] = None) -> Dict:
         """Redact PHI from dictionary values.
         
@@ -80,21 +163,44 @@ class PHIRedactor:
         if not data:
             return data
         
+        allowed = frozenset(keys_to_redact) if keys_to_redact else None
+        
         redacted_data = data.copy()
+        # Copies of nested dicts by id() of the original, so a dict shared
+        # between branches is copied and walked once
+        copies = {id(data): redacted_data}
+        stack = [redacted_data]
+        # (container, key or index) of every string to redact; they are all
+        # redacted together in one pass once the walk is done
+        targets = []
+        texts = []
         
-        for key, value in redacted_data.items():
-            if keys_to_redact and key not in keys_to_redact:
-                continue
+        while stack:
+            node = stack.pop()
+            for key, value in node.items():
+                if allowed is not None and key not in allowed:
+                    continue
                 
-            if isinstance(value, str):
-                redacted_data[key], _ = self.redact(value)
-            elif isinstance(value, dict):
-                redacted_data[key] = self.redact_dict(value, keys_to_redact)
-            elif isinstance(value, list):
-                redacted_data[key] = [
-                    self.redact(item)[0] if isinstance(item, str) else item
-                    for item in value
-                ]
+                if isinstance(value, str):
+                    targets.append((node, key))
+                    texts.append(value)
+                elif isinstance(value, dict):
+                    if not value:
+                        continue
+                    copy = copies.get(id(value))
+                    if copy is None:
+                        copy = copies[id(value)] = value.copy()
+                        stack.append(copy)
+                    node[key] = copy
+                elif isinstance(value, list):
+                    node[key] = items = list(value)
+                    for index, item in enumerate(items):
+                        if isinstance(item, str):
+                            targets.append((items, index))
+                            texts.append(item)
+        
+        for (container, key), text in zip(targets, self.redact_many(texts)):
+            container[key] = text
         
         return redacted_data
     
@@ -107,8 +213,9 @@ class PHIRedactor:
         Returns:
             True if no PHI detected, False otherwise
         """
-        _, counts = self.redact(text)
-        return len(counts) == 0
+        if not text or self._NEEDS_SCAN.search(text) is None:
+            return True
+        return self.COMBINED.search(text) is None
 
 
 # Singleton instance
@@ -1,8 +1,17 @@
 """Test configuration."""
 
+import asyncio
 import pytest
 import sys
 import os
 
 # Add src to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+@pytest.fixture(scope="session")
+def event_loop():
+    """One event loop for all async tests instead of one per test."""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
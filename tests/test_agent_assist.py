@@ -1,14 +1,19 @@
 """Tests for Agent Assist service."""
 
+import time
+from types import SimpleNamespace
+
 import pytest
-import asyncio
+from config.config import config
+from src.agent_assist import service
 from src.agent_assist.service import AgentAssistService
+from src.agent_assist.semantic_cache import SemanticCache
 
 
 @pytest.fixture
 def agent_assist():
     """Create Agent Assist service instance."""
-    return AgentAssistService()
+    return AgentAssistService(prefetch=False)
 
 
 def test_register_conversation(agent_assist):
@@ -33,6 +38,29 @@ def test_add_message(agent_assist):
     assert messages[1]["role"] == "agent"
 
 
+def test_message_timestamps_keep_millisecond_order(agent_assist, monkeypatch):
+    """Test messages in the same second keep distinct, ordered timestamps."""
+    conversation_id = "test-conv-timestamps"
+    stamps = iter([1707071400.125, 1707071400.250, 1707071400.375])
+    monkeypatch.setattr(
+        service, "time",
+        SimpleNamespace(time=lambda: next(stamps), monotonic=time.monotonic)
+    )
+    
+    agent_assist.add_message(conversation_id, "patient", "First")
+    agent_assist.add_message(conversation_id, "agent", "Second")
+    agent_assist.add_message(conversation_id, "patient", "Third", "2024-02-04T18:30:01Z")
+    monkeypatch.undo()
+    
+    messages = agent_assist.get_conversation_history(conversation_id)
+    assert [msg["timestamp"] for msg in messages] == [
+        "2024-02-04T18:30:00.125+00:00",
+        "2024-02-04T18:30:00.250+00:00",
+        "2024-02-04T18:30:01Z",
+    ]
+    assert "timestamp" not in agent_assist.active_conversations[conversation_id][0]
+
+
 def test_get_conversation_history_with_limit(agent_assist):
     """Test conversation history with limit."""
     conversation_id = "test-conv-3"
@@ -44,6 +72,22 @@ def test_get_conversation_history_with_limit(agent_assist):
     assert len(messages) == 5
 
 
+def test_conversation_history_is_bounded(agent_assist):
+    """Test that old messages are evicted past the history limit."""
+    conversation_id = "test-conv-bounded"
+    
+    for i in range(config.max_conversation_history + 5):
+        agent_assist.add_message(conversation_id, "patient", f"Message {i}")
+    
+    messages = agent_assist.get_conversation_history(conversation_id)
+    assert len(messages) == config.max_conversation_history
+    assert messages[-1]["text"] == f"Message {config.max_conversation_history + 4}"
+    assert agent_assist.get_metrics()["total_messages"] == config.max_conversation_history
+    
+    agent_assist.close_conversation(conversation_id)
+    assert agent_assist.get_metrics()["total_messages"] == 0
+
+
 def test_close_conversation(agent_assist):
     """Test closing conversation."""
     conversation_id = "test-conv-4"
@@ -76,3 +120,117 @@ def test_determine_next_best_action(agent_assist):
     action = agent_assist._determine_next_best_action(messages)
     
     assert "appointment" in action.lower()
+
+
+def test_semantic_cache_hit_and_miss():
+    """Test semantic cache lookup by cosine similarity."""
+    vectors = {
+        "refill my prescription": [1.0, 0.0, 0.0],
+        "prescription refill please": [0.95, 0.05, 0.0],
+        "what is my copay": [0.0, 1.0, 0.0],
+    }
+    cache = SemanticCache(embed_fn=vectors.get, threshold=0.85)
+    
+    cache.add(cache.embed("refill my prescription"), {"knowledge": ["refills"]})
+    
+    assert cache.lookup(cache.embed("prescription refill please")) == {"knowledge": ["refills"]}
+    assert cache.lookup(cache.embed("what is my copay")) is None
+
+
+def test_semantic_cache_persists_and_warms_in_background():
+    """Test Redis persistence and warm-up happen off the caller's thread."""
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    vectors = {"refill my prescription": [1.0, 0.0, 0.0]}
+    
+    writer = SemanticCache(embed_fn=vectors.get, redis_client=fakeredis.FakeRedis(server=server))
+    writer.add(writer.embed("refill my prescription"), {"knowledge": ["refills"]})
+    writer._persist_batcher.close()
+    
+    reader = SemanticCache(embed_fn=vectors.get, redis_client=fakeredis.FakeRedis(server=server))
+    assert len(reader) == 0
+    vector = reader.embed("refill my prescription")
+    deadline = time.monotonic() + 5
+    while reader.lookup(vector) is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    
+    assert reader.lookup(vector) == {"knowledge": ["refills"]}
+
+
+def test_add_messages_batch(agent_assist):
+    """Test adding a batch of messages across conversations."""
+    agent_assist.add_messages([
+        ("test-conv-6", "patient", "Hello", None),
+        ("test-conv-7", "patient", "Hi there", None),
+        ("test-conv-6", "agent", "How can I help?", None),
+    ])
+    
+    messages = agent_assist.get_conversation_history("test-conv-6")
+    assert [m["text"] for m in messages] == ["Hello", "How can I help?"]
+    assert "test-conv-7" in agent_assist.active_conversations
+
+
+@pytest.mark.asyncio
+async def test_generate_real_time_assist_awaits_llm(agent_assist):
+    """Test that assist generation awaits the async LLM methods."""
+    class FakeLLM:
+        async def asummarize_conversation(self, messages, conversation_id=None):
+            return {"summary": "Patient needs a refill", "confidence": 0.9}
+        
+        async def aredact_conversation(self, messages):
+            return messages
+        
+        async def agenerate_smart_replies(self, context_messages, last_message):
+            return {"replies": [{"text": "I can help with that", "confidence": 0.85}]}
+        
+        async def agenerate_knowledge_snippet(self, query, redact_phi=True):
+            return {"snippet": "Refills take 24 hours", "relevance_score": 0.85}
+    
+    agent_assist.llm_service = FakeLLM()
+    agent_assist.semantic_cache = None
+    conversation_id = "test-conv-8"
+    agent_assist.add_message(conversation_id, "patient", "Hello")
+    agent_assist.add_message(conversation_id, "agent", "How can I help?")
+    agent_assist.add_message(conversation_id, "patient", "I need a refill")
+    
+    response = await agent_assist.generate_real_time_assist(conversation_id)
+    
+    assert response.summary == "Patient needs a refill"
+    assert response.smart_replies[0]["text"] == "I can help with that"
+    assert response.knowledge_snippets[0]["snippet"] == "Refills take 24 hours"
+
+
+@pytest.mark.asyncio
+async def test_knowledge_query_redacted_before_llm_and_cache(agent_assist):
+    """Test knowledge snippets are generated and cached from redacted text."""
+    queries = []
+    
+    class FakeLLM:
+        async def agenerate_knowledge_snippet(self, query, redact_phi=True):
+            queries.append((query, redact_phi))
+            return {"snippet": f"About: {query}", "relevance_score": 0.85}
+    
+    class FakeCache:
+        added = []
+        
+        async def embed_async(self, text):
+            return text
+        
+        def lookup(self, vector):
+            return None
+        
+        def add(self, vector, payload):
+            self.added.append(payload)
+    
+    agent_assist.llm_service = FakeLLM()
+    agent_assist.semantic_cache = FakeCache()
+    conversation_id = "test-conv-9"
+    agent_assist.add_message(conversation_id, "patient", "My SSN is 123-45-6789")
+    
+    response = await agent_assist.generate_real_time_assist(
+        conversation_id, include_summary=False, include_smart_replies=False
+    )
+    
+    assert queries == [("My SSN is [REDACTED_SSN]", False)]
+    assert "123-45-6789" not in response.knowledge_snippets[0]["snippet"]
+    assert "123-45-6789" not in str(FakeCache.added)
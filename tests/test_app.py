@@ -1,7 +1,10 @@
 """Tests for Flask application endpoints."""
 
+import io
+
 import pytest
 from app import app
+from src.genesys.webhooks import PayloadTooLargeError, webhook_handler
 
 
 @pytest.fixture
@@ -63,3 +66,24 @@ def test_not_found(client):
     
     data = response.get_json()
     assert 'error' in data
+
+
+def test_genesys_webhook_rejects_oversized_body(client):
+    """Test oversized webhook bodies are rejected instead of buffered."""
+    response = client.post(
+        '/webhooks/genesys',
+        data=b'x' * (webhook_handler.MAX_BODY_SIZE + 1),
+        content_type='application/json'
+    )
+    
+    assert response.status_code == 413
+
+
+def test_read_signed_body_stops_past_limit():
+    """Test the body reader stops once the size limit is exceeded."""
+    stream = io.BytesIO(b'x' * (webhook_handler.MAX_BODY_SIZE * 2))
+    
+    with pytest.raises(PayloadTooLargeError):
+        webhook_handler.read_signed_body(stream, None)
+    
+    assert stream.tell() < webhook_handler.MAX_BODY_SIZE * 2
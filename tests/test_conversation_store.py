@@ -0,0 +1,50 @@
+"""Tests for the Redis conversation store."""
+
+import pytest
+
+from src.agent_assist.conversation_store import RedisConversationStore
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def store():
+    """Create a Redis store on an in-process fake server."""
+    return RedisConversationStore(fakeredis.FakeRedis(), max_messages=3, ttl_seconds=60)
+
+
+def test_append_registers_and_counts(store):
+    """Test appends register conversations and keep the total within windows."""
+    assert store.append("conv-1", {"text": "a"})
+    assert not store.append("conv-1", {"text": "b"})
+    assert store.append_many([
+        ("conv-1", {"text": "c"}),
+        ("conv-1", {"text": "d"}),
+        ("conv-2", {"text": "e"}),
+    ]) == ["conv-2"]
+    
+    assert [m["text"] for m in store.get_messages("conv-1")] == ["b", "c", "d"]
+    assert len(store) == 2
+    assert store.total_messages() == 4
+
+
+def test_delete_and_expiry_update_total(store):
+    """Test deleted and idle conversations are subtracted from the total."""
+    store.append_many([
+        ("conv-1", {"text": "a"}),
+        ("conv-1", {"text": "b"}),
+        ("conv-2", {"text": "c"}),
+        ("conv-3", {"text": "d"}),
+    ])
+    
+    assert store.delete("conv-1")
+    assert store.total_messages() == 2
+    
+    # Age conv-2 past the TTL; the next write prunes it with its messages
+    store.redis.zadd(store.ACTIVE_KEY, {"conv-2": 0})
+    store.append("conv-3", {"text": "e"})
+    
+    assert "conv-2" not in store
+    assert store.get_messages("conv-2") == []
+    assert len(store) == 1
+    assert store.total_messages() == 2
@@ -0,0 +1,64 @@
+"""Tests for the CRM provider read cache."""
+
+import asyncio
+
+import pytest
+from src.crm.provider import SalesforceCRM, cached_read
+
+
+class CountingCRM(SalesforceCRM):
+    """Salesforce client whose patient read counts upstream calls."""
+    
+    def __init__(self):
+        super().__init__(api_endpoint="https://crm.test", api_key="key")
+        self.calls = 0
+    
+    @cached_read
+    async def get_patient_info(self, patient_id: str):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return {"patient_id": patient_id, "allergies": ["penicillin"]}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_reads_share_one_call():
+    """Test concurrent misses for one patient make a single upstream call."""
+    crm = CountingCRM()
+    
+    results = await asyncio.gather(
+        *(crm.get_patient_info("p1") for _ in range(5))
+    )
+    
+    assert crm.calls == 1
+    assert all(result == results[0] for result in results)
+    
+    await crm.get_patient_info("p1")
+    assert crm.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_abort_shared_read():
+    """Test cancelling one waiter leaves the in-flight read for the others."""
+    crm = CountingCRM()
+    
+    first = asyncio.ensure_future(crm.get_patient_info("p1"))
+    second = asyncio.ensure_future(crm.get_patient_info("p1"))
+    await asyncio.sleep(0)
+    first.cancel()
+    
+    assert (await second)["patient_id"] == "p1"
+    assert crm.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_callers_get_independent_copies():
+    """Test mutating a result does not change the cache or other callers."""
+    crm = CountingCRM()
+    
+    first, second = await asyncio.gather(
+        crm.get_patient_info("p1"), crm.get_patient_info("p1")
+    )
+    first["allergies"].append("latex")
+    
+    assert second["allergies"] == ["penicillin"]
+    assert (await crm.get_patient_info("p1"))["allergies"] == ["penicillin"]
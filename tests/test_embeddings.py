@@ -0,0 +1,106 @@
+"""Tests for the local ONNX embedder's request batching."""
+
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from src.agent_assist import embeddings
+
+
+class FakeEncoding:
+    def __init__(self, text):
+        self.ids = [ord(char) for char in text]
+
+
+class FakeTokenizer:
+    @classmethod
+    def from_file(cls, path):
+        return cls()
+    
+    def enable_truncation(self, max_length):
+        pass
+    
+    def no_padding(self):
+        pass
+    
+    def encode_batch(self, texts):
+        return [FakeEncoding(text) for text in texts]
+
+
+class FakeSession:
+    """Returns each token id as its embedding; run() can be held on a gate."""
+    
+    def __init__(self):
+        self.gate = threading.Event()
+        self.gate.set()
+        self.batch_sizes = []
+    
+    def get_inputs(self):
+        return []
+    
+    def run(self, outputs, feeds):
+        self.gate.wait(5)
+        input_ids = feeds["input_ids"]
+        self.batch_sizes.append(len(input_ids))
+        return [input_ids[..., None].astype(np.float32)]
+
+
+@pytest.fixture
+def embedder(monkeypatch):
+    """Create an embedder running on the fake session and tokenizer."""
+    session = FakeSession()
+    
+    class FakeOrt:
+        SessionOptions = type("SessionOptions", (), {})
+        
+        @staticmethod
+        def InferenceSession(*args, **kwargs):
+            return session
+    
+    monkeypatch.setattr(embeddings, "ort", FakeOrt)
+    monkeypatch.setattr(embeddings, "Tokenizer", FakeTokenizer)
+    embedder = embeddings.OnnxEmbedder("model.onnx", "tokenizer.json")
+    yield embedder
+    embedder._batcher.close()
+
+
+def test_concurrent_calls_share_a_batch(embedder):
+    """Test texts submitted together are embedded in one session run."""
+    embedder.session.gate.clear()
+    blocker = embedder.submit("a")
+    futures = [embedder.submit(text) for text in ("b", "cc", "ddd")]
+    embedder.session.gate.set()
+    
+    assert blocker.result(5)[0] == ord("a")
+    assert [future.result(5)[0] for future in futures] == [ord("b"), ord("c"), ord("d")]
+    # "a" may run alone while the rest queue behind it, never one run each
+    assert len(embedder.session.batch_sizes) <= 2
+    assert sum(embedder.session.batch_sizes) == 4
+
+
+def test_cancelled_request_does_not_stop_embedder(embedder):
+    """Test a request cancelled while queued is skipped and later calls work."""
+    embedder.session.gate.clear()
+    running = embedder.submit("a")
+    cancelled = embedder.submit("b")
+    assert cancelled.cancel()
+    embedder.session.gate.set()
+    
+    assert running.result(5)[0] == ord("a")
+    assert embedder.submit("c").result(5)[0] == ord("c")
+
+
+def test_timed_out_await_does_not_stop_embedder(embedder):
+    """Test an awaiting request timing out leaves the embedder working."""
+    async def timed_out_embed():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(asyncio.wrap_future(embedder.submit("b")), 0.01)
+    
+    embedder.session.gate.clear()
+    embedder.submit("a")
+    asyncio.run(timed_out_embed())
+    embedder.session.gate.set()
+    
+    assert embedder.submit("c").result(5)[0] == ord("c")
@@ -0,0 +1,196 @@
+"""Tests for Gemini LLM service."""
+
+import asyncio
+import math
+import threading
+
+import google.generativeai as genai
+import pytest
+from google.ai import generativelanguage as glm
+from unittest.mock import AsyncMock, MagicMock
+from src.llm_services.gemini_service import GeminiService
+from src.utils.event_loop import background_loop
+
+
+def make_response(text):
+    """Build a stand-in Gemini response."""
+    response = MagicMock()
+    response.text = text
+    response.candidates = []
+    return response
+
+
+@pytest.fixture
+def gemini():
+    """Create Gemini service with a mocked model."""
+    service = GeminiService(model_name="gemini-pro")
+    service.model = MagicMock()
+    return service
+
+
+@pytest.mark.asyncio
+async def test_async_summarize(gemini):
+    """Test async summarization redacts PHI and returns the summary."""
+    gemini.model.generate_content_async = AsyncMock(
+        return_value=make_response("- Patient requested a refill")
+    )
+    
+    result = await gemini.asummarize_conversation([
+        {"role": "patient", "text": "My SSN is 123-45-6789"},
+        {"role": "agent", "text": "Thanks, let me check"},
+    ])
+    
+    assert result["summary"] == "- Patient requested a refill"
+    assert result["message_count"] == 2
+    prompt = gemini.model.generate_content_async.call_args.args[0]
+    assert "123-45-6789" not in prompt
+    assert "PATIENT: My SSN is [REDACTED_SSN]" in prompt
+
+
+@pytest.mark.asyncio
+async def test_async_smart_replies_list_fallback(gemini):
+    """Test smart replies parse a numbered list when the model skips JSON."""
+    gemini.model.generate_content_async = AsyncMock(
+        return_value=make_response("1. I can help with that.\n2. Let me check.")
+    )
+    
+    result = await gemini.agenerate_smart_replies([], "I need a refill")
+    
+    assert [reply["text"] for reply in result["replies"]] == [
+        "I can help with that.",
+        "Let me check.",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_analyze_turn_isolates_failures(gemini):
+    """Test one failed call in analyze_turn does not drop the others."""
+    async def generate(prompt, safety_settings=None):
+        if "clarify patient intent" in prompt:
+            raise RuntimeError("model unavailable")
+        return make_response('["Sure"]')
+    
+    gemini.model.generate_content_async = generate
+    
+    result = await gemini.analyze_turn(
+        [{"role": "patient", "text": "I need a refill"}],
+        "I need a refill",
+        "prescription_refill",
+        0.6
+    )
+    
+    assert result["intent_clarification"] is None
+    assert result["summary"]["summary"] == '["Sure"]'
+    assert result["smart_replies"]["replies"][0]["text"] == "Sure"
+
+
+@pytest.mark.asyncio
+async def test_incremental_summary_after_history_window_slides(gemini):
+    """Test a follow-up summary sends only new turns once old ones are trimmed."""
+    gemini.model.generate_content_async = AsyncMock(
+        return_value=make_response("- Patient requested a refill")
+    )
+    messages = [{"role": "patient", "text": f"message {i}"} for i in range(6)]
+    
+    await gemini.asummarize_conversation(messages[:4], conversation_id="conv-1")
+    await gemini.asummarize_conversation(messages[2:], conversation_id="conv-1")
+    
+    prompt = gemini.model.generate_content_async.call_args.args[0]
+    assert "Current summary:\n- Patient requested a refill" in prompt
+    assert "message 3" not in prompt
+    assert "PATIENT: message 4\nPATIENT: message 5" in prompt
+
+
+@pytest.mark.asyncio
+async def test_caller_cannot_mark_messages_redacted(gemini):
+    """Test a "_redacted" flag from the caller does not skip redaction."""
+    gemini.model.generate_content_async = AsyncMock(
+        return_value=make_response('["Sure"]')
+    )
+    
+    await gemini.agenerate_smart_replies(
+        [{"role": "patient", "text": "SSN 123-45-6789", "_redacted": True}],
+        "Call me at 555-123-4567"
+    )
+    
+    prompt = gemini.model.generate_content_async.call_args.args[0]
+    assert "123-45-6789" not in prompt
+    assert "555-123-4567" not in prompt
+
+
+@pytest.mark.asyncio
+async def test_async_calls_share_one_limit_on_background_loop():
+    """Test async calls from any loop are bounded by one semaphore."""
+    service = GeminiService(model_name="gemini-pro", max_concurrency=2)
+    service.model = MagicMock()
+    in_flight = peak = 0
+    loops = set()
+    
+    async def generate(prompt, safety_settings=None):
+        nonlocal in_flight, peak
+        loops.add(asyncio.get_running_loop())
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return make_response(prompt)
+    
+    service.model.generate_content_async = generate
+    
+    await asyncio.gather(*(service._agenerate(f"prompt {i}") for i in range(6)))
+    
+    assert peak == 2
+    assert loops == {background_loop.loop}
+
+
+def test_confidence_defaults_when_logprobs_not_reported():
+    """Test a real response without log-probabilities uses the default."""
+    unreported = genai.types.GenerateContentResponse.from_response(
+        glm.GenerateContentResponse(candidates=[glm.Candidate()])
+    )
+    reported = genai.types.GenerateContentResponse.from_response(
+        glm.GenerateContentResponse(candidates=[glm.Candidate(avg_logprobs=-0.1)])
+    )
+    
+    assert GeminiService._response_confidence(unreported, 0.9) == 0.9
+    assert GeminiService._response_confidence(reported, 0.9) == pytest.approx(
+        math.exp(-0.1)
+    )
+
+
+
+@pytest.mark.asyncio
+async def test_redis_checkpoints_stay_off_event_loop():
+    """Test shared summary checkpoints use Redis from worker threads only."""
+    fakeredis = pytest.importorskip("fakeredis")
+    redis_threads = set()
+    
+    class RecordingRedis(fakeredis.FakeRedis):
+        def get(self, *args, **kwargs):
+            redis_threads.add(threading.get_ident())
+            return super().get(*args, **kwargs)
+        
+        def set(self, *args, **kwargs):
+            redis_threads.add(threading.get_ident())
+            return super().set(*args, **kwargs)
+    
+    service = GeminiService(model_name="gemini-pro", redis_client=RecordingRedis())
+    service.model = MagicMock()
+    service.model.generate_content_async = AsyncMock(
+        return_value=make_response("- Patient requested a refill")
+    )
+    messages = [{"role": "patient", "text": "I need a refill"}]
+    
+    await service.asummarize_conversation(messages, conversation_id="conv-1")
+    await service.asummarize_conversation(messages, conversation_id="conv-1")
+    
+    loop_threads = {
+        threading.get_ident(),
+        background_loop.run(_running_thread_ident()),
+    }
+    assert redis_threads and not redis_threads & loop_threads
+
+
+async def _running_thread_ident() -> int:
+    """Ident of the thread running the current event loop."""
+    return threading.get_ident()
@@ -0,0 +1,47 @@
+"""Tests for HIPAA-compliant audit logging."""
+
+import logging
+import threading
+
+from src.utils.batching import BackgroundBatcher
+from src.utils.logging import get_logger
+
+
+def test_audit_events_written_in_background(caplog):
+    """Test audit events are flushed by the background batcher."""
+    audit_logger = get_logger("test-audit-background")
+    
+    with caplog.at_level(logging.INFO, logger="test-audit-background"):
+        audit_logger.audit("access", "agent-1", {"resource": "history"})
+        audit_logger._audit_batcher.close()
+    
+    assert any("AUDIT:" in record.getMessage() for record in caplog.records)
+
+
+def test_audit_event_not_dropped_when_queue_full(caplog):
+    """Test a full audit queue falls back to a synchronous write."""
+    audit_logger = get_logger("test-audit-full")
+    gate = threading.Event()
+    written = []
+    
+    def slow_write(entries):
+        gate.wait(5)
+        written.extend(entry["event_type"] for entry in entries)
+    
+    audit_logger._audit_batcher = BackgroundBatcher(
+        slow_write, max_batch_size=1, max_delay=0, max_queue_size=1
+    )
+    
+    with caplog.at_level(logging.INFO, logger="test-audit-full"):
+        audit_logger.audit("first", "agent-1", {})
+        # Wait until the flush thread holds "first", so the queue is empty
+        while audit_logger._audit_batcher._queue.qsize():
+            pass
+        audit_logger.audit("second", "agent-1", {})
+        audit_logger.audit("third", "agent-1", {})
+        
+        assert any('"third"' in record.getMessage() for record in caplog.records)
+        gate.set()
+        audit_logger._audit_batcher.close()
+    
+    assert written == ["first", "second"]
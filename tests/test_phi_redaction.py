@@ -44,7 +44,7 @@ def test_multiple_phi_types():
     """Test multiple PHI types in one text."""
     redactor = PHIRedactor()
     
-    text = "Patient ID: 123456, SSN: 123-45-6789, call 555-1234"
+    text = "Patient ID: 123456, SSN: 123-45-6789, call 555-123-4567"
     redacted, counts = redactor.redact(text)
     
     assert len(counts) >= 2
@@ -75,7 +75,7 @@ def test_redact_dict():
     redactor = PHIRedactor()
     
     data = {
-        "message": "Call me at 555-1234",
+        "message": "Call me at 555-123-4567",
         "patient_info": "SSN: 123-45-6789"
     }
     
@@ -83,3 +83,34 @@ def test_redact_dict():
     
     assert "[REDACTED" in redacted["message"]
     assert "[REDACTED" in redacted["patient_info"]
+
+
+def test_redact_many():
+    """Test batched redaction keeps texts separate and in order."""
+    redactor = PHIRedactor()
+    
+    redacted = redactor.redact_many(["SSN 123-45-6789", "no phi here", "patient@example.com"])
+    
+    assert redacted == ["SSN [REDACTED_SSN]", "no phi here", "[REDACTED_EMAIL]"]
+
+
+def test_bare_digit_runs_redacted():
+    """Test unlabelled SSNs and 10-digit phone numbers are redacted."""
+    redactor = PHIRedactor()
+    
+    assert redactor.redact("my ssn is 123456789")[0] == "my ssn is [REDACTED_SSN]"
+    assert redactor.redact("social security number 123456789")[0] == (
+        "social security number [REDACTED_SSN]"
+    )
+    assert redactor.redact("call 5551234567")[0] == "call [REDACTED_PHONE]"
+    assert redactor.redact("Call (555) 123-4567")[0] == "Call [REDACTED_PHONE]"
+    assert redactor.redact("Call (555)123-4567")[0] == "Call [REDACTED_PHONE]"
+    assert redactor.redact("Card 1234 5678 9012 3456")[0] == "Card [REDACTED_CREDIT_CARD]"
+
+
+def test_short_digit_runs_not_redacted():
+    """Test doses, room numbers and order numbers are not taken for phones."""
+    redactor = PHIRedactor()
+    
+    for text in ["Take 500 1000 mg daily", "Room 305 1200", "Order 1234567"]:
+        assert redactor.redact(text)[0] == text